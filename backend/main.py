@@ -5,6 +5,7 @@ This API wraps the existing business_rules Python package to provide
 REST endpoints for the React frontend.
 """
 
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import sys
@@ -13,10 +14,22 @@ from pathlib import Path
 # Add parent directory to path for business_rules import
 sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
 
-from routers import rules, evaluation, transactions
+from routers import rules, evaluation, transactions, backtest, audit
+from routers.state import audit_log, trace_store
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Write out audited decisions and traces still buffered in memory
+    if audit_log is not None:
+        audit_log.close()
+    if trace_store is not None:
+        trace_store.close()
 
 # Initialize FastAPI app
 app = FastAPI(
+    lifespan=lifespan,
     title="Business Rules API",
     description="Fraud detection rule engine with visual flowchart editing",
     version="1.0.0",
@@ -37,6 +50,8 @@ app.add_middleware(
 app.include_router(rules.router, prefix="/api/v1", tags=["rules"])
 app.include_router(evaluation.router, prefix="/api/v1", tags=["evaluation"])
 app.include_router(transactions.router, prefix="/api/v1", tags=["transactions"])
+app.include_router(backtest.router, prefix="/api/v1", tags=["backtest"])
+app.include_router(audit.router, prefix="/api/v1", tags=["audit"])
 
 @app.get("/")
 async def root():
@@ -0,0 +1,103 @@
+"""
+Audit Router - Query the decision audit log and stored evaluation traces
+"""
+
+from datetime import datetime, timezone
+from fastapi import APIRouter, HTTPException, Query
+from typing import Any, Dict, Optional
+from pathlib import Path
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from business_rules.audit import AuditReader
+from .state import audit_log, trace_store
+
+# Initialize router
+router = APIRouter()
+
+
+def epoch(value: Optional[datetime]) -> Optional[float]:
+    """Epoch seconds of a query timestamp (naive timestamps are taken as UTC)"""
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def require_audit_log():
+    if audit_log is None:
+        raise HTTPException(status_code=404, detail="Audit log disabled: set AUDIT_LOG_DIR")
+    return audit_log
+
+
+# Plain def: the flush wait and file scan block, so FastAPI runs it in its thread pool
+@router.get("/audit/decisions", response_model=Dict[str, Any])
+def query_decisions(
+    start: Optional[datetime] = Query(default=None, description="Earliest decision time (ISO 8601)"),
+    end: Optional[datetime] = Query(default=None, description="Latest decision time (ISO 8601)"),
+    rule_id: Optional[str] = Query(default=None, description="Only decisions made by this rule"),
+    transaction_id: Optional[str] = Query(default=None, description="Only this transaction"),
+    decision: Optional[str] = Query(default=None, description="ALLOW, REVIEW or BLOCK"),
+    version: Optional[str] = Query(default=None, description="Only this config version"),
+    limit: int = Query(default=1000, ge=1, le=100000)
+):
+    """
+    Audited decisions in time order
+
+    Decisions still buffered in memory are written out first, so the result
+    includes everything served by this worker so far.
+    """
+    log = require_audit_log()
+    try:
+        log.flush(timeout=5.0)
+        entries = AuditReader(str(log.directory)).query(
+            start=epoch(start), end=epoch(end), rule_id=rule_id,
+            transaction_id=transaction_id, decision=decision, version=version, limit=limit
+        )
+        return {"decisions": entries, "count": len(entries)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Audit query failed: {str(e)}")
+
+
+@router.get("/audit/stats")
+async def audit_stats():
+    """Entries recorded, written and dropped by this worker's audit log"""
+    return require_audit_log().stats()
+
+
+def require_trace_store():
+    if trace_store is None:
+        raise HTTPException(status_code=404, detail="Trace store disabled: set TRACE_STORE_DIR")
+    return trace_store
+
+
+@router.get("/audit/traces/stats")
+def trace_stats():
+    """Trace files and bytes in the trace store directory"""
+    return require_trace_store().stats()
+
+
+# Plain def: the lookup reads (and may scan) trace files
+@router.get("/audit/traces/{transaction_id}", response_model=Dict[str, Any])
+def get_traces(transaction_id: str):
+    """
+    Every stored execution trace of a transaction, oldest first
+
+    Traces are expanded from their compact encoding back into full
+    EvaluationTrace objects (per-rule timings are not stored and read as 0).
+    """
+    store = require_trace_store()
+    try:
+        traces = store.get(transaction_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Trace lookup failed: {str(e)}")
+    if not traces:
+        raise HTTPException(status_code=404, detail=f"No stored trace for {transaction_id}")
+    return {
+        "transaction_id": transaction_id,
+        "traces": [{**t, "trace": t["trace"].model_dump()} for t in traces],
+        "count": len(traces)
+    }
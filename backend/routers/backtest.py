@@ -0,0 +1,153 @@
+"""
+Backtest Router - Compare rule configs over stored transaction datasets
+"""
+
+from fastapi import APIRouter, HTTPException, Query, Body
+from collections import OrderedDict
+from typing import Dict, Optional, Any, Tuple
+from pathlib import Path
+import os
+import sys
+import threading
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from business_rules.backtest import Backtester, load_dataset
+from business_rules.incremental import IncrementalScorer
+from .state import config_mgr
+
+# Initialize router
+router = APIRouter()
+
+
+# What-if sessions: one incremental scorer per (dataset, baseline version), kept
+# across draft edits so each edit only re-scores the records it can affect
+MAX_WHATIF_SESSIONS = 4
+whatif_sessions: "OrderedDict[Tuple[str, str], IncrementalScorer]" = OrderedDict()
+whatif_lock = threading.Lock()
+
+# Stored datasets (.parquet, .csv, .jsonl) available for backtesting
+data_path = Path(os.environ.get(
+    "BACKTEST_DATA_DIR", Path(__file__).parent.parent.parent / "data"
+)).resolve()
+
+
+def resolve_dataset(name: str) -> Path:
+    """Resolve a dataset name inside the data directory"""
+    path = (data_path / name).resolve()
+    if data_path not in path.parents or not path.is_file():
+        raise HTTPException(status_code=404, detail=f"Dataset {name} not found")
+    return path
+
+
+@router.get("/backtest/datasets")
+async def list_datasets():
+    """List stored datasets available for backtesting"""
+    if not data_path.is_dir():
+        return {"datasets": []}
+    return {
+        "datasets": sorted(
+            str(p.relative_to(data_path)) for p in data_path.rglob("*")
+            if p.suffix.lower() in (".parquet", ".csv", ".jsonl", ".ndjson", ".json")
+        )
+    }
+
+
+@router.post("/backtest")
+def run_backtest(
+    draft: Optional[Dict[str, Any]] = Body(default=None, description="Draft config to compare"),
+    dataset: str = Query(..., description="Dataset file name in the data directory"),
+    version: str = Query(default="v1", description="Baseline config version"),
+    candidate_version: Optional[str] = Query(default=None, description="Stored config to compare")
+):
+    """
+    Backtest a draft (request body) or stored config version against a baseline
+
+    Both configs are evaluated over the dataset in one vectorized pass sharing
+    condition results. Returns decision flips, per-rule hit counts, shadowed
+    rules and risk score distributions.
+    """
+    try:
+        if (draft is None) == (candidate_version is None):
+            raise HTTPException(
+                status_code=400,
+                detail="Provide exactly one of a draft config body or candidate_version"
+            )
+
+        try:
+            baseline = config_mgr.load_rules(version)
+            candidate = draft if draft is not None else config_mgr.load_rules(candidate_version)
+        except FileNotFoundError as e:
+            raise HTTPException(status_code=404, detail=str(e))
+
+        errors = config_mgr.validate_config(candidate)
+        if errors:
+            raise HTTPException(status_code=400, detail={"errors": errors})
+
+        df = load_dataset(str(resolve_dataset(dataset)))
+        report = Backtester(df, str(config_mgr.config_dir)).run(baseline, candidate)
+        return report.model_dump()
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Backtest failed: {str(e)}")
+
+
+@router.post("/backtest/whatif")
+def whatif(
+    draft: Dict[str, Any] = Body(..., description="Draft config being edited"),
+    dataset: str = Query(..., description="Dataset file name in the data directory"),
+    version: str = Query(default="v1", description="Baseline config version"),
+    reset: bool = Query(default=False, description="Start a fresh session from the baseline")
+):
+    """
+    Re-score a dataset for a draft config, incrementally across edits
+
+    The first call for a (dataset, version) pair scores the whole dataset with the
+    baseline config. Each subsequent draft only re-evaluates records whose first
+    matching rule is at or after the first edited rule position.
+    """
+    try:
+        errors = config_mgr.validate_config(draft)
+        if errors:
+            raise HTTPException(status_code=400, detail={"errors": errors})
+
+        key = (dataset, version)
+        with whatif_lock:
+            scorer = None if reset else whatif_sessions.get(key)
+            if scorer is None:
+                try:
+                    baseline = config_mgr.load_rules(version)
+                except FileNotFoundError as e:
+                    raise HTTPException(status_code=404, detail=str(e))
+                scorer = IncrementalScorer(
+                    load_dataset(str(resolve_dataset(dataset))), baseline, str(config_mgr.config_dir)
+                )
+                whatif_sessions[key] = scorer
+                while len(whatif_sessions) > MAX_WHATIF_SESSIONS:
+                    whatif_sessions.popitem(last=False)
+            whatif_sessions.move_to_end(key)
+
+            evaluated_before = scorer.rows_evaluated
+            changed = scorer.sync(draft)
+            results = scorer.results()
+
+            return {
+                "rows": len(results),
+                "rescored_rows": scorer.rows_evaluated - evaluated_before,
+                "changed_by_edit": len(changed),
+                "changed_vs_baseline": len(scorer.changed_since_baseline()),
+                "decision_counts": {
+                    k: int(v) for k, v in results["decision"].value_counts().items()
+                },
+                "rule_hits": {
+                    k: int(v) for k, v in results["matched_rule_id"].value_counts().items()
+                },
+            }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"What-if evaluation failed: {str(e)}")
@@ -2,29 +2,224 @@
 Evaluation Router - Transaction evaluation and tracing
 """
 
-from fastapi import APIRouter, HTTPException, Query
-from typing import Dict, List, Any
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from typing import Callable, Dict, List, Any, Optional, Tuple
 from pathlib import Path
+import asyncio
+import json
 import sys
+import weakref
+import pandas as pd
 
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
 
 from business_rules import RuleEngine, LLMExplainer
 from business_rules.models import RuleResult, EvaluationTrace, LLMExplanation
+from business_rules.all_matches import AGGREGATIONS
+from business_rules.admission import BUSY, OVERLOADED, TOO_LARGE, BulkExecutor, Rejected
+from business_rules.coalescer import BatchCoalescer
+from business_rules.enrichment import FeatureEnricher, KVVelocityStore, VelocityStore
+from business_rules.shadow import ShadowEvaluator
+from business_rules.vectorized import VectorizedRuleSet
+from business_rules.wire import (
+    ARROW, JSON, MSGPACK, RESULT_COLUMNS, evaluate_frame, frame_records, media_type, negotiate,
+    pack, read_table, unpack, write_table,
+)
+from .state import audit_log, engine_cache, trace_store
 import os
+import time
 
 # Initialize router
 router = APIRouter()
 
-# Config path
-config_path = Path(__file__).parent.parent.parent / "config"
+# Shadow versions are evaluated on a background thread, off the request path
+shadow_evaluator = ShadowEvaluator(engine_cache.get)
 
-@router.post("/evaluate", response_model=Dict[str, Any])
+
+def create_enricher() -> FeatureEnricher:
+    """Velocity features kept in-process, or in Redis when ENRICHMENT_REDIS_URL is set"""
+    redis_url = os.environ.get('ENRICHMENT_REDIS_URL')
+    if not redis_url:
+        return FeatureEnricher(VelocityStore())
+    import redis
+    return FeatureEnricher(KVVelocityStore(redis.Redis.from_url(redis_url)))
+
+# Per-account sliding-window features, filled in when enrich=True
+enricher = create_enricher()
+
+
+def evaluate_group(key, records: List[Dict[str, Any]]) -> list:
+    """Evaluate records coalesced under (engine, enable_trace) as one batch"""
+    engine, enable_trace = key
+    if enable_trace:
+        return engine.evaluate_batch_with_trace(records, enable_trace=True)
+    return [(result, None) for result in engine.evaluate_batch(records)]
+
+
+def create_coalescer() -> Optional[BatchCoalescer]:
+    """Micro-batching for /evaluate when EVALUATE_COALESCE_MS is set (off by default)"""
+    window_ms = float(os.environ.get('EVALUATE_COALESCE_MS') or 0)
+    if window_ms <= 0:
+        return None
+    max_batch = int(os.environ.get('EVALUATE_COALESCE_MAX_BATCH') or 64)
+    return BatchCoalescer(evaluate_group, max_batch=max_batch, max_wait_ms=window_ms)
+
+# Concurrent single-transaction requests are evaluated together when enabled
+coalescer = create_coalescer()
+
+# HTTP status for each reason a bulk job can be refused
+REJECTED_STATUS = {BUSY: 429, OVERLOADED: 503, TOO_LARGE: 413}
+
+# Batches at least this large run on the bulk executor instead of the event loop
+BULK_OFFLOAD_MIN_RECORDS = int(os.environ.get('BULK_OFFLOAD_MIN_RECORDS') or 500)
+
+
+def create_bulk_executor() -> BulkExecutor:
+    """Bulk worker pool sized by the BULK_MAX_INFLIGHT / _QUEUED_BATCHES / _QUEUED_RECORDS env vars"""
+    return BulkExecutor(
+        max_inflight=int(os.environ.get('BULK_MAX_INFLIGHT') or 2),
+        max_queued_batches=int(os.environ.get('BULK_MAX_QUEUED_BATCHES') or 8),
+        max_queued_records=int(os.environ.get('BULK_MAX_QUEUED_RECORDS') or 200_000)
+    )
+
+# Large batches are evaluated here, off the event loop, with admission control
+bulk_executor = create_bulk_executor()
+
+
+def get_engine(version: str) -> RuleEngine:
+    """Return the cached engine for a config version (404 if it does not exist)"""
+    try:
+        return engine_cache.get(version)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail=f"Config version {version} not found")
+
+
+def parse_shadow_versions(shadow_versions: Optional[str], version: str) -> List[str]:
+    """Split the comma-separated shadow_versions parameter (404 for unknown versions)"""
+    if not shadow_versions:
+        return []
+    requested = dict.fromkeys(v.strip() for v in shadow_versions.split(","))
+    versions = [v for v in requested if v and v != version]
+    for v in versions:
+        if not engine_cache.config_path(v).is_file():
+            raise HTTPException(status_code=404, detail=f"Shadow config version {v} not found")
+    return versions
+
+
+def audit(results: List[RuleResult], version: str, started: float) -> None:
+    """Queue served decisions to the audit log; batch latency is split evenly per record"""
+    if audit_log is None or not results:
+        return
+    latency_ms = (time.perf_counter() - started) * 1000 / len(results)
+    for result in results:
+        audit_log.record_result(result, version, latency_ms)
+
+
+def store_traces(engine: RuleEngine, traces: List[Optional[EvaluationTrace]]) -> None:
+    """Keep produced traces in the trace store (when TRACE_STORE_DIR is set)"""
+    if trace_store is None:
+        return
+    for trace in traces:
+        if trace is not None:
+            trace_store.put(engine, trace)
+
+
+# Rows evaluated column-wise between checks for waiting single requests
+ARROW_CHUNK_ROWS = 10_000
+
+# Column-wise rule sets for Arrow batches, built once per compiled engine
+rule_sets: 'weakref.WeakKeyDictionary[RuleEngine, VectorizedRuleSet]' = weakref.WeakKeyDictionary()
+
+
+def get_rule_set(engine: RuleEngine) -> VectorizedRuleSet:
+    rule_set = rule_sets.get(engine)
+    if rule_set is None:
+        rule_set = rule_sets[engine] = VectorizedRuleSet.from_engine(engine)
+    return rule_set
+
+
+def body_formats(schema: Dict[str, Any]) -> Dict[str, Any]:
+    """OpenAPI request body accepting the schema as JSON or MessagePack (and Arrow for arrays)"""
+    content = {JSON: {"schema": schema}, MSGPACK: {"schema": schema}}
+    if schema.get("type") == "array":
+        content[ARROW] = {"schema": {"type": "string", "format": "binary"}}
+    return {"requestBody": {"required": True, "content": content}}
+
+
+async def read_body(request: Request, arrow: bool = False) -> Tuple[str, Any]:
+    """(media type, decoded body) of a JSON, MessagePack or (if allowed) Arrow IPC request
+
+    A missing Content-Type is read as JSON. Arrow bodies decode to a DataFrame.
+    """
+    header = request.headers.get("content-type")
+    kind = media_type(header) if header else JSON
+    if kind is None or (kind == ARROW and not arrow):
+        raise HTTPException(status_code=415, detail=f"Unsupported Content-Type: {header}")
+    body = await request.body()
+    try:
+        if kind == JSON:
+            return kind, json.loads(body)
+        if kind == MSGPACK:
+            return kind, unpack(body)
+        return kind, read_table(body)
+    except ImportError as e:
+        raise HTTPException(
+            status_code=415,
+            detail=f"{kind} needs the {e.name} package (pip install 'business-rules[binary]')"
+        )
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Malformed {kind} body: {str(e)}")
+
+
+def response_type(request: Request, kind: str, arrow: bool = False) -> str:
+    """Media type to answer in: from Accept, defaulting to the request's own (406 if none fits)"""
+    supported = (JSON, MSGPACK, ARROW) if arrow else (JSON, MSGPACK)
+    default = kind if kind in supported else JSON
+    accept = negotiate(request.headers.get("accept"), default, supported)
+    if accept is None:
+        raise HTTPException(
+            status_code=406, detail=f"Can respond with {', '.join(supported)}"
+        )
+    return accept
+
+
+def respond(accept: str, payload: Dict[str, Any]):
+    """payload as-is for JSON (FastAPI encodes it), else encoded in the negotiated format
+
+    Arrow responses hold the decision columns of payload['results'] (no traces).
+    """
+    if accept == MSGPACK:
+        return Response(pack(payload), media_type=MSGPACK)
+    if accept == ARROW:
+        results = payload["results"]
+        if not isinstance(results, pd.DataFrame):
+            results = pd.DataFrame(results, columns=list(RESULT_COLUMNS))
+        return Response(write_table(results), media_type=ARROW)
+    if isinstance(payload.get("results"), pd.DataFrame):
+        payload = {**payload, "results": frame_records(payload["results"])}
+    return payload
+
+
+def sanitize_or_reject(validator, transaction: Dict[str, Any]) -> Dict[str, Any]:
+    """Normalize a transaction in one pass, raising 422 if it is invalid"""
+    sanitized, errors = validator.sanitize_and_validate(transaction, keep_unknown=True)
+    if errors:
+        raise HTTPException(status_code=422, detail={"errors": errors})
+    return sanitized
+
+@router.post(
+    "/evaluate", response_model=Dict[str, Any], openapi_extra=body_formats({"type": "object"})
+)
 async def evaluate_transaction(
-    transaction: Dict[str, Any],
+    request: Request,
     enable_trace: bool = Query(default=True, description="Enable execution tracing"),
-    version: str = Query(default="v1", description="Config version")
+    version: str = Query(default="v1", description="Config version"),
+    validate: bool = Query(default=False, description="Validate and normalize input before evaluation"),
+    enrich: bool = Query(default=False, description="Add per-account velocity features before evaluation"),
+    shadow_versions: Optional[str] = Query(
+        default=None, description="Comma-separated config versions to evaluate in shadow"
+    )
 ):
     """
     Evaluate a single transaction against rules
@@ -38,85 +233,315 @@ async def evaluate_transaction(
     - country_mismatch: bool
     - account_age_days: int (optional)
 
+    With enrich=True the transaction is recorded in its account's sliding window
+    (keyed by account_id) and missing velocity features are filled in.
+
+    With validate=True the transaction is checked against the config's features
+    schema and normalized (422 with errors if invalid).
+
+    With shadow_versions, the response still comes from `version`; the shadow
+    versions are evaluated in the background and disagreements are logged
+    (see GET /evaluate/shadow/stats).
+
+    With EVALUATE_COALESCE_MS set, concurrent requests for the same version are
+    gathered for up to that many milliseconds and evaluated as one batch
+    (see GET /evaluate/coalescer/stats).
+
+    The body may be JSON or MessagePack (Content-Type: application/msgpack);
+    the response uses the format named by Accept, else the request's format.
+
     Returns:
     - result: RuleResult object
     - trace: EvaluationTrace object (if enable_trace=True)
     """
+    started = time.perf_counter()
+    kind, transaction = await read_body(request)
+    accept = response_type(request, kind)
+    if not isinstance(transaction, dict):
+        raise HTTPException(status_code=422, detail="Request body must be a transaction object")
     try:
-        # Load rule engine
-        rules_file = config_path / f"rules_{version}.yaml"
-        if not rules_file.exists():
-            raise HTTPException(status_code=404, detail=f"Config version {version} not found")
+        # Load rule engine (compiled once per config version)
+        engine = get_engine(version)
+        shadows = parse_shadow_versions(shadow_versions, version)
+
+        if enrich:
+            # Store updates may block (Redis round-trip, store lock): keep them off the loop
+            transaction = await asyncio.get_running_loop().run_in_executor(
+                None, enricher.enrich, transaction
+            )
 
-        engine = RuleEngine(str(rules_file))
+        if validate:
+            transaction = sanitize_or_reject(engine_cache.get_validator(version), transaction)
 
-        # Evaluate with or without trace
-        if enable_trace:
-            result, trace = engine.evaluate_with_trace(transaction, enable_trace=True)
-            return {
-                "result": result.model_dump(),
-                "trace": trace.model_dump() if trace else None
-            }
+        if shadows:
+            result, trace = shadow_evaluator.evaluate(
+                transaction, engine, shadows, enable_trace, version=version
+            )
         else:
-            result = engine.evaluate(transaction)
-            return {
-                "result": result.model_dump(),
-                "trace": None
-            }
+            # Bulk jobs pause between chunks while single requests are in progress
+            with bulk_executor.single():
+                if coalescer is not None:
+                    result, trace = await coalescer.submit((engine, enable_trace), transaction)
+                elif enable_trace:
+                    # Evaluate with or without trace
+                    result, trace = engine.evaluate_with_trace(transaction, enable_trace=True)
+                else:
+                    result, trace = engine.evaluate(transaction), None
+
+        audit([result], version, started)
+        store_traces(engine, [trace])
+        return respond(accept, {
+            "result": result.model_dump(),
+            "trace": trace.model_dump() if trace else None
+        })
 
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Evaluation failed: {str(e)}")
 
-@router.post("/evaluate/batch", response_model=Dict[str, Any])
-async def evaluate_batch(
+def process_batch(
     transactions: List[Dict[str, Any]],
+    engine: RuleEngine,
+    version: str,
+    shadows: List[str],
+    enable_trace: bool,
+    validate: bool,
+    enrich: bool
+) -> Dict[str, Any]:
+    """Enrich, validate and evaluate a batch, in chunks that yield to single requests"""
+    started = time.perf_counter()
+    if enrich:
+        transactions = enricher.enrich_batch(transactions)
+
+    if validate:
+        validator = engine_cache.get_validator(version)
+        sanitized_batch = []
+        batch_errors = {}
+        for idx, transaction in enumerate(transactions):
+            sanitized, errors = validator.sanitize_and_validate(transaction, keep_unknown=True)
+            if errors:
+                batch_errors[idx] = errors
+            sanitized_batch.append(sanitized)
+        if batch_errors:
+            raise HTTPException(status_code=422, detail={"errors": batch_errors})
+        transactions = sanitized_batch
+
+    outputs = []
+    for chunk in bulk_executor.chunks(transactions):
+        if shadows:
+            outputs.extend(shadow_evaluator.evaluate_batch(
+                chunk, engine, shadows, enable_trace, version=version
+            ))
+        elif enable_trace:
+            outputs.extend(engine.evaluate_batch_with_trace(chunk, enable_trace=True))
+        else:
+            outputs.extend((r, None) for r in engine.evaluate_batch(chunk))
+
+    audit([r for r, t in outputs], version, started)
+    store_traces(engine, [t for r, t in outputs])
+    return {
+        "results": [r.model_dump() for r, t in outputs],
+        "traces": [t.model_dump() if t else None for r, t in outputs] if enable_trace else None,
+        "count": len(outputs)
+    }
+
+
+def process_frame(frame: pd.DataFrame, engine: RuleEngine, version: str) -> Dict[str, Any]:
+    """Evaluate an Arrow batch column-wise, in chunks that yield to single requests"""
+    started = time.perf_counter()
+    rule_set = get_rule_set(engine)
+    parts = []
+    for start in range(0, len(frame), ARROW_CHUNK_ROWS):
+        bulk_executor.checkpoint()
+        parts.append(evaluate_frame(rule_set, frame.iloc[start:start + ARROW_CHUNK_ROWS]))
+    results = (
+        pd.concat(parts, ignore_index=True) if parts
+        else pd.DataFrame(columns=list(RESULT_COLUMNS))
+    )
+
+    if audit_log is not None and len(results):
+        audit_log.record_columns(
+            results['transaction_id'], results['matched_rule_id'], results['risk_score'],
+            results['decision'], version, (time.perf_counter() - started) * 1000 / len(results)
+        )
+    return {"results": results, "traces": None, "count": len(results)}
+
+
+async def run_bulk(work: Callable[[], Dict[str, Any]], records: int) -> Dict[str, Any]:
+    """Run bulk work inline when small, else on the bulk executor (429/413/503 when refused)"""
+    if records < BULK_OFFLOAD_MIN_RECORDS:
+        return work()
+    try:
+        return await bulk_executor.run(work, records)
+    except Rejected as e:
+        raise HTTPException(
+            status_code=REJECTED_STATUS[e.reason],
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
+
+@router.post(
+    "/evaluate/batch", response_model=Dict[str, Any], openapi_extra=body_formats({"type": "array"})
+)
+async def evaluate_batch(
+    request: Request,
     enable_trace: bool = Query(default=True),
-    version: str = Query(default="v1")
+    version: str = Query(default="v1"),
+    validate: bool = Query(default=False, description="Validate and normalize input before evaluation"),
+    enrich: bool = Query(default=False, description="Add per-account velocity features before evaluation"),
+    shadow_versions: Optional[str] = Query(
+        default=None, description="Comma-separated config versions to evaluate in shadow"
+    )
 ):
     """
     Evaluate multiple transactions
 
+    With enrich=True transactions are added to their accounts' sliding windows in
+    order and missing velocity features are filled in.
+
+    With validate=True every transaction is validated and normalized first; if
+    any is invalid the batch is rejected with 422 and errors keyed by index.
+
+    Batches of BULK_OFFLOAD_MIN_RECORDS or more run on a bounded worker pool so
+    they do not block other requests. When it is saturated the request is
+    refused: 429 if all batch slots are taken, 503 if the queued record budget
+    is exhausted, 413 if the batch alone exceeds it (see GET /evaluate/bulk/stats).
+
+    The body may be a JSON or MessagePack list of transactions, or an Arrow IPC
+    stream (Content-Type: application/vnd.apache.arrow.stream) with one column
+    per field. Arrow batches are evaluated column-wise without building a dict
+    per record; they return no traces and do not support shadow_versions,
+    validate or enrich. The response uses the format named by Accept, else the
+    request's format; Arrow responses hold the RuleResult fields as columns.
+
     Returns:
     - results: List of RuleResult objects
     - traces: List of EvaluationTrace objects (if enable_trace=True)
     """
+    kind, transactions = await read_body(request, arrow=True)
+    accept = response_type(request, kind, arrow=True)
+    if kind == ARROW:
+        if shadow_versions or validate or enrich:
+            raise HTTPException(
+                status_code=400,
+                detail="shadow_versions, validate and enrich need a JSON or MessagePack body"
+            )
+    elif not isinstance(transactions, list) or not all(isinstance(t, dict) for t in transactions):
+        raise HTTPException(status_code=422, detail="Request body must be a list of transactions")
     try:
-        # Load rule engine
-        rules_file = config_path / f"rules_{version}.yaml"
-        if not rules_file.exists():
-            raise HTTPException(status_code=404, detail=f"Config version {version} not found")
-
-        engine = RuleEngine(str(rules_file))
-
-        # Batch evaluate
-        if enable_trace:
-            results_with_traces = engine.evaluate_batch_with_trace(transactions, enable_trace=True)
-            results = [r.model_dump() for r, t in results_with_traces]
-            traces = [t.model_dump() if t else None for r, t in results_with_traces]
-            return {
-                "results": results,
-                "traces": traces,
-                "count": len(results)
-            }
+        # Load rule engine (compiled once per config version)
+        engine = get_engine(version)
+        if kind == ARROW:
+            payload = await run_bulk(
+                lambda: process_frame(transactions, engine, version), len(transactions)
+            )
         else:
-            results = engine.evaluate_batch(transactions)
+            shadows = parse_shadow_versions(shadow_versions, version)
+            payload = await run_bulk(
+                lambda: process_batch(
+                    transactions, engine, version, shadows, enable_trace, validate, enrich
+                ),
+                len(transactions)
+            )
+        return respond(accept, payload)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Batch evaluation failed: {str(e)}")
+
+@router.post("/evaluate/all", response_model=Dict[str, Any])
+async def evaluate_all_matches(
+    transaction: Dict[str, Any],
+    version: str = Query(default="v1", description="Config version"),
+    aggregate: str = Query(default="max", description="Score aggregation: max, sum or weighted"),
+    cap: int = Query(default=100, ge=0, description="Upper bound for sum and weighted scores"),
+    enrich: bool = Query(default=False, description="Add per-account velocity features before evaluation")
+):
+    """
+    Evaluate a transaction against every rule (not first-match)
+
+    Returns all matched rule ids, a bitmask of matched rule positions, the
+    aggregated score and the most severe matched decision. The DEFAULT rule is
+    reported only when nothing else matched.
+    """
+    if aggregate not in AGGREGATIONS:
+        raise HTTPException(status_code=400, detail=f"aggregate must be one of {list(AGGREGATIONS)}")
+    try:
+        engine = get_engine(version)
+        if enrich:
+            # Store updates may block (Redis round-trip, store lock): keep them off the loop
+            transaction = await asyncio.get_running_loop().run_in_executor(
+                None, enricher.enrich, transaction
+            )
+        return engine.evaluate_all(transaction, aggregate, cap).model_dump()
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Evaluation failed: {str(e)}")
+
+@router.post("/evaluate/batch/all", response_model=Dict[str, Any])
+async def evaluate_batch_all_matches(
+    transactions: List[Dict[str, Any]],
+    version: str = Query(default="v1"),
+    aggregate: str = Query(default="max", description="Score aggregation: max, sum or weighted"),
+    cap: int = Query(default=100, ge=0, description="Upper bound for sum and weighted scores"),
+    enrich: bool = Query(default=False, description="Add per-account velocity features before evaluation")
+):
+    """
+    All-matches evaluation of multiple transactions
+
+    Returns:
+    - results: List of AllMatchesResult objects
+    - rule_ids: Rule ids in config order (bit i of matched_mask is rule_ids[i])
+    """
+    if aggregate not in AGGREGATIONS:
+        raise HTTPException(status_code=400, detail=f"aggregate must be one of {list(AGGREGATIONS)}")
+    try:
+        engine = get_engine(version)
+
+        def work() -> Dict[str, Any]:
+            batch = enricher.enrich_batch(transactions) if enrich else transactions
+            results = []
+            for chunk in bulk_executor.chunks(batch):
+                results.extend(engine.evaluate_batch_all(chunk, aggregate, cap))
             return {
                 "results": [r.model_dump() for r in results],
-                "traces": None,
+                "rule_ids": [r['id'] for r in engine.rules],
                 "count": len(results)
             }
 
+        return await run_bulk(work, len(transactions))
+
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Batch evaluation failed: {str(e)}")
 
+@router.get("/evaluate/shadow/stats")
+async def shadow_stats():
+    """Shadow evaluation counts per version (evaluated, disagreements, decision changes)"""
+    return shadow_evaluator.stats()
+
+@router.get("/evaluate/bulk/stats")
+async def bulk_stats():
+    """Bulk executor load, limits, and completed/rejected batch counts"""
+    return bulk_executor.stats()
+
+@router.get("/evaluate/coalescer/stats")
+async def coalescer_stats():
+    """Achieved batch sizes of the /evaluate coalescer (enabled: false if it is off)"""
+    if coalescer is None:
+        return {"enabled": False}
+    return {"enabled": True, **coalescer.stats()}
+
 @router.post("/explain", response_model=Dict[str, Any])
 async def generate_explanation(
     transaction: Dict[str, Any],
-    result: Dict[str, Any]
+    result: Dict[str, Any],
+    version: str = Query(default="v1", description="Config version used for field filtering")
 ):
     """
     Generate LLM explanation for a transaction result
@@ -125,6 +550,9 @@ async def generate_explanation(
     - transaction: Original transaction data
     - result: RuleResult from evaluation
 
+    Only fields referenced by the matched rule (plus a small allowlist) are sent
+    to the LLM.
+
     Requires ANTHROPIC_API_KEY environment variable
     """
     try:
@@ -146,12 +574,19 @@ async def generate_explanation(
             rule_reason=result.get('rule_reason')
         )
 
+        # Rules are used to filter the transaction down to referenced fields
+        try:
+            rules = engine_cache.get(version).rules
+        except FileNotFoundError:
+            rules = None
+
         # Generate explanation
-        explainer = LLMExplainer()
+        explainer = LLMExplainer(rules=rules)
         explanation = explainer.generate_explanation(transaction, rule_result)
 
         return {
-            "explanation": explanation.model_dump()
+            "explanation": explanation.model_dump(),
+            "usage": explainer.last_usage.model_dump() if explainer.last_usage else None
         }
 
     except HTTPException:
@@ -10,15 +10,11 @@ import sys
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
 
-from business_rules import ConfigManager
+from .state import config_mgr
 
 # Initialize router
 router = APIRouter()
 
-# Initialize config manager
-config_path = Path(__file__).parent.parent.parent / "config"
-config_mgr = ConfigManager(str(config_path))
-
 @router.get("/rules")
 async def list_rules(version: str = Query(default="v1", description="Config version")):
     """
@@ -38,6 +34,66 @@ async def list_rules(version: str = Query(default="v1", description="Config vers
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to load rules: {str(e)}")
 
+@router.get("/rules/history")
+async def rule_history(
+    version: str = Query(default="v1"),
+    limit: int = Query(default=50, ge=1, le=1000, description="Most recent snapshots to return")
+):
+    """List config snapshots for a version, newest first"""
+    history = config_mgr.history(version)
+    return {
+        "version": version,
+        "total": len(history),
+        "snapshots": history[::-1][:limit]
+    }
+
+@router.get("/rules/diff")
+async def rule_diff(
+    from_ref: str = Query(..., alias="from", description="Snapshot seq or hash prefix"),
+    to_ref: Optional[str] = Query(default=None, alias="to", description="Defaults to latest"),
+    version: str = Query(default="v1")
+):
+    """Rule-level diff between two config snapshots"""
+    try:
+        return config_mgr.diff_snapshots(from_ref, to_ref, version=version)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e.args[0]))
+
+@router.post("/rules/rollback")
+async def rollback_rules(
+    to: str = Query(..., description="Snapshot seq or hash prefix"),
+    version: str = Query(default="v1")
+):
+    """Restore a past config snapshot and republish its engine"""
+    try:
+        entry = config_mgr.rollback(to, version=version)
+        return {
+            "status": "rolled_back",
+            "snapshot": entry,
+            "message": f"Config {version} restored from snapshot {to}"
+        }
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e.args[0]))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/rules/analysis")
+async def analyze_rules(version: str = Query(default="v1")):
+    """
+    Static analysis of a config version
+
+    Lists rules that can never be the first match: contradictory conditions,
+    subsumed by one earlier rule, or unreachable behind several earlier rules.
+    """
+    try:
+        config = config_mgr.load_rules(version=version)
+        findings = config_mgr.analyze_config(config)
+        return {"version": version, "findings": findings, "count": len(findings)}
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail=f"Config version {version} not found")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/rules/{rule_id}")
 async def get_rule(rule_id: str, version: str = Query(default="v1")):
     """Get a specific rule by ID"""
@@ -219,17 +275,33 @@ async def reorder_rules(
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/rules/validate")
-async def validate_rule_endpoint(rule: Dict[str, Any]):
+async def validate_rule_endpoint(
+    rule: Dict[str, Any],
+    version: str = Query(default="v1", description="Config version to check the rule against"),
+    position: Optional[int] = Query(default=None, description="Intended position (None = before DEFAULT)")
+):
     """
     Validate a rule without saving it
 
-    Returns list of validation errors (empty if valid)
+    Returns list of validation errors (empty if valid) and warnings from static
+    analysis of the config with the rule in place (an existing rule with the
+    same id is replaced): the rule can never fire, or it makes later rules
+    unreachable.
     """
     try:
         errors = config_mgr.validate_rule(rule)
+        warnings = []
+        if not errors:
+            try:
+                config = config_mgr.load_rules(version=version)
+            except FileNotFoundError:
+                config = None
+            if config is not None:
+                warnings = rule_warnings(config, rule, position)
         return {
             "valid": len(errors) == 0,
-            "errors": errors
+            "errors": errors,
+            "warnings": warnings
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -243,3 +315,20 @@ async def get_next_rule_id(version: str = Query(default="v1")):
         return {"next_id": next_id}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+def rule_warnings(config: Dict[str, Any], rule: Dict[str, Any], position: Optional[int]) -> List[str]:
+    """Analyzer findings introduced by placing rule in config"""
+    rules = list(config.get('rules') or [])
+    existing = next((i for i, r in enumerate(rules) if r.get('id') == rule.get('id')), None)
+    if existing is not None:
+        rules[existing] = rule
+    else:
+        default_idx = next((i for i, r in enumerate(rules) if r.get('logic') == 'ALWAYS'), len(rules))
+        rules.insert(position if position is not None else default_idx, rule)
+
+    before = {(f['rule_id'], f['kind']) for f in config_mgr.analyze_config(config)}
+    return [
+        f['message'] for f in config_mgr.analyze_config({**config, 'rules': rules})
+        if f['rule_id'] == rule.get('id') or (f['rule_id'], f['kind']) not in before
+    ]
@@ -0,0 +1,56 @@
+"""
+Shared router state - config manager and compiled engines cached per config version
+"""
+
+from pathlib import Path
+from typing import Optional
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from business_rules import ConfigManager, EngineCache
+from business_rules.audit import AuditLog
+from business_rules.trace_store import TraceStore
+
+# Config path
+config_path = Path(__file__).parent.parent.parent / "config"
+
+
+def env_flag(name: str) -> bool:
+    return os.environ.get(name, '').lower() in ('1', 'true', 'yes')
+
+# Engines (and their feature-schema validators) shared by all routers. With
+# RULES_PRUNE_UNREACHABLE=1, rules that can never fire are left out of engines;
+# with RULES_DECISION_DAG=1, evaluation runs on a compiled decision DAG.
+engine_cache = EngineCache(
+    str(config_path),
+    prune_unreachable=env_flag('RULES_PRUNE_UNREACHABLE'),
+    decision_dag=env_flag('RULES_DECISION_DAG')
+)
+
+# Config manager shared by routers; every save republishes the compiled engine
+config_mgr = ConfigManager(str(config_path), on_save=engine_cache.publish)
+
+
+def create_audit_log() -> Optional[AuditLog]:
+    """Decision audit log in AUDIT_LOG_DIR (off when unset); AUDIT_LOG_POLICY=drop|block"""
+    directory = os.environ.get('AUDIT_LOG_DIR')
+    if not directory:
+        return None
+    return AuditLog(directory, policy=os.environ.get('AUDIT_LOG_POLICY') or 'drop')
+
+# Every served decision is queued here and written to disk in the background
+audit_log = create_audit_log()
+
+
+def create_trace_store() -> Optional[TraceStore]:
+    """Evaluation trace store in TRACE_STORE_DIR (off when unset)"""
+    directory = os.environ.get('TRACE_STORE_DIR')
+    if not directory:
+        return None
+    return TraceStore(directory)
+
+# Every trace produced by an evaluation is kept here, encoded against its config
+trace_store = create_trace_store()
@@ -3,7 +3,7 @@ Transactions Router - Test data generation and field metadata
 """
 
 from fastapi import APIRouter, HTTPException, Query
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 from pathlib import Path
 import sys
 
@@ -12,28 +12,33 @@ sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
 
 from business_rules.data_generator import FraudDataGenerator
 from business_rules.data_validator import DataValidator
+from .state import engine_cache
 
 # Initialize router
 router = APIRouter()
 
-# Initialize data generator and validator
-data_generator = FraudDataGenerator()
+# Initialize validator
 data_validator = DataValidator()
 
 @router.post("/transactions/generate")
 async def generate_transactions(
-    count: int = Query(default=5, ge=1, le=100, description="Number of transactions to generate")
+    count: int = Query(default=5, ge=1, le=10000, description="Number of transactions to generate"),
+    seed: Optional[int] = Query(default=None, description="Seed for reproducible data"),
+    fraud_ratio: float = Query(default=0.15, ge=0.0, le=1.0, description="Share of fraudulent transactions")
 ):
     """
     Generate random test transactions
 
     Query params:
-    - count: Number of transactions (1-100)
+    - count: Number of transactions (1-10000)
+    - seed: Optional seed for reproducible data (timestamps stay within the current month)
+    - fraud_ratio: Share of fraudulent transactions (default 0.15)
 
     Returns list of transaction dictionaries
     """
     try:
-        df = data_generator.generate_dataset(n=count)
+        generator = FraudDataGenerator(fraud_ratio=fraud_ratio, seed=seed)
+        df = generator.generate_columns(n=count)
         transactions = df.to_dict('records')
 
         return {
@@ -45,9 +50,12 @@ async def generate_transactions(
         raise HTTPException(status_code=500, detail=f"Failed to generate transactions: {str(e)}")
 
 @router.post("/transactions/validate")
-async def validate_transaction_endpoint(transaction: Dict[str, Any]):
+async def validate_transaction_endpoint(
+    transaction: Dict[str, Any],
+    version: str = Query(default="v1", description="Config version whose features schema is used")
+):
     """
-    Validate a transaction
+    Validate a transaction against the config's features schema
 
     Returns:
     - valid: bool
@@ -55,12 +63,15 @@ async def validate_transaction_endpoint(transaction: Dict[str, Any]):
     - sanitized: Sanitized transaction data (if valid)
     """
     try:
-        errors = data_validator.validate_transaction(transaction)
-        is_valid = len(errors) == 0
+        try:
+            validator = engine_cache.get_validator(version)
+        except FileNotFoundError:
+            raise HTTPException(status_code=404, detail=f"Config version {version} not found")
 
-        sanitized = None
-        if is_valid:
-            sanitized = data_validator.sanitize_transaction(transaction)
+        sanitized, errors = validator.sanitize_and_validate(transaction)
+        is_valid = len(errors) == 0
+        if not is_valid:
+            sanitized = None
 
         return {
             "valid": is_valid,
@@ -68,6 +79,8 @@ async def validate_transaction_endpoint(transaction: Dict[str, Any]):
             "sanitized": sanitized
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Validation failed: {str(e)}")
 
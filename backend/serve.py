@@ -0,0 +1,319 @@
+"""
+Pre-fork production server for the Business Rules API
+
+The master process imports the app, compiles every config version in the
+config directory, freezes the garbage collector and then forks N uvicorn
+workers that share one listening socket. Compiled engines are inherited
+copy-on-write; with the objects frozen, the collector never writes to their
+headers, so their pages stay shared between workers.
+
+Signals (to the master):
+- SIGHUP: recompile all config versions in the master, then replace workers
+  one at a time so they share the new engines (also done automatically when a
+  config file changes, with --watch)
+- SIGUSR1: log per-worker memory (RSS, PSS, shared and private)
+- SIGTERM / SIGINT: stop all workers gracefully and exit
+
+Each worker also serves GET /health/worker with its own pid and memory use.
+
+Usage:
+    python backend/serve.py --workers 4 --port 8000
+"""
+
+import argparse
+import gc
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+logger = logging.getLogger("business_rules.serve")
+
+
+def process_memory(pid: Optional[int] = None) -> Dict[str, float]:
+    """Memory of a process in MB: rss, plus pss/shared/private where /proc provides them"""
+    proc = Path("/proc") / str(pid or os.getpid())
+    fields = {}
+    try:
+        for line in (proc / "smaps_rollup").read_text().splitlines()[1:]:
+            name, value = line.split(":", 1)
+            fields[name] = int(value.split()[0]) / 1024
+    except (OSError, ValueError):
+        try:
+            for line in (proc / "status").read_text().splitlines():
+                if line.startswith("VmRSS:"):
+                    return {"rss": int(line.split()[1]) / 1024}
+        except OSError:
+            pass
+        import resource
+        # ru_maxrss is the peak, in KB on Linux; the best available without /proc
+        return {"max_rss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}
+    return {
+        "rss": fields.get("Rss", 0.0),
+        "pss": fields.get("Pss", 0.0),
+        "shared": fields.get("Shared_Clean", 0.0) + fields.get("Shared_Dirty", 0.0),
+        "private": fields.get("Private_Clean", 0.0) + fields.get("Private_Dirty", 0.0),
+    }
+
+
+def format_memory(memory: Dict[str, float]) -> str:
+    return " ".join(f"{name}={value:.1f}MB" for name, value in memory.items())
+
+
+def config_versions(config_dir: Path) -> List[str]:
+    return sorted(p.stem[len("rules_"):] for p in config_dir.glob("rules_*.yaml"))
+
+
+def config_stamp(config_dir: Path) -> tuple:
+    """Names, mtimes and sizes of the config files (changes trigger a reload with --watch)"""
+    stamp = []
+    for path in sorted(config_dir.glob("rules_*.yaml")):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        stamp.append((path.name, stat.st_mtime_ns, stat.st_size))
+    return tuple(stamp)
+
+
+def warm(engine_cache) -> List[str]:
+    """Compile every config version (engine, validator and lazily built plans)"""
+    loaded = []
+    for version in config_versions(engine_cache.config_dir):
+        try:
+            engine = engine_cache.get(version)
+            engine_cache.get_validator(version)
+        except Exception:
+            logger.exception("config version %s failed to load", version)
+            continue
+        try:
+            # Builds structures that are otherwise created on the first request
+            engine.evaluate_all({})
+        except Exception:
+            pass
+        loaded.append(version)
+    return loaded
+
+
+class Master:
+    """Forks and supervises uvicorn workers sharing the master's compiled engines"""
+
+    def __init__(self, args):
+        self.args = args
+        self.workers: Dict[int, float] = {}  # pid -> start time
+        self.retiring: Dict[int, float] = {}  # pid -> time SIGTERM was sent
+        self.respawn_at: List[float] = []  # replacements for crashed workers, by due time
+        self.crashes = 0
+        self.reload_requested = False
+        self.report_requested = False
+        self.stopping = False
+
+        import uvicorn  # noqa: F401 - fail here rather than in every worker
+        from main import app
+        from routers.state import engine_cache
+
+        self.app = app
+        self.engine_cache = engine_cache
+        self.app.add_api_route("/health/worker", self.worker_health, methods=["GET"])
+        self.stamp = config_stamp(engine_cache.config_dir)
+        self.prepare()
+
+        self.sock = socket.socket(socket.AF_INET6 if ":" in args.host else socket.AF_INET)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind((args.host, args.port))
+        self.sock.listen(args.backlog)
+        self.sock.set_inheritable(True)
+
+    @staticmethod
+    async def worker_health():
+        """Pid and memory of the worker process serving this request"""
+        return {"pid": os.getpid(), "memory_mb": process_memory()}
+
+    def prepare(self) -> None:
+        """(Re)compile all versions in the master and freeze them for sharing"""
+        gc.unfreeze()
+        # No collections while compiling: objects are frozen in one go below
+        gc.disable()
+        self.engine_cache.invalidate()
+        started = time.perf_counter()
+        versions = warm(self.engine_cache)
+        gc.collect()
+        # Everything allocated so far goes to the permanent generation, so the
+        # collector in the workers never touches (and copies) those pages
+        gc.freeze()
+        gc.enable()
+        logger.info(
+            "compiled %d config versions (%s) in %.0f ms; master %s",
+            len(versions), ", ".join(versions), (time.perf_counter() - started) * 1e3,
+            format_memory(process_memory())
+        )
+
+    def spawn(self) -> int:
+        pid = os.fork()
+        if pid:
+            self.workers[pid] = time.time()
+            return pid
+
+        # Worker
+        try:
+            for sig in (signal.SIGHUP, signal.SIGUSR1, signal.SIGTERM, signal.SIGINT, signal.SIGCHLD):
+                signal.signal(sig, signal.SIG_DFL)
+            gc.enable()
+            import uvicorn
+
+            config = uvicorn.Config(
+                self.app,
+                log_level=self.args.log_level,
+                access_log=self.args.access_log,
+                timeout_graceful_shutdown=self.args.graceful_timeout
+            )
+            uvicorn.Server(config).run(sockets=[self.sock])
+            code = 0
+        except BaseException:
+            logger.exception("worker %d crashed", os.getpid())
+            code = 1
+        os._exit(code)
+
+    def reload(self) -> None:
+        """Recompile in the master, then replace workers one by one"""
+        self.stamp = config_stamp(self.engine_cache.config_dir)
+        self.prepare()
+        for pid in list(self.workers):
+            self.spawn()
+            self.retire(pid)
+            # Let the replacement start accepting before retiring the next one
+            time.sleep(self.args.reload_stagger)
+        logger.info("reload complete: workers %s", sorted(self.workers))
+
+    def retire(self, pid: int) -> None:
+        self.workers.pop(pid, None)
+        self.retiring[pid] = time.time()
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            self.retiring.pop(pid, None)
+
+    def report(self) -> None:
+        for pid in sorted(self.workers):
+            logger.info("worker %d %s", pid, format_memory(process_memory(pid)))
+
+    def reap(self) -> None:
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            if self.retiring.pop(pid, None) is not None:
+                continue
+            started = self.workers.pop(pid, None)
+            if started is None or self.stopping:
+                continue
+            # Back off when workers keep dying right after starting
+            self.crashes = self.crashes + 1 if time.time() - started < 5 else 0
+            delay = min(30.0, 0.5 * 2 ** self.crashes) if self.crashes else 0.0
+            logger.warning(
+                "worker %d exited (status %d); replacing it in %.1f s", pid, status, delay
+            )
+            self.respawn_at.append(time.time() + delay)
+
+    def run(self) -> None:
+        def on_signal(signum, frame):
+            if signum == signal.SIGHUP:
+                self.reload_requested = True
+            elif signum == signal.SIGUSR1:
+                self.report_requested = True
+            else:
+                self.stopping = True
+
+        for sig in (signal.SIGHUP, signal.SIGUSR1, signal.SIGTERM, signal.SIGINT):
+            signal.signal(sig, on_signal)
+
+        for _ in range(self.args.workers):
+            self.spawn()
+        logger.info(
+            "serving on %s:%d with %d workers %s",
+            self.args.host, self.args.port, self.args.workers, sorted(self.workers)
+        )
+
+        next_report = time.time() + self.args.stats_interval if self.args.stats_interval else None
+        while not self.stopping:
+            time.sleep(0.5)
+            self.reap()
+            due = [t for t in self.respawn_at if t <= time.time()]
+            for t in due:
+                self.respawn_at.remove(t)
+                self.spawn()
+            if self.args.watch and config_stamp(self.engine_cache.config_dir) != self.stamp:
+                logger.info("config files changed")
+                self.reload_requested = True
+            if self.reload_requested:
+                self.reload_requested = False
+                self.reload()
+            now = time.time()
+            if self.report_requested or (next_report and now >= next_report):
+                self.report_requested = False
+                self.report()
+                if next_report:
+                    next_report = now + self.args.stats_interval
+            # Workers that ignore SIGTERM past the graceful timeout are killed
+            for pid, since in list(self.retiring.items()):
+                if now - since > self.args.graceful_timeout + 5:
+                    try:
+                        os.kill(pid, signal.SIGKILL)
+                    except ProcessLookupError:
+                        self.retiring.pop(pid, None)
+
+        self.shutdown()
+
+    def shutdown(self) -> None:
+        for pid in list(self.workers):
+            self.retire(pid)
+        deadline = time.time() + self.args.graceful_timeout + 5
+        while self.retiring and time.time() < deadline:
+            self.reap()
+            time.sleep(0.1)
+        for pid in self.retiring:
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        self.sock.close()
+        logger.info("stopped")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-fork server for the Business Rules API")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--backlog", type=int, default=2048)
+    parser.add_argument("--watch", action="store_true", help="Reload when config files change")
+    parser.add_argument(
+        "--stats-interval", type=float, default=0, help="Log per-worker memory every N seconds"
+    )
+    parser.add_argument("--graceful-timeout", type=int, default=30)
+    parser.add_argument(
+        "--reload-stagger", type=float, default=0.5, help="Seconds between worker replacements"
+    )
+    parser.add_argument("--log-level", default="info")
+    parser.add_argument("--access-log", action="store_true")
+    args = parser.parse_args()
+
+    if not hasattr(os, "fork"):
+        parser.error("pre-fork serving needs os.fork(); use `uvicorn main:app` on this platform")
+    logging.basicConfig(
+        level=args.log_level.upper(), format="%(asctime)s %(name)s[%(process)d] %(message)s"
+    )
+    Master(args).run()
+
+
+if __name__ == "__main__":
+    main()
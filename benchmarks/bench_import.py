@@ -0,0 +1,71 @@
+"""
+Import-time benchmark: `from business_rules import RuleEngine` must stay lightweight
+
+Each run imports the package in a fresh interpreter and records the wall time
+of the import statement. Fails (exit code 1) if the import loads any of the
+heavy optional dependencies, or if the best time exceeds --max-ms.
+
+Usage:
+    python benchmarks/bench_import.py [--repeat 7] [--max-ms 500]
+    python benchmarks/bench_import.py --statement "from business_rules import EngineCache"
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+SRC = Path(__file__).parent.parent / "src"
+
+# Modules a RuleEngine-only worker should never load
+HEAVY_MODULES = ("anthropic", "faker", "pandas", "numpy", "httpx")
+
+PROBE = """
+import json, sys, time
+sys.path.insert(0, {src!r})
+start = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - start
+loaded = sorted({{m.split('.')[0] for m in sys.modules}} & set({heavy!r}))
+print(json.dumps({{"seconds": elapsed, "heavy": loaded}}))
+"""
+
+
+def probe(statement: str) -> dict:
+    code = PROBE.format(src=str(SRC), statement=statement, heavy=HEAVY_MODULES)
+    out = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--statement", default="from business_rules import RuleEngine")
+    parser.add_argument("--repeat", type=int, default=7, help="Fresh interpreters (best is reported)")
+    parser.add_argument("--max-ms", type=float, default=500.0, help="Fail above this import time")
+    parser.add_argument(
+        "--allow-heavy", action="store_true", help="Only report which heavy modules were loaded"
+    )
+    args = parser.parse_args()
+
+    runs = [probe(args.statement) for _ in range(args.repeat)]
+    times = sorted(r["seconds"] * 1e3 for r in runs)
+    heavy = runs[0]["heavy"]
+    print(f"{args.statement}")
+    print(f"  best {times[0]:.1f} ms, median {times[len(times) // 2]:.1f} ms over {args.repeat} runs")
+    print(f"  heavy modules loaded: {', '.join(heavy) or 'none'}")
+
+    failures = []
+    if heavy and not args.allow_heavy:
+        failures.append(f"imports {', '.join(heavy)}")
+    if times[0] > args.max_ms:
+        failures.append(f"{times[0]:.1f} ms exceeds {args.max_ms:.0f} ms")
+    if failures:
+        print(f"FAIL: {'; '.join(failures)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Micro-benchmark: overhead of single-pass sanitize+validate on the evaluation path
+
+Compares, per transaction:
+- evaluate only (what /evaluate does with validate=false)
+- sanitize_and_validate + evaluate (validate=true)
+- validate_transaction + sanitize_transaction + evaluate (the old two-pass flow)
+
+With --api it also times POST /api/v1/evaluate with validate=false/true through
+an in-process FastAPI client (requires the 'api' extra).
+
+Usage:
+    python benchmarks/bench_validation.py [--n 2000] [--repeat 5] [--api]
+"""
+
+import argparse
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from business_rules import EngineCache, generate_test_transactions
+
+CONFIG_DIR = Path(__file__).parent.parent / "config"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--n", type=int, default=2000, help="Transactions per run")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs (best is reported)")
+    parser.add_argument("--version", default="v1", help="Config version")
+    parser.add_argument("--api", action="store_true", help="Also time the /evaluate endpoint")
+    args = parser.parse_args()
+
+    cache = EngineCache(str(CONFIG_DIR))
+    engine = cache.get(args.version)
+    validator = cache.get_validator(args.version)
+    records = generate_test_transactions(n=args.n).to_dict('records')
+
+    def evaluate_only():
+        for record in records:
+            engine.evaluate(record)
+
+    def single_pass():
+        for record in records:
+            sanitized, errors = validator.sanitize_and_validate(record, keep_unknown=True)
+            engine.evaluate(sanitized)
+
+    def two_pass():
+        for record in records:
+            validator.validate_transaction(record)
+            engine.evaluate(validator.sanitize_transaction(record))
+
+    def validation_only():
+        for record in records:
+            validator.sanitize_and_validate(record, keep_unknown=True)
+
+    timings = {}
+    for name, fn in [
+        ("evaluate", evaluate_only),
+        ("sanitize_and_validate + evaluate", single_pass),
+        ("validate + sanitize + evaluate", two_pass),
+        ("sanitize_and_validate only", validation_only),
+    ]:
+        best = min(timeit.repeat(fn, number=1, repeat=args.repeat))
+        timings[name] = best / args.n * 1e6
+
+    base = timings["evaluate"]
+    print(f"{'path':<36} {'us/txn':>9} {'overhead':>9}")
+    for name, us in timings.items():
+        overhead = "" if name == "evaluate" or name.endswith("only") else f"{(us - base) / base:+.1%}"
+        print(f"{name:<36} {us:>9.2f} {overhead:>9}")
+
+    if args.api:
+        bench_api(records[:200], args.version, args.repeat)
+
+
+def bench_api(records, version, repeat):
+    """Time /evaluate end to end with and without validation"""
+    sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+    from fastapi.testclient import TestClient
+    from main import app
+
+    client = TestClient(app)
+
+    def run(validate):
+        params = {"enable_trace": "false", "version": version, "validate": validate}
+        for record in records:
+            client.post("/api/v1/evaluate", json=record, params=params)
+
+    plain = min(timeit.repeat(lambda: run("false"), number=1, repeat=repeat)) / len(records) * 1e6
+    checked = min(timeit.repeat(lambda: run("true"), number=1, repeat=repeat)) / len(records) * 1e6
+    print()
+    print(f"{'/evaluate validate=false':<36} {plain:>9.2f}")
+    print(f"{'/evaluate validate=true':<36} {checked:>9.2f} {(checked - plain) / plain:>+9.1%}")
+
+
+if __name__ == "__main__":
+    main()
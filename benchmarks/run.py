@@ -0,0 +1,371 @@
+"""
+Benchmark suite for the rule engine, validator, config manager and API
+
+Every case is parameterized by rule count and batch size and uses data from
+FraudDataGenerator with a fixed seed, so runs are reproducible. Results can be
+written as JSON and compared against a stored baseline.
+
+Usage:
+    python benchmarks/run.py                                  # all suites, print table
+    python benchmarks/run.py --output results.json            # save results
+    python benchmarks/run.py --compare baseline.json          # fail on regressions
+    python benchmarks/run.py --suites engine,validator --rules 10,100 --batch 1000
+"""
+
+import argparse
+import json
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import timeit
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+import yaml
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+from business_rules import ConfigManager, DataValidator, FraudDataGenerator, RuleEngine
+from business_rules.decision_dag import DecisionDAG
+
+SUITES = ["engine", "vectorized", "coalescer", "validator", "config", "enrichment", "api"]
+
+# Condition templates used to synthesize rule sets of any size
+CONDITION_TEMPLATES = [
+    ("transaction_amount", ">", lambda r: round(r.uniform(100, 20000), 2)),
+    ("transaction_amount", "<", lambda r: round(r.uniform(10, 500), 2)),
+    ("transaction_velocity_24h", ">", lambda r: r.randint(3, 40)),
+    ("account_age_days", "<", lambda r: r.randint(7, 400)),
+    ("merchant_category", "==", lambda r: r.choice(FraudDataGenerator.MERCHANT_CATEGORIES)),
+    ("merchant_category", "in", lambda r: r.sample(FraudDataGenerator.MERCHANT_CATEGORIES, 2)),
+    ("is_new_device", "==", lambda r: r.choice([True, False])),
+    ("country_mismatch", "==", lambda r: r.choice([True, False])),
+    ("transaction_country", "not_in", lambda r: r.sample(FraudDataGenerator.COUNTRIES, 4)),
+]
+
+
+def make_config(n_rules: int, seed: int = 0) -> Dict[str, Any]:
+    """Synthesize a config with n_rules rules (the last being DEFAULT)"""
+    rng = random.Random(seed)
+    base = yaml.safe_load(open(ROOT / "config" / "rules_v1.yaml"))
+    rules = []
+    for i in range(n_rules - 1):
+        templates = rng.sample(CONDITION_TEMPLATES, rng.randint(1, 3))
+        rules.append({
+            "id": f"RULE_{i + 1:03d}",
+            "name": f"Synthetic rule {i + 1}",
+            "conditions": [
+                {"field": field, "operator": op, "value": value(rng)}
+                for field, op, value in templates
+            ],
+            "logic": rng.choice(["AND", "AND", "AND", "OR"]),
+            "outcome": {
+                "risk_score": rng.randint(20, 99),
+                "decision": rng.choice(["REVIEW", "BLOCK"]),
+                "reason": "synthetic",
+            },
+        })
+    rules.append(next(r for r in base["rules"] if r.get("logic") == "ALWAYS"))
+    return {**base, "version": f"bench{n_rules}", "rules": rules}
+
+
+def measure(fn: Callable[[], Any], items: int, repeat: int) -> Dict[str, float]:
+    """Time fn (one call per run) and return min/median seconds and per-item cost"""
+    fn()  # warm-up
+    times = sorted(timeit.repeat(fn, number=1, repeat=repeat))
+    return {
+        "min_s": times[0],
+        "median_s": times[len(times) // 2],
+        "items": items,
+        "per_item_us": times[0] / max(items, 1) * 1e6,
+    }
+
+
+class Bench:
+    def __init__(self, args):
+        self.args = args
+        self.results: Dict[str, Dict[str, float]] = {}
+        self.tmp = Path(tempfile.mkdtemp(prefix="business_rules_bench_"))
+        self.records = FraudDataGenerator(seed=args.seed).generate_columns(
+            max(args.batch)
+        ).to_dict("records")
+        self.config_paths = {}
+        for n_rules in args.rules:
+            config = make_config(n_rules, args.seed)
+            path = self.tmp / f"rules_{config['version']}.yaml"
+            with open(path, "w") as f:
+                yaml.safe_dump(config, f, sort_keys=False)
+            self.config_paths[n_rules] = path
+
+    def record(self, name: str, fn: Callable[[], Any], items: int) -> None:
+        self.results[name] = measure(fn, items, self.args.repeat)
+        r = self.results[name]
+        print(f"{name:<52} {r['min_s'] * 1e3:>10.2f} ms {r['per_item_us']:>10.2f} us/item")
+
+    def run_engine(self):
+        for n_rules, path in self.config_paths.items():
+            engine = RuleEngine(str(path))
+            dag = DecisionDAG(engine)
+            for batch in self.args.batch:
+                records = self.records[:batch]
+                tag = f"rules={n_rules},batch={batch}"
+                self.record(
+                    f"engine.evaluate[{tag}]",
+                    lambda: [engine.evaluate(r) for r in records], batch
+                )
+                self.record(
+                    f"engine.evaluate_batch[{tag}]",
+                    lambda: engine.evaluate_batch(records), batch
+                )
+                self.record(
+                    f"engine.evaluate_with_trace[{tag}]",
+                    lambda: [engine.evaluate_with_trace(r) for r in records], batch
+                )
+                self.record(
+                    f"engine.decision_dag[{tag}]",
+                    lambda: dag.evaluate_batch(records), batch
+                )
+                self.record(
+                    f"engine.evaluate_batch_all[{tag}]",
+                    lambda: engine.evaluate_batch_all(records), batch
+                )
+
+    def run_vectorized(self):
+        import pandas as pd
+        from business_rules.vectorized import VectorizedRuleSet
+
+        for n_rules, path in self.config_paths.items():
+            rule_set = VectorizedRuleSet.from_engine(RuleEngine(str(path)))
+            for batch in self.args.batch:
+                df = pd.DataFrame(self.records[:batch])
+                tag = f"rules={n_rules},batch={batch}"
+                self.record(f"vectorized.evaluate[{tag}]", lambda: rule_set.evaluate(df), batch)
+                self.record(
+                    f"vectorized.all_matches[{tag}]", lambda: rule_set.all_matches(df), batch
+                )
+
+    def run_coalescer(self):
+        import asyncio
+        from concurrent.futures import ThreadPoolExecutor
+        from business_rules.coalescer import BatchCoalescer
+
+        executor = ThreadPoolExecutor(max_workers=4)
+        for n_rules, path in self.config_paths.items():
+            engine = RuleEngine(str(path))
+            coalescer = BatchCoalescer(
+                lambda key, records: engine.evaluate_batch(records), executor=executor
+            )
+            for batch in self.args.batch:
+                # `batch` concurrent single-record requests
+                records = self.records[:batch]
+                tag = f"rules={n_rules},concurrent={batch}"
+
+                async def per_request():
+                    loop = asyncio.get_running_loop()
+                    await asyncio.gather(
+                        *[loop.run_in_executor(executor, engine.evaluate, r) for r in records]
+                    )
+
+                async def coalesced():
+                    await asyncio.gather(*[coalescer.submit(n_rules, r) for r in records])
+
+                self.record(
+                    f"coalescer.per_request[{tag}]", lambda: asyncio.run(per_request()), batch
+                )
+                self.record(
+                    f"coalescer.coalesced[{tag}]", lambda: asyncio.run(coalesced()), batch
+                )
+        executor.shutdown()
+
+    def run_validator(self):
+        import pandas as pd
+
+        validator = DataValidator()
+        for batch in self.args.batch:
+            df = pd.DataFrame(self.records[:batch])
+            self.record(
+                f"validator.validate_dataframe[batch={batch}]",
+                lambda: validator.validate_dataframe(df), batch
+            )
+
+    def run_config(self):
+        for n_rules, path in self.config_paths.items():
+            config_dir = self.tmp / f"config_{n_rules}"
+            config_dir.mkdir(exist_ok=True)
+            version = path.stem[len("rules_"):]
+            shutil.copy(path, config_dir / path.name)
+            manager = ConfigManager(str(config_dir))
+            rule = {
+                "id": "RULE_BENCH",
+                "name": "Benchmark rule",
+                "conditions": [{"field": "transaction_amount", "operator": ">", "value": 1}],
+                "logic": "AND",
+                "outcome": {"risk_score": 50, "decision": "REVIEW", "reason": "bench"},
+            }
+
+            def round_trip():
+                manager.add_rule(rule, version=version)
+                manager.update_rule("RULE_BENCH", {**rule, "name": "Updated"}, version=version)
+                ids = [r["id"] for r in manager.load_rules(version)["rules"]]
+                manager.reorder_rules(ids[-2::-1] + ids[-1:], version=version)
+                manager.delete_rule("RULE_BENCH", version=version)
+
+            self.record(f"config.crud_round_trip[rules={n_rules}]", round_trip, 4)
+
+    def run_enrichment(self):
+        from business_rules.enrichment import FeatureEnricher, KVVelocityStore
+
+        rng = random.Random(self.args.seed)
+        for batch in self.args.batch:
+            # A stream spread over ~1000 accounts and two days
+            stream = [
+                {**r, "account_id": f"acct{rng.randrange(1000)}", "timestamp": i * 172800 / batch}
+                for i, r in enumerate(self.records[:batch])
+            ]
+            self.record(
+                f"enrichment.memory[batch={batch}]",
+                lambda: FeatureEnricher().enrich_batch(stream), batch
+            )
+            self.record(
+                f"enrichment.local_kv[batch={batch}]",
+                lambda: FeatureEnricher(KVVelocityStore()).enrich_batch(stream), batch
+            )
+
+    def run_api(self):
+        try:
+            from fastapi.testclient import TestClient
+        except ImportError:
+            print("api suite skipped: fastapi/httpx not installed")
+            return
+
+        sys.path.insert(0, str(ROOT / "backend"))
+        from main import app
+        from routers import state
+
+        # Serve the synthetic configs from the temp directory
+        state.engine_cache.config_dir = self.tmp
+        state.engine_cache.invalidate()
+        client = TestClient(app)
+
+        for n_rules, path in self.config_paths.items():
+            version = path.stem[len("rules_"):]
+            singles = self.records[:min(200, max(self.args.batch))]
+            for trace in ("false", "true"):
+                params = {"version": version, "enable_trace": trace}
+                self.record(
+                    f"api./evaluate[rules={n_rules},trace={trace}]",
+                    lambda: [client.post("/api/v1/evaluate", json=r, params=params)
+                             for r in singles],
+                    len(singles)
+                )
+            for batch in self.args.batch:
+                records = self.records[:batch]
+                params = {"version": version, "enable_trace": "false"}
+                self.record(
+                    f"api./evaluate/batch[rules={n_rules},batch={batch}]",
+                    lambda: client.post("/api/v1/evaluate/batch", json=records, params=params),
+                    batch
+                )
+                self.run_api_binary(client, n_rules, batch, records, params)
+
+    def run_api_binary(self, client, n_rules: int, batch: int, records, params) -> None:
+        """/evaluate/batch with MessagePack and Arrow IPC bodies (skipped if not installed)"""
+        import pandas as pd
+        from business_rules import wire
+        try:
+            packed = wire.pack(records)
+            table = wire.write_table(pd.DataFrame(records))
+        except ImportError:
+            return
+        self.record(
+            f"api./evaluate/batch[rules={n_rules},batch={batch},msgpack]",
+            lambda: wire.unpack(client.post(
+                "/api/v1/evaluate/batch", content=packed, params=params,
+                headers={"content-type": wire.MSGPACK}
+            ).content),
+            batch
+        )
+        self.record(
+            f"api./evaluate/batch[rules={n_rules},batch={batch},arrow]",
+            lambda: wire.read_table(client.post(
+                "/api/v1/evaluate/batch", content=table, params=params,
+                headers={"content-type": wire.ARROW}
+            ).content),
+            batch
+        )
+
+    def cleanup(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline_path: str, threshold: float) -> int:
+    """Print a comparison against a baseline; return the number of regressions"""
+    baseline = json.load(open(baseline_path))["results"]
+    regressions = 0
+    print(f"\n{'case':<52} {'baseline':>10} {'current':>10} {'change':>8}")
+    for name, current in results.items():
+        if name not in baseline:
+            continue
+        before, after = baseline[name]["min_s"], current["min_s"]
+        change = (after - before) / before
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        print(f"{name:<52} {before * 1e3:>8.2f}ms {after * 1e3:>8.2f}ms {change:>+8.1%}{flag}")
+    return regressions
+
+
+def int_list(value: str) -> List[int]:
+    return [int(v) for v in value.split(",") if v]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Business rules benchmark suite")
+    parser.add_argument("--suites", default=",".join(SUITES), help=f"Comma-separated: {SUITES}")
+    parser.add_argument("--rules", type=int_list, default=[10, 50], help="Rule counts")
+    parser.add_argument("--batch", type=int_list, default=[100, 1000], help="Batch sizes")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per case (min is reported)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for rules and data")
+    parser.add_argument("--output", help="Write results JSON to this path")
+    parser.add_argument("--compare", help="Baseline results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Relative slowdown counted as a regression (default 0.10)")
+    args = parser.parse_args()
+
+    bench = Bench(args)
+    try:
+        for suite in args.suites.split(","):
+            if suite not in SUITES:
+                parser.error(f"Unknown suite: {suite}")
+            getattr(bench, f"run_{suite}")()
+    finally:
+        bench.cleanup()
+
+    if args.output:
+        payload = {
+            "meta": {
+                "timestamp": datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "args": {k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+            },
+            "results": bench.results,
+        }
+        with open(args.output, "w") as f:
+            json.dump(payload, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        regressions = compare(bench.results, args.compare, args.threshold)
+        if regressions:
+            print(f"\n{regressions} regression(s) above {args.threshold:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,12 @@
-"""Business rules engine for fraud detection."""
+"""Business rules engine for fraud detection.
+
+RuleEngine and the result models are imported eagerly; everything else is
+loaded on first attribute access (PEP 562), so `from business_rules import
+RuleEngine` does not pull in anthropic, faker or pandas.
+"""
+
+import importlib
+from typing import TYPE_CHECKING, Any, List
 
 from .models import (
     Decision,
@@ -8,10 +16,25 @@ from .models import (
     FinalDecisionOutput,
 )
 from .rule_engine import RuleEngine
-from .llm_explainer import LLMExplainer
-from .data_generator import generate_test_transactions, FraudDataGenerator
-from .data_validator import DataValidator
-from .config_manager import ConfigManager
+
+if TYPE_CHECKING:
+    from .llm_explainer import LLMExplainer
+    from .data_generator import generate_test_transactions, FraudDataGenerator
+    from .data_validator import DataValidator
+    from .config_manager import ConfigManager
+    from .schema import FeatureSchema
+    from .engine_cache import EngineCache
+
+# Public name -> submodule it is loaded from on first use
+_LAZY_ATTRIBUTES = {
+    "LLMExplainer": "llm_explainer",
+    "generate_test_transactions": "data_generator",
+    "FraudDataGenerator": "data_generator",
+    "DataValidator": "data_validator",
+    "ConfigManager": "config_manager",
+    "FeatureSchema": "schema",
+    "EngineCache": "engine_cache",
+}
 
 __all__ = [
     "Decision",
@@ -25,4 +48,19 @@ __all__ = [
     "FraudDataGenerator",
     "DataValidator",
     "ConfigManager",
+    "FeatureSchema",
+    "EngineCache",
 ]
+
+
+def __getattr__(name: str) -> Any:
+    module = _LAZY_ATTRIBUTES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value  # Later lookups skip __getattr__
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))
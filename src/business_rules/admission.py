@@ -0,0 +1,167 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Sequence, TypeVar
+
+T = TypeVar('T')
+
+# Why a bulk job was refused
+TOO_LARGE = "too_large"      # the job alone exceeds the record budget
+BUSY = "busy"                # every running and queued batch slot is taken
+OVERLOADED = "overloaded"    # admitting the job would exceed the queued record budget
+
+
+class Rejected(Exception):
+    """A bulk job refused by admission control"""
+
+    def __init__(self, reason: str, message: str, retry_after: int = 1):
+        super().__init__(message)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class BulkExecutor:
+    """Bounded thread pool for CPU-bound bulk evaluation, with admission control
+
+    run() executes a job off the event loop. At most max_inflight jobs run at
+    once and at most max_queued_batches wait behind them; records admitted
+    (running or waiting) never exceed max_queued_records. Jobs that do not fit
+    are rejected immediately with Rejected rather than queued without bound.
+
+    Single-transaction requests take priority: while any are in progress
+    (single() context), bulk jobs pause at their next chunk boundary
+    (chunks()), releasing the GIL to the event loop, for up to max_yield_ms
+    per chunk so bulk work still makes progress under steady load.
+    """
+
+    def __init__(
+        self,
+        max_inflight: int = 2,
+        max_queued_batches: int = 8,
+        max_queued_records: int = 200_000,
+        chunk_size: int = 1000,
+        max_yield_ms: float = 50.0
+    ):
+        """
+        Args:
+            max_inflight: Worker threads (bulk jobs running at once)
+            max_queued_batches: Jobs allowed to wait for a worker
+            max_queued_records: Records across all admitted jobs
+            chunk_size: Records evaluated between priority checks
+            max_yield_ms: Longest pause per chunk while single requests are active
+        """
+        if max_inflight < 1:
+            raise ValueError("max_inflight must be at least 1")
+        self.max_inflight = max_inflight
+        self.max_queued_batches = max_queued_batches
+        self.max_queued_records = max_queued_records
+        self.chunk_size = chunk_size
+        self.max_yield = max_yield_ms / 1000
+        self._executor = ThreadPoolExecutor(max_workers=max_inflight, thread_name_prefix="bulk")
+        self._lock = threading.Lock()
+        self._batches = 0
+        self._records = 0
+        self._running = 0
+        self._singles = 0
+        self._counts = {'completed': 0, 'failed': 0, TOO_LARGE: 0, BUSY: 0, OVERLOADED: 0}
+        self._yielded = 0.0
+        self._worker = threading.local()
+
+    def admit(self, records: int) -> None:
+        """Reserve capacity for a job of `records` records (raises Rejected)"""
+        with self._lock:
+            if records > self.max_queued_records:
+                self._counts[TOO_LARGE] += 1
+                raise Rejected(
+                    TOO_LARGE,
+                    f"Batch of {records} records exceeds the limit of {self.max_queued_records}"
+                )
+            if self._batches >= self.max_inflight + self.max_queued_batches:
+                self._counts[BUSY] += 1
+                raise Rejected(BUSY, "Too many bulk requests in progress")
+            if self._records + records > self.max_queued_records:
+                self._counts[OVERLOADED] += 1
+                raise Rejected(OVERLOADED, "Bulk evaluation capacity exhausted", retry_after=5)
+            self._batches += 1
+            self._records += records
+
+    def release(self, records: int, failed: bool = False) -> None:
+        with self._lock:
+            self._batches -= 1
+            self._records -= records
+            self._counts['failed' if failed else 'completed'] += 1
+
+    async def run(self, fn: Callable[[], T], records: int) -> T:
+        """Run fn on a worker thread once admitted; raises Rejected if it does not fit"""
+        self.admit(records)
+        try:
+            future = self._executor.submit(self._call, fn)
+        except BaseException:
+            self.release(records, failed=True)
+            raise
+        # Released when the job itself ends: a cancelled request does not stop a
+        # running job, so its records stay admitted until the thread is done
+        future.add_done_callback(
+            lambda f: self.release(records, f.cancelled() or f.exception() is not None)
+        )
+        return await asyncio.wrap_future(future)
+
+    def _call(self, fn: Callable[[], T]) -> T:
+        with self._lock:
+            self._running += 1
+        self._worker.active = True
+        try:
+            return fn()
+        finally:
+            self._worker.active = False
+            with self._lock:
+                self._running -= 1
+
+    @contextmanager
+    def single(self) -> Iterator[None]:
+        """Mark a single-transaction request as in progress (bulk jobs yield to it)"""
+        self._singles += 1
+        try:
+            yield
+        finally:
+            self._singles -= 1
+
+    def checkpoint(self) -> None:
+        """Called by bulk jobs between chunks: pause while single requests are active
+
+        A no-op outside the worker threads (small jobs run inline on the event loop).
+        """
+        if not self._singles or not getattr(self._worker, 'active', False):
+            return
+        start = time.perf_counter()
+        deadline = start + self.max_yield
+        while self._singles and time.perf_counter() < deadline:
+            time.sleep(0.0002)
+        self._yielded += time.perf_counter() - start
+
+    def chunks(self, records: Sequence[Any]) -> Iterator[List[Any]]:
+        """Split records into chunk_size lists, checking for single requests before each"""
+        for start in range(0, len(records), self.chunk_size):
+            self.checkpoint()
+            yield list(records[start:start + self.chunk_size])
+
+    def stats(self) -> Dict[str, Any]:
+        """Current load, limits and how many jobs were completed or rejected"""
+        with self._lock:
+            return {
+                'running': self._running,
+                'queued': self._batches - self._running,
+                'admitted_records': self._records,
+                'max_inflight': self.max_inflight,
+                'max_queued_batches': self.max_queued_batches,
+                'max_queued_records': self.max_queued_records,
+                'completed': self._counts['completed'],
+                'failed': self._counts['failed'],
+                'rejected': {k: self._counts[k] for k in (TOO_LARGE, BUSY, OVERLOADED)},
+                'yielded_ms': round(self._yielded * 1000, 3),
+            }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,158 @@
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from .models import AllMatchesResult, Decision
+
+AGGREGATIONS = ("max", "sum", "weighted")
+
+# Combined decision: the most severe decision among the matched rules
+SEVERITY = {Decision.ALLOW.value: 0, Decision.REVIEW.value: 1, Decision.BLOCK.value: 2}
+
+
+def fallback_index(rules: Sequence[dict]) -> int:
+    """Position of the first ALWAYS rule (-1 if none)"""
+    return next((i for i, r in enumerate(rules) if r.get('logic') == 'ALWAYS'), -1)
+
+
+def decode_mask(mask: int, rule_ids: Sequence[str]) -> List[str]:
+    """Rule ids whose bit is set in a matched-rules bitmask (bit i = rules[i])"""
+    return [rule_id for i, rule_id in enumerate(rule_ids) if mask >> i & 1]
+
+
+class ScoreAggregator:
+    """Combine the risk scores of every matched rule into one score
+
+    - max: highest matched score
+    - sum: total of matched scores, capped at `cap`
+    - weighted: total of score * weight, capped at `cap`; weights come from the
+      `weights` argument, else the rule's optional `weight` key (default 1.0)
+    """
+
+    def __init__(
+        self,
+        rules: Sequence[dict],
+        method: str = "max",
+        cap: int = 100,
+        weights: Optional[Dict[str, float]] = None
+    ):
+        if method not in AGGREGATIONS:
+            raise ValueError(f"Unknown aggregation '{method}'. Must be one of {', '.join(AGGREGATIONS)}")
+        self.method = method
+        self.cap = cap
+        self.scores = [r['outcome']['risk_score'] for r in rules]
+        weights = weights or {}
+        self.weights = [float(weights.get(r['id'], r.get('weight', 1.0))) for r in rules]
+        self._weighted = [s * w for s, w in zip(self.scores, self.weights)]
+
+    def score(self, indices: Sequence[int]) -> int:
+        """Aggregated score of the rules at the given positions"""
+        if not indices:
+            return 0
+        if self.method == "max":
+            return max(self.scores[i] for i in indices)
+        if self.method == "sum":
+            return min(sum(self.scores[i] for i in indices), self.cap)
+        return min(int(round(sum(self._weighted[i] for i in indices))), self.cap)
+
+    def score_columns(self, matches: Any) -> Any:
+        """Aggregated score per row of a boolean (rows x rules) match matrix"""
+        import numpy as np
+
+        if self.method == "max":
+            scores = np.where(matches, np.array(self.scores, dtype=np.int64), 0)
+            return scores.max(axis=1, initial=0)
+        if self.method == "sum":
+            total = matches.astype(np.int64) @ np.array(self.scores, dtype=np.int64)
+            return np.minimum(total, self.cap)
+        total = np.rint(matches.astype(np.float64) @ np.array(self._weighted, dtype=np.float64))
+        return np.minimum(total.astype(np.int64), self.cap)
+
+
+class AllMatchesPlan:
+    """An engine's rules compiled for finding every matching rule of a record
+
+    Each distinct condition gets one slot, so a condition shared by several
+    rules is evaluated once per record. No trace objects are built.
+
+    ALWAYS rules act as the fallback: they are reported (and scored) only when
+    no other rule matched, as in first-match evaluation. Rules are taken from
+    the config, so rules pruned from the engine's first-match list still count.
+    """
+
+    def __init__(self, engine):
+        from .vectorized import condition_key
+
+        self.engine = engine
+        rules = engine.config['rules']
+        self.rule_ids = [r['id'] for r in rules]
+        self.fallback = fallback_index(rules)
+        slots: Dict[Any, int] = {}
+        self.conditions: List[Tuple] = []
+        self.rules: List[Tuple[int, bool, Tuple[int, ...]]] = []
+        for idx, rule in enumerate(rules):
+            logic = rule.get('logic')
+            if logic not in ('AND', 'OR') or not rule.get('conditions'):
+                continue
+            rule_slots = []
+            for condition in rule['conditions']:
+                key = condition_key(condition, engine.derived)
+                if key not in slots:
+                    slots[key] = len(self.conditions)
+                    self.conditions.append(engine.compiled_condition(condition))
+                rule_slots.append(slots[key])
+            self.rules.append((idx, logic == 'AND', tuple(rule_slots)))
+        self.decisions = [r['outcome']['decision'] for r in rules]
+        self._aggregators: Dict[Tuple[str, int], ScoreAggregator] = {}
+
+    def aggregator(self, method: str = "max", cap: int = 100) -> ScoreAggregator:
+        aggregator = self._aggregators.get((method, cap))
+        if aggregator is None:
+            aggregator = self._aggregators[(method, cap)] = ScoreAggregator(
+                self.engine.config['rules'], method, cap
+            )
+        return aggregator
+
+    def match(self, record: dict) -> List[int]:
+        """Positions of all matching rules (the fallback only if nothing else matched)"""
+        record = self.engine.record_view(record)
+        conditions = self.conditions
+        memo: List[Optional[bool]] = [None] * len(conditions)
+
+        def passed(slot: int) -> bool:
+            result = memo[slot]
+            if result is None:
+                field, value_field, op_func, test = conditions[slot]
+                actual = record.get(field)
+                if actual is None:
+                    result = False
+                elif value_field is not None:
+                    expected = record.get(value_field)
+                    result = expected is not None and bool(op_func(actual, expected))
+                else:
+                    result = bool(test(actual))
+                memo[slot] = result
+            return result
+
+        matched = []
+        for idx, is_and, rule_slots in self.rules:
+            if is_and:
+                hit = all(passed(s) for s in rule_slots)
+            else:
+                hit = any(passed(s) for s in rule_slots)
+            if hit:
+                matched.append(idx)
+        if not matched and self.fallback >= 0:
+            matched.append(self.fallback)
+        return matched
+
+    def evaluate(self, record: dict, aggregate: str = "max", cap: int = 100) -> AllMatchesResult:
+        aggregator = self.aggregator(aggregate, cap)
+        matched = self.match(record)
+        if not matched:
+            raise ValueError("No matching rule found and no DEFAULT rule defined")
+        decisions = self.decisions
+        return AllMatchesResult(
+            transaction_id=record.get('transaction_id', 'unknown'),
+            matched_rule_ids=[self.rule_ids[i] for i in matched],
+            matched_mask=sum(1 << i for i in matched),
+            score=aggregator.score(matched),
+            decision=Decision(max((decisions[i] for i in matched), key=SEVERITY.__getitem__))
+        )
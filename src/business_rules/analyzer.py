@@ -0,0 +1,361 @@
+"""
+Static analysis of a rules config: contradictory, subsumed and unreachable rules
+
+Every condition is turned into the set of field values that satisfy it: a
+union of numeric intervals plus a finite (or co-finite) set of other values.
+Booleans count as the numbers 0 and 1, as they do in Python comparisons.
+A rule becomes a union of "terms" (one term for AND logic, one per condition
+for OR logic), each term being a set of values per field. On these:
+
+- contradictory: every term of the rule is empty, so it can never match
+- subsumed: every record the rule matches is matched by one earlier rule
+- unreachable: every record it matches is matched by some earlier rule, but no
+  single earlier rule covers it
+
+Conditions the analysis cannot model (regex, prefix, cidr, value_file lists,
+field-to-field comparisons, ordering on strings) are handled conservatively.
+They are ignored when describing the rule being checked, which over-approximates
+it. Earlier terms that contain them are never used as covers. So a finding is
+always real, but some redundancies may go unreported.
+"""
+
+import copy
+import math
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+INF = math.inf
+
+# (low, low_closed, high, high_closed)
+Interval = Tuple[float, bool, float, bool]
+_ALL_NUMBERS: Tuple[Interval, ...] = ((-INF, False, INF, False),)
+
+# Work limit for one coverage check (the case split can grow exponentially)
+MAX_SPLITS = 20000
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not (isinstance(value, float) and math.isnan(value))
+
+
+def _point(value: float) -> Interval:
+    return (value, True, value, True)
+
+
+def _interval_empty(iv: Interval) -> bool:
+    low, low_closed, high, high_closed = iv
+    return low > high or (low == high and not (low_closed and high_closed))
+
+
+def _intersect_interval(a: Interval, b: Interval) -> Interval:
+    if a[0] > b[0] or (a[0] == b[0] and not a[1]):
+        low, low_closed = a[0], a[1]
+    else:
+        low, low_closed = b[0], b[1]
+    if a[2] < b[2] or (a[2] == b[2] and not a[3]):
+        high, high_closed = a[2], a[3]
+    else:
+        high, high_closed = b[2], b[3]
+    return (low, low_closed, high, high_closed)
+
+
+def _intersect_intervals(a: Sequence[Interval], b: Sequence[Interval]) -> Tuple[Interval, ...]:
+    out = []
+    for x in a:
+        for y in b:
+            iv = _intersect_interval(x, y)
+            if not _interval_empty(iv):
+                out.append(iv)
+    return tuple(sorted(out))
+
+
+def _complement_intervals(ivs: Sequence[Interval]) -> Tuple[Interval, ...]:
+    """Complement within the real line (intervals must be disjoint and sorted)"""
+    out = []
+    low, low_closed = -INF, False
+    for iv in sorted(ivs):
+        gap = (low, low_closed, iv[0], not iv[1])
+        if not _interval_empty(gap) and not (gap[0] == -INF and gap[2] == -INF):
+            out.append(gap)
+        low, low_closed = iv[2], not iv[3]
+    tail = (low, low_closed, INF, False)
+    if not _interval_empty(tail) and low != INF:
+        out.append(tail)
+    return tuple(out)
+
+
+class ValueSet:
+    """Values a field may take: absent (missing/None), numbers, and other values
+
+    `others` is a finite set of non-numeric values, or its complement when
+    `others_negated` is True.
+    """
+
+    __slots__ = ('absent', 'numbers', 'others', 'others_negated')
+
+    def __init__(
+        self,
+        absent: bool = False,
+        numbers: Sequence[Interval] = (),
+        others: frozenset = frozenset(),
+        others_negated: bool = False
+    ):
+        self.absent = absent
+        self.numbers = tuple(numbers)
+        self.others = frozenset(others)
+        self.others_negated = others_negated
+
+    @classmethod
+    def any(cls) -> 'ValueSet':
+        return cls(True, _ALL_NUMBERS, frozenset(), True)
+
+    @classmethod
+    def of(cls, values: Sequence[Any], negated: bool = False) -> 'ValueSet':
+        """Present values in (or, negated, not in) a list"""
+        numbers = tuple(sorted(_point(v) for v in set(v for v in values if _is_number(v))))
+        others = frozenset(v for v in values if not _is_number(v))
+        if negated:
+            return cls(False, _complement_intervals(numbers), others, True)
+        return cls(False, numbers, others, False)
+
+    def is_empty(self) -> bool:
+        return not self.absent and not self.numbers and not (self.others or self.others_negated)
+
+    def intersect(self, other: 'ValueSet') -> 'ValueSet':
+        if self.others_negated and other.others_negated:
+            others, negated = self.others | other.others, True
+        elif self.others_negated:
+            others, negated = other.others - self.others, False
+        elif other.others_negated:
+            others, negated = self.others - other.others, False
+        else:
+            others, negated = self.others & other.others, False
+        return ValueSet(
+            self.absent and other.absent,
+            _intersect_intervals(self.numbers, other.numbers),
+            others,
+            negated
+        )
+
+    def complement(self) -> 'ValueSet':
+        return ValueSet(
+            not self.absent,
+            _complement_intervals(self.numbers),
+            self.others,
+            not self.others_negated
+        )
+
+
+def condition_values(condition: dict) -> Optional[ValueSet]:
+    """Values of condition['field'] that satisfy the condition (None if not modeled)"""
+    if 'value_field' in condition or 'value_file' in condition or 'value' not in condition:
+        return None
+    operator, value = condition.get('operator'), condition['value']
+
+    if operator in ('>', '<', '>=', '<='):
+        if not _is_number(value):
+            return None
+        interval = {
+            '>': (value, False, INF, False),
+            '>=': (value, True, INF, False),
+            '<': (-INF, False, value, False),
+            '<=': (-INF, False, value, True),
+        }[operator]
+        return ValueSet(False, (interval,))
+    if operator == 'between':
+        if not (isinstance(value, (list, tuple)) and len(value) == 2
+                and all(_is_number(v) for v in value)):
+            return None
+        interval = (value[0], True, value[1], True)
+        return ValueSet(False, () if _interval_empty(interval) else (interval,))
+    if operator in ('==', '!='):
+        if isinstance(value, float) and math.isnan(value):
+            return None
+        try:
+            hash(value)
+        except TypeError:
+            return None
+        return ValueSet.of([value], negated=operator == '!=')
+    if operator in ('in', 'not_in'):
+        if not isinstance(value, (list, tuple)):
+            return None  # e.g. substring checks against a string
+        try:
+            return ValueSet.of(list(value), negated=operator == 'not_in')
+        except TypeError:
+            return None
+    return None
+
+
+class Term:
+    """A conjunction: one ValueSet per constrained field (unlisted fields are unconstrained)
+
+    `exact` is False when conditions that could not be modeled were dropped,
+    i.e. the term over-approximates the records it matches.
+    """
+
+    __slots__ = ('fields', 'exact')
+
+    def __init__(self, fields: Dict[str, ValueSet], exact: bool = True):
+        self.fields = fields
+        self.exact = exact
+
+    def get(self, field: str) -> ValueSet:
+        values = self.fields.get(field)
+        return ValueSet.any() if values is None else values
+
+    def is_empty(self) -> bool:
+        return any(v.is_empty() for v in self.fields.values())
+
+    def restrict(self, field: str, values: ValueSet) -> 'Term':
+        fields = dict(self.fields)
+        fields[field] = self.get(field).intersect(values)
+        return Term(fields, self.exact)
+
+
+def rule_terms(rule: dict) -> List[Term]:
+    """The rule as a union of terms (empty list: the rule can never match)"""
+    logic = rule.get('logic')
+    if logic == 'ALWAYS':
+        return [Term({})]
+    conditions = rule.get('conditions') or []
+    if logic not in ('AND', 'OR') or not conditions:
+        return []
+
+    if logic == 'AND':
+        term = Term({})
+        for condition in conditions:
+            values = condition_values(condition)
+            if values is None:
+                term.exact = False
+            else:
+                term = term.restrict(condition['field'], values)
+        return [term]
+
+    terms = []
+    for condition in conditions:
+        values = condition_values(condition)
+        if values is None:
+            terms.append(Term({}, exact=False))
+        else:
+            terms.append(Term({condition['field']: values}))
+    return terms
+
+
+class _Budget:
+    def __init__(self, limit: int):
+        self.left = limit
+
+    def spend(self) -> bool:
+        self.left -= 1
+        return self.left >= 0
+
+
+def _disjoint(a: Term, b: Term) -> bool:
+    return any(
+        a.get(field).intersect(values).is_empty() for field, values in b.fields.items()
+    )
+
+
+def covered(term: Term, covers: Sequence[Term], budget: Optional[_Budget] = None) -> bool:
+    """True if every record matching `term` matches one of `covers` (all exact)
+
+    Splits term minus the first overlapping cover into disjoint pieces and checks
+    each against the remaining covers. Returns False when the budget runs out.
+    """
+    budget = budget or _Budget(MAX_SPLITS)
+    if term.is_empty():
+        return True
+    for i, cover in enumerate(covers):
+        if _disjoint(term, cover):
+            continue
+        rest = covers[i + 1:]
+        remaining = term
+        for field, values in cover.fields.items():
+            if not budget.spend():
+                return False
+            outside = remaining.restrict(field, values.complement())
+            if not covered(outside, rest, budget):
+                return False
+            remaining = remaining.restrict(field, values)
+        return True
+    return False
+
+
+def analyze_rules(rules: Sequence[dict]) -> List[Dict[str, Any]]:
+    """Findings for rules that can never be the first match, in rule order
+
+    Each finding has rule_id, position, kind ('contradictory', 'subsumed' or
+    'unreachable'), by (ids of the earlier rules involved) and message.
+    """
+    findings = []
+    earlier: List[Tuple[str, List[Term]]] = []
+
+    for position, rule in enumerate(rules):
+        rule_id = rule.get('id')
+        terms = [t for t in rule_terms(rule) if not t.is_empty()]
+        logic = rule.get('logic')
+
+        if not terms and logic in ('AND', 'OR') and rule.get('conditions'):
+            findings.append({
+                'rule_id': rule_id,
+                'position': position,
+                'kind': 'contradictory',
+                'by': [],
+                'message': f"Rule {rule_id} has contradictory conditions and can never match",
+            })
+        elif terms:
+            finding = _shadowing(rule_id, position, terms, earlier)
+            if finding:
+                findings.append(finding)
+
+        earlier.append((rule_id, [t for t in rule_terms(rule) if t.exact and not t.is_empty()]))
+    return findings
+
+
+def _shadowing(
+    rule_id: str,
+    position: int,
+    terms: List[Term],
+    earlier: List[Tuple[str, List[Term]]]
+) -> Optional[Dict[str, Any]]:
+    for other_id, other_terms in earlier:
+        if other_terms and all(covered(t, other_terms) for t in terms):
+            return {
+                'rule_id': rule_id,
+                'position': position,
+                'kind': 'subsumed',
+                'by': [other_id],
+                'message': f"Rule {rule_id} is subsumed by earlier rule {other_id} and can never fire",
+            }
+
+    covers = [t for _, other_terms in earlier for t in other_terms]
+    if covers and all(covered(t, covers) for t in terms):
+        involved = [
+            other_id for other_id, other_terms in earlier
+            if any(not _disjoint(t, c) for t in terms for c in other_terms)
+        ]
+        return {
+            'rule_id': rule_id,
+            'position': position,
+            'kind': 'unreachable',
+            'by': involved,
+            'message': (
+                f"Rule {rule_id} is unreachable: earlier rules {', '.join(involved)} "
+                f"match every record it matches"
+            ),
+        }
+    return None
+
+
+def prune_unreachable(config: Dict[str, Any]) -> Tuple[Dict[str, Any], List[str]]:
+    """Copy of config without rules that can never be the first match
+
+    ALWAYS rules are kept. Returns (pruned config, removed rule ids).
+    """
+    rules = config['rules']
+    removed = {
+        f['position'] for f in analyze_rules(rules)
+        if rules[f['position']].get('logic') != 'ALWAYS'
+    }
+    pruned = copy.copy(config)
+    pruned['rules'] = [r for i, r in enumerate(rules) if i not in removed]
+    return pruned, [rules[i].get('id') for i in sorted(removed)]
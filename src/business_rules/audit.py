@@ -0,0 +1,346 @@
+"""
+Decision audit log: buffered in memory, written in batches by a background thread
+
+Decisions are appended to rotating files of gzip-compressed NDJSON. Each
+flush writes one gzip member, so files are append-only and readable with
+gzip.open (or zcat) at any time; a member cut short by a crash is skipped on
+read. File names carry the writer's start time and pid, so several worker
+processes can share one directory:
+
+    decisions-20240501T120000000000-4242.ndjson.gz
+"""
+
+import atexit
+import gzip
+import heapq
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import weakref
+import zlib
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+from .models import RuleResult
+
+logger = logging.getLogger(__name__)
+
+POLICIES = ("drop", "block")
+
+FILE_PREFIX = "decisions-"
+FILE_SUFFIX = ".ndjson.gz"
+_TIME_FORMAT = "%Y%m%dT%H%M%S%f"
+
+
+def _file_name(start: float, pid: int) -> str:
+    stamp = datetime.fromtimestamp(start, tz=timezone.utc).strftime(_TIME_FORMAT)
+    return f"{FILE_PREFIX}{stamp}-{pid}{FILE_SUFFIX}"
+
+
+def _parse_file_name(name: str) -> Optional[Tuple[float, int]]:
+    """(start time, pid) from an audit file name, None for other files"""
+    if not (name.startswith(FILE_PREFIX) and name.endswith(FILE_SUFFIX)):
+        return None
+    try:
+        stamp, pid = name[len(FILE_PREFIX):-len(FILE_SUFFIX)].rsplit("-", 1)
+        start = datetime.strptime(stamp, _TIME_FORMAT).replace(tzinfo=timezone.utc)
+        return start.timestamp(), int(pid)
+    except ValueError:
+        return None
+
+
+class AuditLog:
+    """Record decisions without touching disk on the request path
+
+    record() only puts the entry on a bounded in-memory queue. A background
+    thread takes up to batch_size entries at a time (or whatever arrived within
+    flush_interval), writes them as one compressed block and rotates to a new
+    file after max_file_bytes or rotate_seconds. When the queue is full the
+    policy decides: "drop" discards the new entry (counted in stats), "block"
+    waits up to block_timeout for room before dropping it.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        max_queue: int = 100_000,
+        batch_size: int = 5000,
+        flush_interval: float = 1.0,
+        max_file_bytes: int = 64 * 1024 * 1024,
+        rotate_seconds: float = 3600.0,
+        policy: str = "drop",
+        block_timeout: float = 0.05,
+        compresslevel: int = 6
+    ):
+        """
+        Args:
+            directory: Where audit files are written (created if missing)
+            max_queue: Entries held in memory before the policy applies
+            batch_size: Most entries written per flush
+            flush_interval: Longest time (seconds) an entry waits in memory
+            max_file_bytes: Rotate to a new file above this size
+            rotate_seconds: Rotate to a new file after this long
+            policy: "drop" or "block" when the queue is full
+            block_timeout: Longest wait (seconds) for room with the block policy
+            compresslevel: gzip level for each written block
+        """
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown policy '{policy}'. Must be one of {', '.join(POLICIES)}")
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_file_bytes = max_file_bytes
+        self.rotate_seconds = rotate_seconds
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.compresslevel = compresslevel
+        self._start()
+        # Threads do not survive fork(): a forked worker process starts its own
+        ref = weakref.ref(self)
+        os.register_at_fork(after_in_child=lambda: ref() is not None and ref()._start())
+        atexit.register(lambda: ref() is not None and ref().close())
+
+    def _start(self) -> None:
+        self._queue: 'queue.Queue' = queue.Queue(maxsize=self.max_queue)
+        self._counts = {'recorded': 0, 'written': 0, 'dropped': 0, 'write_errors': 0, 'files': 0}
+        self._counts_lock = threading.Lock()
+        self._path: Optional[Path] = None
+        self._opened = 0.0
+        self._size = 0
+        self._closed = False
+        self._worker = threading.Thread(target=self._run, name="audit-log", daemon=True)
+        self._worker.start()
+
+    def record(self, entry: Dict[str, Any]) -> bool:
+        """Queue one entry (a 'ts' timestamp is added if missing); False if it was dropped"""
+        if 'ts' not in entry:
+            entry['ts'] = time.time()
+        try:
+            if self.policy == "block":
+                self._queue.put(entry, timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait(entry)
+        except queue.Full:
+            with self._counts_lock:
+                self._counts['dropped'] += 1
+            return False
+        with self._counts_lock:
+            self._counts['recorded'] += 1
+        return True
+
+    def record_result(
+        self,
+        result: RuleResult,
+        version: str,
+        latency_ms: float,
+        ts: Optional[float] = None
+    ) -> bool:
+        """Queue the audit entry for one decision"""
+        return self.record({
+            'ts': time.time() if ts is None else ts,
+            'transaction_id': result.transaction_id,
+            'rule_id': result.matched_rule_id,
+            'risk_score': result.risk_score,
+            'decision': result.decision.value,
+            'version': version,
+            'latency_ms': round(latency_ms, 3),
+        })
+
+    def record_columns(
+        self,
+        transaction_ids: Sequence[str],
+        rule_ids: Sequence[str],
+        risk_scores: Sequence[int],
+        decisions: Sequence[str],
+        version: str,
+        latency_ms: float
+    ) -> int:
+        """Queue the audit entries of a column-wise evaluated batch; returns how many were kept"""
+        ts = time.time()
+        latency_ms = round(latency_ms, 3)
+        kept = 0
+        for transaction_id, rule_id, risk_score, decision in zip(
+            transaction_ids, rule_ids, risk_scores, decisions
+        ):
+            kept += self.record({
+                'ts': ts,
+                'transaction_id': transaction_id,
+                'rule_id': rule_id,
+                'risk_score': int(risk_score),
+                'decision': decision,
+                'version': version,
+                'latency_ms': latency_ms,
+            })
+        return kept
+
+    def _run(self) -> None:
+        while True:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            batch: List[Any] = [item]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            entries = [e for e in batch if isinstance(e, dict)]
+            try:
+                if entries:
+                    self._write(entries)
+            except Exception:
+                logger.exception("audit write failed")
+                with self._counts_lock:
+                    self._counts['write_errors'] += 1
+                    self._counts['dropped'] += len(entries)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            # A threading.Event marker in the batch is a flush() waiting for this write
+            for marker in batch:
+                if isinstance(marker, threading.Event):
+                    marker.set()
+
+    def _write(self, entries: List[Dict[str, Any]]) -> None:
+        now = time.time()
+        if (self._path is None or self._size >= self.max_file_bytes
+                or now - self._opened >= self.rotate_seconds):
+            self._path = self.directory / _file_name(now, os.getpid())
+            self._opened = now
+            self._size = 0
+            with self._counts_lock:
+                self._counts['files'] += 1
+        lines = "".join(json.dumps(e, separators=(",", ":"), default=str) + "\n" for e in entries)
+        block = gzip.compress(lines.encode(), compresslevel=self.compresslevel)
+        with open(self._path, "ab") as f:
+            f.write(block)
+        self._size += len(block)
+        with self._counts_lock:
+            self._counts['written'] += len(entries)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until everything queued so far is written; False on timeout"""
+        if not self._worker.is_alive():
+            return False
+        marker = threading.Event()
+        self._queue.put(marker)
+        return marker.wait(timeout)
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Write out queued entries (the writer thread is a daemon and stops with the process)"""
+        if not self._closed:
+            self._closed = True
+            self.flush(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        """Entries recorded, written and dropped, queue depth and the current file"""
+        with self._counts_lock:
+            counts = dict(self._counts)
+        return {
+            **counts,
+            'pending': self._queue.qsize(),
+            'policy': self.policy,
+            'file': self._path.name if self._path else None,
+        }
+
+
+class AuditReader:
+    """Query audit files by time range, rule, transaction, decision or version"""
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+
+    def files(self) -> List[Tuple[float, int, Path]]:
+        """(start time, pid, path) of every audit file, oldest first"""
+        if not self.directory.is_dir():
+            return []
+        found = []
+        for path in self.directory.iterdir():
+            parsed = _parse_file_name(path.name)
+            if parsed is not None:
+                found.append((parsed[0], parsed[1], path))
+        return sorted(found)
+
+    @staticmethod
+    def read_file(path: Path) -> Iterator[Dict[str, Any]]:
+        """Entries of one file, stopping at a block truncated by a crash"""
+        try:
+            with gzip.open(path, "rt") as f:
+                for line in f:
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError:
+                        return
+        except (EOFError, OSError, zlib.error):
+            return
+
+    def _stream(
+        self, files: List[Tuple[float, Path]], start: Optional[float], end: Optional[float]
+    ) -> Iterator[Dict[str, Any]]:
+        # One writer's files in order. Entries are written up to flush_interval
+        # (longer under backlog) after their ts, so file i holds entries recorded
+        # before file i+1 was opened, but a file opened after `end` may still
+        # start with entries up to `end`.
+        for i, (file_start, path) in enumerate(files):
+            next_start = files[i + 1][0] if i + 1 < len(files) else None
+            if start is not None and next_start is not None and next_start <= start:
+                continue
+            if end is not None and file_start > end:
+                # The writer queues entries in ts order: once one is past `end`, all later are
+                for entry in self.read_file(path):
+                    if entry.get('ts', 0) > end:
+                        return
+                    yield entry
+                continue
+            yield from self.read_file(path)
+
+    def query(
+        self,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        rule_id: Optional[str] = None,
+        transaction_id: Optional[str] = None,
+        decision: Optional[str] = None,
+        version: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Matching entries in timestamp order
+
+        Args:
+            start: Earliest timestamp (epoch seconds, inclusive)
+            end: Latest timestamp (epoch seconds, inclusive)
+            rule_id: Only decisions made by this rule
+            transaction_id: Only this transaction
+            decision: Only this decision (ALLOW, REVIEW, BLOCK)
+            version: Only this config version
+            limit: Most entries returned
+        """
+        writers: Dict[int, List[Tuple[float, Path]]] = {}
+        for file_start, pid, path in self.files():
+            writers.setdefault(pid, []).append((file_start, path))
+        streams = [self._stream(files, start, end) for files in writers.values()]
+
+        filters = {
+            'rule_id': rule_id, 'transaction_id': transaction_id,
+            'decision': decision, 'version': version,
+        }
+        filters = {k: v for k, v in filters.items() if v is not None}
+        out = []
+        for entry in heapq.merge(*streams, key=lambda e: e.get('ts', 0)):
+            ts = entry.get('ts', 0)
+            if start is not None and ts < start:
+                continue
+            if end is not None and ts > end:
+                continue
+            if any(entry.get(k) != v for k, v in filters.items()):
+                continue
+            out.append(entry)
+            if limit is not None and len(out) >= limit:
+                break
+        return out
@@ -0,0 +1,125 @@
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import numpy as np
+import pandas as pd
+from .models import BacktestReport, RuleImpact, ScoreDistribution
+from .vectorized import PredicateCache, VectorizedRuleSet
+
+SCORE_BINS = list(range(0, 101, 10))
+
+
+def load_dataset(path: str) -> pd.DataFrame:
+    """Load a stored transaction dataset (.parquet, .csv, .json or .jsonl)"""
+    path = Path(path)
+    suffix = path.suffix.lower()
+    if suffix == '.parquet':
+        return pd.read_parquet(path)
+    if suffix == '.csv':
+        return pd.read_csv(path)
+    if suffix in ('.jsonl', '.ndjson'):
+        return pd.read_json(path, lines=True)
+    if suffix == '.json':
+        return pd.read_json(path)
+    raise ValueError(f"Unsupported dataset format: {path.suffix}")
+
+
+def score_distribution(scores: np.ndarray) -> ScoreDistribution:
+    if len(scores) == 0:
+        return ScoreDistribution(
+            mean=0.0, p50=0.0, p90=0.0, p99=0.0, histogram=[0] * (len(SCORE_BINS) - 1)
+        )
+    p50, p90, p99 = np.percentile(scores, [50, 90, 99])
+    histogram, _ = np.histogram(scores, bins=SCORE_BINS)
+    return ScoreDistribution(
+        mean=float(scores.mean()),
+        p50=float(p50),
+        p90=float(p90),
+        p99=float(p99),
+        histogram=histogram.tolist(),
+    )
+
+
+class Backtester:
+    """Replay rule configs over a stored dataset and compare their outcomes
+
+    Both configs are evaluated against one shared PredicateCache, so a condition
+    used by both (e.g. every rule the draft did not touch) is computed only once.
+    """
+
+    def __init__(self, df: pd.DataFrame, base_dir: Optional[str] = None):
+        """
+        Args:
+            df: Dataset to replay
+            base_dir: Directory value_file paths in the configs are relative to
+        """
+        self.df = df
+        self.base_dir = base_dir
+        self.cache = PredicateCache(df)
+
+    def rule_impact(
+        self,
+        rule_set: VectorizedRuleSet,
+        rule_masks: List[np.ndarray],
+        first: np.ndarray
+    ) -> List[RuleImpact]:
+        hits = np.bincount(first[first >= 0], minlength=len(rule_set.rules))
+        impacts = []
+        for idx, rule in enumerate(rule_set.rules):
+            matches = int(rule_masks[idx].sum())
+            impacts.append(RuleImpact(
+                rule_id=rule['id'],
+                position=idx,
+                hits=int(hits[idx]),
+                matches=matches,
+                # Matches some records, but earlier rules always win
+                shadowed=bool(matches > 0 and hits[idx] == 0),
+            ))
+        return impacts
+
+    def run(self, baseline: Dict[str, Any], candidate: Dict[str, Any]) -> BacktestReport:
+        """Compare two rule configs over the dataset
+
+        Args:
+            baseline: Current config (e.g. loaded rules_v1.yaml)
+            candidate: Draft config to evaluate against the baseline
+        """
+        sets = [VectorizedRuleSet(c, self.base_dir) for c in (baseline, candidate)]
+        masks = [s.rule_masks(self.cache) for s in sets]
+        firsts = [s.first_match(self.cache, m) for s, m in zip(sets, masks)]
+        for first in firsts:
+            if (first < 0).any():
+                raise ValueError("No matching rule found and no DEFAULT rule defined")
+
+        decisions = [s.decisions[f] for s, f in zip(sets, firsts)]
+        scores = [s.risk_scores[f] for s, f in zip(sets, firsts)]
+        rule_ids = [np.array(s.rule_ids, dtype=object)[f] for s, f in zip(sets, firsts)]
+
+        flipped = decisions[0] != decisions[1]
+        flips: Dict[str, Dict[str, int]] = {}
+        if flipped.any():
+            pairs = pd.DataFrame({'from': decisions[0][flipped], 'to': decisions[1][flipped]})
+            for (before, after), count in pairs.value_counts().items():
+                flips.setdefault(before, {})[after] = int(count)
+
+        baseline_scores = score_distribution(scores[0])
+        candidate_scores = score_distribution(scores[1])
+
+        return BacktestReport(
+            rows=len(self.df),
+            baseline_version=sets[0].version,
+            candidate_version=sets[1].version,
+            decision_changes=int(flipped.sum()),
+            matched_rule_changes=int((rule_ids[0] != rule_ids[1]).sum()),
+            decision_flips=flips,
+            baseline_rules=self.rule_impact(sets[0], masks[0], firsts[0]),
+            candidate_rules=self.rule_impact(sets[1], masks[1], firsts[1]),
+            baseline_scores=baseline_scores,
+            candidate_scores=candidate_scores,
+            mean_score_delta=candidate_scores.mean - baseline_scores.mean,
+            predicates_evaluated=len(self.cache),
+        )
+
+
+def backtest(df: pd.DataFrame, baseline: Dict[str, Any], candidate: Dict[str, Any]) -> BacktestReport:
+    """Convenience function to backtest a candidate config against a baseline"""
+    return Backtester(df).run(baseline, candidate)
@@ -0,0 +1,152 @@
+import asyncio
+from concurrent.futures import Executor
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+# Upper bounds of the batch size histogram buckets (the last one is open-ended)
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+
+class _Pending:
+    __slots__ = ('records', 'futures', 'waited', 'timer')
+
+    def __init__(self):
+        self.records: List[dict] = []
+        self.futures: List[asyncio.Future] = []
+        self.waited = 0.0  # Sum of arrival times, turned into total wait at flush
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+
+class BatchCoalescer:
+    """Gather concurrent single-record evaluations into batches
+
+    Records submitted under the same key (e.g. an engine) are collected until
+    max_batch records are waiting or max_wait_ms has passed since the first
+    one, then evaluated with one evaluate_batch(key, records) call. Each caller
+    gets its own result, or its own exception: when a batch raises, its records
+    are retried one at a time so a bad record only fails its own request.
+
+    Batches run off the event loop, on the given executor or the loop's default
+    one (one hand-off per batch rather than per request), so requests keep being
+    accepted while a batch is evaluated. Must be used from asyncio code;
+    submit() never waits longer than max_wait_ms for other records.
+    """
+
+    def __init__(
+        self,
+        evaluate_batch: Callable[[Hashable, List[dict]], List[Any]],
+        max_batch: int = 64,
+        max_wait_ms: float = 2.0,
+        executor: Optional[Executor] = None
+    ):
+        """
+        Args:
+            evaluate_batch: Called with (key, records); returns one result per record
+            max_batch: Records that trigger an immediate flush
+            max_wait_ms: Longest time a record waits for others to join its batch
+            executor: Runs batches (default: the event loop's default executor)
+        """
+        if max_batch < 1:
+            raise ValueError("max_batch must be at least 1")
+        if max_wait_ms < 0:
+            raise ValueError("max_wait_ms must not be negative")
+        self.evaluate_batch = evaluate_batch
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.executor = executor
+        self._pending: Dict[Tuple[asyncio.AbstractEventLoop, Hashable], _Pending] = {}
+        self._batches = 0
+        self._records = 0
+        self._flushes = {'size': 0, 'window': 0}
+        self._histogram = [0] * (len(SIZE_BUCKETS) + 1)
+        self._largest = 0
+        self._wait_total = 0.0
+        self._retried = 0
+
+    async def submit(self, key: Hashable, record: dict) -> Any:
+        """Evaluate one record as part of the next batch for key"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        slot = (loop, key)
+        pending = self._pending.get(slot)
+        if pending is None:
+            pending = self._pending[slot] = _Pending()
+            pending.timer = loop.call_later(self.max_wait, self._flush, slot, 'window')
+        pending.records.append(record)
+        pending.futures.append(future)
+        pending.waited -= loop.time()
+        if len(pending.records) >= self.max_batch:
+            pending.timer.cancel()
+            self._flush(slot, 'size')
+        return await future
+
+    def _flush(self, slot: Tuple[asyncio.AbstractEventLoop, Hashable], reason: str) -> None:
+        pending = self._pending.pop(slot, None)
+        if pending is None:
+            return
+        loop, key = slot
+        size = len(pending.records)
+        self._batches += 1
+        self._records += size
+        self._flushes[reason] += 1
+        self._histogram[next(
+            (i for i, bound in enumerate(SIZE_BUCKETS) if size <= bound), len(SIZE_BUCKETS)
+        )] += 1
+        self._largest = max(self._largest, size)
+        self._wait_total += pending.waited + loop.time() * size
+
+        done = loop.run_in_executor(self.executor, self._evaluate, key, pending.records)
+        done.add_done_callback(lambda f: self._resolve(
+            pending.futures,
+            f.result() if f.exception() is None else [(False, f.exception())] * size
+        ))
+
+    def _evaluate(self, key: Hashable, records: List[dict]) -> List[Tuple[bool, Any]]:
+        try:
+            results = self.evaluate_batch(key, records)
+            if len(results) != len(records):
+                raise ValueError(
+                    f"evaluate_batch returned {len(results)} results for {len(records)} records"
+                )
+            return [(True, result) for result in results]
+        except Exception as e:
+            if len(records) == 1:
+                return [(False, e)]
+        # Isolate the failing record(s)
+        self._retried += 1
+        outcomes = []
+        for record in records:
+            try:
+                outcomes.append((True, self.evaluate_batch(key, [record])[0]))
+            except Exception as e:
+                outcomes.append((False, e))
+        return outcomes
+
+    @staticmethod
+    def _resolve(futures: List[asyncio.Future], outcomes: List[Tuple[bool, Any]]) -> None:
+        for future, (ok, value) in zip(futures, outcomes):
+            if future.done():
+                continue  # The caller went away
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+
+    def stats(self) -> Dict[str, Any]:
+        """Batches flushed, achieved batch sizes and time records spent waiting"""
+        labels = [
+            str(b) if i == 0 else f"{SIZE_BUCKETS[i - 1] + 1}-{b}" for i, b in enumerate(SIZE_BUCKETS)
+        ]
+        labels.append(f">{SIZE_BUCKETS[-1]}")
+        return {
+            'max_batch': self.max_batch,
+            'max_wait_ms': self.max_wait * 1000,
+            'batches': self._batches,
+            'records': self._records,
+            'mean_batch_size': self._records / self._batches if self._batches else 0.0,
+            'largest_batch': self._largest,
+            'flushed_full': self._flushes['size'],
+            'flushed_on_window': self._flushes['window'],
+            'retried_batches': self._retried,
+            'mean_wait_ms': self._wait_total / self._records * 1000 if self._records else 0.0,
+            'batch_sizes': dict(zip(labels, self._histogram)),
+        }
@@ -1,17 +1,41 @@
+import os
 import yaml
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import Callable, List, Dict, Any, Optional
 from datetime import datetime
-import shutil
+from .analyzer import analyze_rules
+from .expressions import DerivedFields
+from .operators import compile_condition
+from .rule_engine import RuleEngine
+from .snapshots import SnapshotStore
 
 class ConfigManager:
-    """Manage rule configurations with versioning and validation"""
-
-    def __init__(self, config_dir: str = "config"):
+    """Manage rule configurations with versioning and validation
+
+    Every save is recorded as a content-addressed snapshot in config/backups/
+    (see SnapshotStore), so any past config can be looked up, diffed or rolled
+    back to.
+    """
+
+    def __init__(
+        self,
+        config_dir: str = "config",
+        keep_snapshots: Optional[int] = None,
+        on_save: Optional[Callable[[str, Dict[str, Any], str], Any]] = None
+    ):
+        """
+        Args:
+            config_dir: Directory holding rules_<version>.yaml files
+            keep_snapshots: Snapshots kept per version (None = keep all)
+            on_save: Called as on_save(version, config, content_hash) after each save
+        """
         self.config_dir = Path(config_dir)
         self.config_dir.mkdir(exist_ok=True)
         self.backup_dir = self.config_dir / "backups"
         self.backup_dir.mkdir(exist_ok=True)
+        self.snapshots = SnapshotStore(str(self.backup_dir))
+        self.keep_snapshots = keep_snapshots
+        self.on_save = on_save
 
     def load_rules(self, version: str = "v1") -> Dict[str, Any]:
         """Load rules from YAML file"""
@@ -22,19 +46,91 @@ class ConfigManager:
         with open(config_path, 'r') as f:
             return yaml.safe_load(f)
 
-    def save_rules(self, rules_config: Dict[str, Any], version: str = "v1", backup: bool = True) -> None:
-        """Save rules to YAML file with optional backup"""
+    def save_rules(
+        self,
+        rules_config: Dict[str, Any],
+        version: str = "v1",
+        backup: bool = True,
+        note: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Save rules to YAML file, recording a snapshot unless backup is False
+
+        Returns the snapshot index entry (None when backup is False).
+        """
         config_path = self.config_dir / f"rules_{version}.yaml"
 
-        # Create backup if file exists
-        if backup and config_path.exists():
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            backup_path = self.backup_dir / f"rules_{version}_{timestamp}.yaml"
-            shutil.copy2(config_path, backup_path)
+        # Keep the pre-snapshot state of a file that has no history yet
+        if backup and config_path.exists() and self.snapshots.latest(version) is None:
+            self.snapshots.put(self.load_rules(version), version, note="initial")
 
         # Save new config
-        with open(config_path, 'w') as f:
+        tmp_path = config_path.with_name(f".{config_path.name}.tmp")
+        with open(tmp_path, 'w') as f:
             yaml.safe_dump(rules_config, f, default_flow_style=False, sort_keys=False)
+        os.replace(tmp_path, config_path)
+
+        entry = None
+        if backup:
+            entry = self.snapshots.put(rules_config, version, note=note)
+            if self.keep_snapshots and self.snapshots.count(version) > 2 * self.keep_snapshots:
+                # Amortized: compact only once the history doubles past the limit
+                self.snapshots.apply_retention(keep_last=self.keep_snapshots)
+
+        if self.on_save is not None:
+            self.on_save(version, rules_config, entry['hash'] if entry else None)
+        return entry
+
+    def history(self, version: str = "v1") -> List[Dict[str, Any]]:
+        """Snapshot entries for a version, oldest first"""
+        return self.snapshots.history(version)
+
+    def load_snapshot(self, ref: str, version: str = "v1") -> Dict[str, Any]:
+        """Load a past config by snapshot sequence number or hash prefix"""
+        return self.snapshots.get(self.snapshots.resolve(version, ref))
+
+    def diff_snapshots(self, old_ref: str, new_ref: Optional[str] = None, version: str = "v1") -> Dict[str, Any]:
+        """Rule-level diff between two snapshots (new_ref defaults to the latest)"""
+        old_hash = self.snapshots.resolve(version, old_ref)
+        if new_ref is None:
+            latest = self.snapshots.latest(version)
+            if latest is None:
+                raise KeyError(f"No snapshots for {version}")
+            new_hash = latest['hash']
+        else:
+            new_hash = self.snapshots.resolve(version, new_ref)
+        return self.snapshots.diff(old_hash, new_hash)
+
+    def rollback(self, ref: str, version: str = "v1") -> Dict[str, Any]:
+        """Restore a past snapshot as the current config; returns the new snapshot entry"""
+        digest = self.snapshots.resolve(version, ref)
+        config = self.snapshots.get(digest)
+        return self.save_rules(config, version, note=f"rollback to {digest[:12]}")
+
+    def migrate_backups(self, delete: bool = False) -> int:
+        """Import legacy timestamped backups (rules_<version>_<YYYYmmdd_HHMMSS>.yaml)
+
+        Files are imported oldest first, so run this before taking new snapshots.
+        Returns the number of files imported.
+        """
+        legacy = []
+        with os.scandir(self.backup_dir) as entries:
+            for entry in entries:
+                name = entry.name
+                if not (entry.is_file() and name.startswith("rules_") and name.endswith(".yaml")):
+                    continue
+                try:
+                    version, day, clock = name[len("rules_"):-len(".yaml")].rsplit('_', 2)
+                    timestamp = datetime.strptime(f"{day}_{clock}", "%Y%m%d_%H%M%S")
+                except ValueError:
+                    continue
+                legacy.append((timestamp, name, version, entry.path))
+
+        for timestamp, _, version, path in sorted(legacy):
+            with open(path, 'r') as f:
+                self.snapshots.put(yaml.safe_load(f), version, timestamp=timestamp)
+            if delete:
+                os.remove(path)
+        return len(legacy)
 
     def validate_rule(self, rule: Dict[str, Any]) -> List[str]:
         """Validate a single rule and return list of errors"""
@@ -56,8 +152,28 @@ class ConfigManager:
                         errors.append(f"Condition {i+1}: missing 'field'")
                     if 'operator' not in cond:
                         errors.append(f"Condition {i+1}: missing 'operator'")
-                    if 'value' not in cond:
-                        errors.append(f"Condition {i+1}: missing 'value'")
+                    sources = [k for k in ('value', 'value_field', 'value_file') if k in cond]
+                    if not sources:
+                        errors.append(f"Condition {i+1}: missing 'value' (or 'value_field'/'value_file')")
+                    elif len(sources) > 1:
+                        errors.append(f"Condition {i+1}: use only one of {sources}")
+                    elif 'operator' in cond:
+                        # Known operator; valid range, regex or CIDR; list file exists
+                        op_func = RuleEngine.OPERATORS.get(cond['operator'])
+                        if op_func is None:
+                            errors.append(f"Condition {i+1}: unknown operator '{cond['operator']}'")
+                        else:
+                            try:
+                                compile_condition(cond, op_func, str(self.config_dir))
+                            except (ValueError, TypeError, FileNotFoundError) as e:
+                                errors.append(f"Condition {i+1}: {e}")
+
+        # Optional weight for weighted all-matches scoring
+        if 'weight' in rule and (
+            isinstance(rule['weight'], bool) or not isinstance(rule['weight'], (int, float))
+            or rule['weight'] < 0
+        ):
+            errors.append("weight must be a non-negative number")
 
         # Validate logic
         if 'logic' in rule and rule['logic'] not in ['AND', 'OR', 'ALWAYS']:
@@ -85,8 +201,19 @@ class ConfigManager:
 
         return errors
 
-    def validate_config(self, config: Dict[str, Any]) -> List[str]:
-        """Validate entire config and return list of errors"""
+    def analyze_config(self, config: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Rules that can never be the first match (contradictory, subsumed or unreachable)
+
+        See analyzer.analyze_rules for the finding format.
+        """
+        return analyze_rules(config.get('rules') or [])
+
+    def validate_config(self, config: Dict[str, Any], strict: bool = False) -> List[str]:
+        """Validate entire config and return list of errors
+
+        With strict=True, rules the static analyzer proves can never fire
+        (contradictory, subsumed or unreachable) are reported as errors too.
+        """
         errors = []
 
         # Check required top-level fields
@@ -99,6 +226,12 @@ class ConfigManager:
             errors.append("'rules' must be a non-empty list")
             return errors
 
+        # Derived field expressions must compile
+        try:
+            DerivedFields.from_config(config)
+        except ValueError as e:
+            errors.append(str(e))
+
         # Check for DEFAULT rule at end
         has_default = False
         for i, rule in enumerate(rules):
@@ -122,6 +255,9 @@ class ConfigManager:
             for err in rule_errors:
                 errors.append(f"Rule {i+1} ({rule.get('id', 'unknown')}): {err}")
 
+        if strict and not errors:
+            errors.extend(f['message'] for f in self.analyze_config(config))
+
         return errors
 
     def get_next_rule_id(self, config: Dict[str, Any]) -> str:
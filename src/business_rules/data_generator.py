@@ -1,21 +1,119 @@
 import random
-from faker import Faker
 from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, Optional
+import numpy as np
 import pandas as pd
 
-fake = Faker()
+_fake = None
+
+
+def faker():
+    """Shared Faker instance, created on first use (importing faker is slow)"""
+    global _fake
+    if _fake is None:
+        from faker import Faker
+        _fake = Faker()
+    return _fake
+
+COUNTRIES = ["US", "UK", "DE", "FR", "NG", "RU", "CN", "BR"]
+
+# Column distributions per pattern, used by the vectorized generator. Each value is
+# a constant or a sampler spec:
+#   ('uniform', low, high)     float in [low, high)
+#   ('randint', low, high)     int in [low, high] (inclusive, like random.randint)
+#   ('choice', [values...])    uniform choice
+#   ('same_as', column)        copy another column of the same row
+# account_country is always drawn from the legitimate countries.
+PATTERNS: Dict[str, Dict[str, Any]] = {
+    'legit': {
+        'transaction_amount': ('uniform', 10, 500),
+        'transaction_velocity_24h': ('randint', 1, 5),
+        'is_new_device': ('choice', [True, False]),
+        'country_mismatch': False,
+        'merchant_category': ('choice', ["retail", "travel", "electronics"]),
+        'transaction_country': ('same_as', 'account_country'),
+        'account_age_days': ('randint', 365, 2000),
+    },
+    'high_value_crypto': {
+        'transaction_amount': ('uniform', 5000, 50000),
+        'transaction_velocity_24h': ('randint', 1, 5),
+        'is_new_device': True,
+        'country_mismatch': ('choice', [True, False]),
+        'merchant_category': 'crypto',
+        'transaction_country': ('choice', COUNTRIES),
+        'account_age_days': ('randint', 1, 30),
+    },
+    'velocity_spike': {
+        'transaction_amount': ('uniform', 100, 2000),
+        'transaction_velocity_24h': ('randint', 11, 50),
+        'is_new_device': ('choice', [True, False]),
+        'country_mismatch': True,
+        'merchant_category': ('choice', ["retail", "travel", "gambling", "crypto", "electronics"]),
+        'transaction_country': ('choice', COUNTRIES[4:]),
+        'account_age_days': ('randint', 30, 365),
+    },
+    'gambling': {
+        'transaction_amount': ('uniform', 1000, 10000),
+        'transaction_velocity_24h': ('randint', 1, 10),
+        'is_new_device': False,
+        'country_mismatch': False,
+        'merchant_category': 'gambling',
+        'transaction_country': ('same_as', 'account_country'),
+        'account_age_days': ('randint', 100, 1000),
+    },
+}
+
+COLUMN_DTYPES = {
+    'transaction_amount': np.float64,
+    'transaction_velocity_24h': np.int64,
+    'is_new_device': np.bool_,
+    'country_mismatch': np.bool_,
+    'merchant_category': object,
+    'transaction_country': object,
+    'account_age_days': np.int64,
+}
+
+HEX_DIGITS = np.frombuffer(b"0123456789abcdef", dtype="S1")
+
+# Default end of the timestamp range for seeded generators, so a seed always
+# produces the same dataset (unseeded generators end at the current time)
+SEEDED_END = datetime(2024, 6, 30)
 
 class FraudDataGenerator:
     """Generate realistic fraud detection test data"""
     
     MERCHANT_CATEGORIES = ["retail", "travel", "gambling", "crypto", "electronics"]
-    COUNTRIES = ["US", "UK", "DE", "FR", "NG", "RU", "CN", "BR"]
+    COUNTRIES = COUNTRIES
     
-    def __init__(self, fraud_ratio: float = 0.15):
+    def __init__(
+        self,
+        fraud_ratio: float = 0.15,
+        seed: Optional[int] = None,
+        patterns: Optional[Dict[str, Dict[str, Any]]] = None,
+        pattern_weights: Optional[Dict[str, float]] = None
+    ):
+        """
+        Args:
+            fraud_ratio: Share of fraudulent transactions
+            seed: Seed for the vectorized generator (generate_columns/iter_chunks)
+            patterns: Column distributions per pattern (defaults to PATTERNS);
+                must contain a 'legit' entry
+            pattern_weights: Relative weights of the fraud patterns (default: equal)
+        """
         self.fraud_ratio = fraud_ratio
+        self.patterns = patterns if patterns is not None else PATTERNS
+        self.fraud_patterns = [p for p in self.patterns if p != 'legit']
+        weights = pattern_weights or {p: 1.0 for p in self.fraud_patterns}
+        total = sum(weights.get(p, 0.0) for p in self.fraud_patterns)
+        self.pattern_probs = np.array([weights.get(p, 0.0) / total for p in self.fraud_patterns])
+        self.seed = seed
+        self.rng = np.random.default_rng(seed)
+        self._id_key = int(self.rng.integers(0, 2**32))
+        self._id_counter = 0
 
     def generate_transaction(self, is_fraud: bool = False) -> dict:
         """Generate a single transaction"""
+        fake = faker()
         account_country = random.choice(self.COUNTRIES[:4])  # Legitimate countries
         
         if is_fraud:
@@ -89,6 +187,104 @@ class FraudDataGenerator:
         random.shuffle(transactions)
         return pd.DataFrame(transactions)
 
+    def generate_columns(
+        self,
+        n: int,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None
+    ) -> pd.DataFrame:
+        """Generate n transactions as NumPy-backed columns
+
+        Vectorized equivalent of generate_dataset() for large load-test datasets:
+        same columns and pattern distributions, reproducible for a given seed.
+        Timestamps are uniform in [start, end) (default: start of end's month to
+        end, which is SEEDED_END for a seeded generator and now otherwise).
+        """
+        rng = self.rng
+        n_fraud = int(n * self.fraud_ratio)
+
+        # Pattern index per row: 0 = legit, 1.. = fraud patterns
+        labels = np.zeros(n, dtype=np.int64)
+        if n_fraud and len(self.fraud_patterns):
+            labels[:n_fraud] = 1 + rng.choice(len(self.fraud_patterns), size=n_fraud, p=self.pattern_probs)
+        labels = rng.permutation(labels)
+        names = ['legit'] + self.fraud_patterns
+
+        legit_countries = np.array(self.COUNTRIES[:4], dtype=object)
+        columns = {
+            'transaction_id': self._transaction_ids(n),
+            'timestamp': self._timestamps(n, start, end),
+            'account_country': legit_countries[rng.integers(0, 4, size=n)],
+        }
+        for column, dtype in COLUMN_DTYPES.items():
+            columns[column] = np.empty(n, dtype=dtype)
+
+        for label, name in enumerate(names):
+            rows = np.flatnonzero(labels == label)
+            if not len(rows):
+                continue
+            for column, spec in self.patterns[name].items():
+                columns[column][rows] = self._sample(spec, rows, columns)
+
+        order = [
+            'transaction_id', 'timestamp', 'transaction_amount', 'transaction_velocity_24h',
+            'is_new_device', 'country_mismatch', 'merchant_category', 'account_country',
+            'transaction_country', 'account_age_days',
+        ]
+        return pd.DataFrame({column: columns[column] for column in order})
+
+    def iter_chunks(self, n: int, chunk_size: int = 100_000, **kwargs) -> Iterator[pd.DataFrame]:
+        """Stream n transactions as DataFrames of at most chunk_size rows"""
+        # One time range for every chunk
+        kwargs.setdefault('end', self.default_end())
+        offset = 0
+        for chunk_start in range(0, n, chunk_size):
+            chunk = self.generate_columns(min(chunk_size, n - chunk_start), **kwargs)
+            chunk.index += offset
+            offset += len(chunk)
+            yield chunk
+
+    def _sample(self, spec: Any, rows: np.ndarray, columns: Dict[str, np.ndarray]) -> Any:
+        if not isinstance(spec, tuple):
+            return spec
+
+        kind, *args = spec
+        size = len(rows)
+        if kind == 'uniform':
+            return self.rng.uniform(args[0], args[1], size=size)
+        if kind == 'randint':
+            return self.rng.integers(args[0], args[1], size=size, endpoint=True)
+        if kind == 'choice':
+            values = np.array(args[0], dtype=object)
+            return values[self.rng.integers(0, len(values), size=size)]
+        if kind == 'same_as':
+            return columns[args[0]][rows]
+        raise ValueError(f"Unknown sampler: {kind}")
+
+    def _transaction_ids(self, n: int) -> np.ndarray:
+        """Unique 8-hex-digit ids (a seeded bijection of a running counter)"""
+        counter = np.arange(self._id_counter, self._id_counter + n, dtype=np.uint64)
+        self._id_counter += n
+        ids = ((counter * np.uint64(0x9E3779B1)) ^ np.uint64(self._id_key)) & np.uint64(0xFFFFFFFF)
+
+        shifts = np.arange(28, -1, -4, dtype=np.uint64)
+        digits = (ids[:, None] >> shifts) & np.uint64(0xF)
+        return HEX_DIGITS[digits].view("S8").ravel().astype(str).astype(object)
+
+    def default_end(self) -> datetime:
+        """End of the default timestamp range: fixed when seeded, else the current time"""
+        return SEEDED_END if self.seed is not None else datetime.now()
+
+    def _timestamps(self, n: int, start: Optional[datetime], end: Optional[datetime]) -> np.ndarray:
+        if end is None:
+            end = self.default_end()
+        if start is None:
+            start = end.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        span = max(int((end - start).total_seconds()), 1)
+        seconds = self.rng.integers(0, span, size=n)
+        stamps = np.datetime64(start.replace(microsecond=0), 's') + seconds.astype('timedelta64[s]')
+        return np.datetime_as_string(stamps, unit='s').astype(object)
+
 def generate_test_transactions(n: int = 5, fraud_ratio: float = 0.15) -> pd.DataFrame:
     """Convenience function to generate test transactions"""
     generator = FraudDataGenerator(fraud_ratio=fraud_ratio)
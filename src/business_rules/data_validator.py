@@ -1,5 +1,46 @@
-from typing import Dict, Any, List, Optional
+from typing import Callable, Dict, Any, List, Optional, Tuple
 import pandas as pd
+from .schema import FeatureSchema
+
+BOOL_STRINGS = frozenset(['true', '1', 'yes', 't'])
+
+_MISSING = object()
+
+
+def _to_float(value: Any) -> Any:
+    if type(value) is float:
+        return value
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return value
+
+
+def _to_int(value: Any) -> Any:
+    if type(value) is int:
+        return value
+    try:
+        return int(value)
+    except (ValueError, TypeError):
+        return value
+
+
+def _to_bool(value: Any) -> Any:
+    if type(value) is bool:
+        return value
+    if isinstance(value, str):
+        return value.lower() in BOOL_STRINGS
+    if isinstance(value, (int, float)):
+        return bool(value)
+    return value
+
+
+# Sanitizing conversion applied to each feature type
+CONVERTERS = {
+    'float': _to_float,
+    'int': _to_int,
+    'bool': _to_bool,
+}
 
 class DataValidator:
     """Validate transaction data before processing"""
@@ -22,112 +63,128 @@ class DataValidator:
 
     MERCHANT_CATEGORIES = ['retail', 'travel', 'gambling', 'crypto', 'electronics']
 
-    def __init__(self):
-        self.all_fields = self.REQUIRED_FIELDS + self.OPTIONAL_FIELDS
+    def __init__(self, schema: Optional[FeatureSchema] = None):
+        """
+        Args:
+            schema: Compiled feature schema to validate against. Defaults to the
+                built-in transaction fields below.
+        """
+        if schema is None:
+            schema = FeatureSchema(self.default_features(), required=self.REQUIRED_FIELDS)
+        self.schema = schema
+        # Schema features keep their declared order so errors are reported in
+        # the same order as validate_transaction()
+        self.all_fields = list(dict.fromkeys(
+            [f for f in schema.required if f not in schema.features]
+            + list(schema.features)
+            + self.REQUIRED_FIELDS
+            + self.OPTIONAL_FIELDS
+        ))
+
+        # Per-field (check, converter) plan used by the single-pass routines
+        checks = {field.name: field.check for field in schema.fields}
+        self._plan: List[Tuple[str, Optional[Callable], Optional[Callable]]] = [
+            (name, checks.get(name), CONVERTERS.get((schema.features.get(name) or {}).get('type')))
+            for name in self.all_fields
+        ]
+        self._known = frozenset(self.all_fields)
+        self._required = frozenset(schema.required)
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> 'DataValidator':
+        """Create a validator from the 'features' section of a rules config"""
+        return cls(schema=FeatureSchema.from_config(config))
+
+    @classmethod
+    def default_features(cls) -> Dict[str, Dict[str, Any]]:
+        """Built-in feature definitions, in validation order"""
+        return {
+            'transaction_amount': {'type': 'float', 'min': 0},
+            'transaction_velocity_24h': {'type': 'int', 'min': 0},
+            'merchant_category': {'type': 'string', 'allowed': cls.MERCHANT_CATEGORIES},
+            'is_new_device': {'type': 'bool'},
+            'country_mismatch': {'type': 'bool'},
+            'account_age_days': {'type': 'int', 'min': 0, 'required': False},
+        }
 
     def validate_transaction(self, data: Dict[str, Any]) -> List[str]:
         """Validate a single transaction and return list of errors"""
-        errors = []
-
-        # Check required fields
-        for field in self.REQUIRED_FIELDS:
-            if field not in data:
-                errors.append(f"Missing required field: {field}")
-
-        # Validate data types and values
-        if 'transaction_amount' in data:
-            if not isinstance(data['transaction_amount'], (int, float)):
-                errors.append("transaction_amount must be numeric")
-            elif data['transaction_amount'] < 0:
-                errors.append("transaction_amount cannot be negative")
-
-        if 'transaction_velocity_24h' in data:
-            if not isinstance(data['transaction_velocity_24h'], int):
-                errors.append("transaction_velocity_24h must be integer")
-            elif data['transaction_velocity_24h'] < 0:
-                errors.append("transaction_velocity_24h cannot be negative")
-
-        if 'merchant_category' in data:
-            if data['merchant_category'] not in self.MERCHANT_CATEGORIES:
-                errors.append(f"Invalid merchant_category. Must be one of: {self.MERCHANT_CATEGORIES}")
-
-        if 'is_new_device' in data:
-            if not isinstance(data['is_new_device'], bool):
-                errors.append("is_new_device must be boolean (true/false)")
-
-        if 'country_mismatch' in data:
-            if not isinstance(data['country_mismatch'], bool):
-                errors.append("country_mismatch must be boolean (true/false)")
-
-        if 'account_age_days' in data:
-            if not isinstance(data['account_age_days'], int):
-                errors.append("account_age_days must be integer")
-            elif data['account_age_days'] < 0:
-                errors.append("account_age_days cannot be negative")
-
-        return errors
+        return self.schema.check_record(data)
 
     def validate_dataframe(self, df: pd.DataFrame) -> Dict[str, List[str]]:
-        """Validate entire dataframe and return errors by row"""
-        errors_by_row = {}
+        """Validate entire dataframe and return errors by row
 
-        # Check for required columns
-        missing_cols = set(self.REQUIRED_FIELDS) - set(df.columns)
-        if missing_cols:
-            errors_by_row['schema'] = [f"Missing required columns: {missing_cols}"]
-            return errors_by_row
-
-        # Validate each row
-        for idx, row in df.iterrows():
-            row_dict = row.to_dict()
-            row_errors = self.validate_transaction(row_dict)
-            if row_errors:
-                errors_by_row[idx] = row_errors
-
-        return errors_by_row
+        Checks run column-wise (one dtype check per column, boolean masks for
+        value checks) and per-row error lists are only built for failing rows.
+        The result is identical to calling validate_transaction() on every row.
+        """
+        return self.schema.check_dataframe(df)
 
     def sanitize_transaction(self, data: Dict[str, Any]) -> Dict[str, Any]:
-        """Clean and sanitize transaction data"""
+        """Clean and sanitize transaction data
+
+        Only known fields are copied; numeric and boolean-like values are
+        converted to their feature type where possible.
+        """
         sanitized = {}
 
-        # Copy only known fields
-        for field in self.all_fields:
+        for field, _, convert in self._plan:
             if field in data:
-                sanitized[field] = data[field]
-
-        # Convert types
-        if 'transaction_amount' in sanitized:
-            try:
-                sanitized['transaction_amount'] = float(sanitized['transaction_amount'])
-            except (ValueError, TypeError):
-                pass
-
-        if 'transaction_velocity_24h' in sanitized:
-            try:
-                sanitized['transaction_velocity_24h'] = int(sanitized['transaction_velocity_24h'])
-            except (ValueError, TypeError):
-                pass
-
-        if 'account_age_days' in sanitized:
-            try:
-                sanitized['account_age_days'] = int(sanitized['account_age_days'])
-            except (ValueError, TypeError):
-                pass
-
-        # Convert boolean-like values
-        for bool_field in ['is_new_device', 'country_mismatch']:
-            if bool_field in sanitized:
-                val = sanitized[bool_field]
-                if isinstance(val, str):
-                    sanitized[bool_field] = val.lower() in ['true', '1', 'yes', 't']
-                elif isinstance(val, (int, float)):
-                    sanitized[bool_field] = bool(val)
+                value = data[field]
+                sanitized[field] = convert(value) if convert is not None else value
 
         return sanitized
 
+    def sanitize_and_validate(
+        self,
+        data: Dict[str, Any],
+        keep_unknown: bool = False
+    ) -> Tuple[Dict[str, Any], List[str]]:
+        """Sanitize and validate a transaction in a single pass
+
+        Equivalent to (sanitize_transaction(data), validate_transaction(data)):
+        errors describe the raw input values, the sanitized record carries the
+        converted values.
+
+        Args:
+            data: Raw transaction data
+            keep_unknown: Also copy fields the validator does not know about
+                (e.g. extra fields referenced by rules)
+
+        Returns:
+            Tuple of (sanitized record, list of errors)
+        """
+        errors = []
+        sanitized = {}
+
+        for field, check, convert in self._plan:
+            value = data.get(field, _MISSING)
+            if value is _MISSING:
+                continue
+            if check is not None:
+                message = check(value)
+                if message is not None:
+                    errors.append(message)
+            sanitized[field] = convert(value) if convert is not None else value
+
+        # Missing required fields are reported first, as in validate_transaction()
+        if not self._required <= data.keys():
+            errors = [
+                f"Missing required field: {field}"
+                for field in self.schema.required if field not in data
+            ] + errors
+
+        if keep_unknown and len(sanitized) != len(data):
+            known = self._known
+            for field, value in data.items():
+                if field not in known:
+                    sanitized[field] = value
+
+        return sanitized, errors
+
     def check_required_fields(self, data: Dict[str, Any]) -> bool:
         """Quick check if all required fields are present"""
-        return all(field in data for field in self.REQUIRED_FIELDS)
+        return all(field in data for field in self.schema.required)
 
     def get_field_info(self) -> Dict[str, Dict[str, str]]:
         """Get metadata about available fields"""
@@ -0,0 +1,356 @@
+from typing import Any, Dict, FrozenSet, Hashable, List, Optional, Sequence, Tuple, Union
+from .analyzer import ValueSet, condition_values
+from .models import Decision, RuleResult
+
+# Rule states while building: a rule is dead, matched, or waiting on some predicates
+DEAD = "dead"
+MATCHED = "matched"
+
+# A leaf is the index of the first matching rule (-1: none), or a chain of rule
+# indices evaluated linearly when the node budget ran out
+Leaf = Union[int, Tuple[int, ...]]
+
+
+def _value_key(values: ValueSet) -> Hashable:
+    return (values.absent, values.numbers, values.others, values.others_negated)
+
+
+class DecisionDAG:
+    """An engine's ordered rules compiled into a decision DAG over its conditions
+
+    Each distinct condition is a predicate tested at most once per record.
+    Nodes branch on one predicate; leaves hold the rule that wins under
+    first-match semantics, so evaluate() returns what RuleEngine.evaluate()
+    would. At every node the predicate is picked from the first rule still
+    undecided: for AND rules the one most likely to fail, for OR rules the one
+    most likely to pass (probabilities from a sample dataset when given,
+    otherwise 0.5), preferring predicates shared by more rules. Outcomes implied
+    by what is already known about a field (amount > 5000 holds, so
+    amount > 1000 holds too) are not tested again. Identical sub-problems share
+    one node.
+
+    When max_nodes is reached the remaining rules are evaluated linearly, so
+    compile time and size stay bounded. Unlike the linear engine, conditions
+    whose outcome cannot change the result are never evaluated, so a condition
+    that would raise (e.g. comparing a string to a number) may not.
+    """
+
+    def __init__(self, engine, sample: Any = None, max_nodes: int = 20000):
+        """
+        Args:
+            engine: RuleEngine whose rules (in order) are compiled
+            sample: Optional DataFrame or list of records used to estimate how
+                often each condition holds
+            max_nodes: Decision nodes created before falling back to linear chains
+        """
+        from .vectorized import condition_key
+
+        self.engine = engine
+        self.rules = engine.rules
+        self.max_nodes = max_nodes
+
+        slots: Dict[Hashable, int] = {}
+        self.conditions: List[Tuple] = []
+        self._values: List[Optional[Tuple[str, ValueSet]]] = []
+        rule_slots: List[Optional[Tuple[bool, FrozenSet[int]]]] = []
+        for rule in self.rules:
+            logic = rule.get('logic')
+            if logic == 'ALWAYS':
+                rule_slots.append(None)
+                continue
+            conditions = rule.get('conditions') or []
+            if logic not in ('AND', 'OR') or not conditions:
+                rule_slots.append((True, frozenset([-1])))  # can never match
+                continue
+            rs = []
+            for condition in conditions:
+                key = condition_key(condition, engine.derived)
+                if key not in slots:
+                    slots[key] = len(self.conditions)
+                    self.conditions.append(engine.compiled_condition(condition))
+                    values = condition_values(condition)
+                    self._values.append(None if values is None else (condition['field'], values))
+                rs.append(slots[key])
+            rule_slots.append((logic == 'AND', frozenset(rs)))
+        self._rule_slots = rule_slots
+
+        self.probabilities = self._estimate(sample, slots)
+        self._usage = [0] * len(self.conditions)
+        for entry in rule_slots:
+            if entry is not None:
+                for slot in entry[1]:
+                    if slot >= 0:
+                        self._usage[slot] += 1
+
+        # Flat node arrays: child >= 0 is a node, child < 0 is leaf ~child
+        self._slot: List[int] = []
+        self._true: List[int] = []
+        self._false: List[int] = []
+        self.leaves: List[Leaf] = []
+        self._leaf_ids: Dict[Hashable, int] = {}
+        self._memo: Dict[Hashable, int] = {}
+        self.root = self._build(self._initial_states(), {})
+        del self._memo, self._leaf_ids
+
+    @classmethod
+    def from_engine(cls, engine, sample: Any = None, max_nodes: int = 20000) -> 'DecisionDAG':
+        return cls(engine, sample, max_nodes)
+
+    def _estimate(self, sample: Any, slots: Dict[Hashable, int]) -> List[float]:
+        if sample is None or len(sample) == 0:
+            return [0.5] * len(self.conditions)
+        import pandas as pd
+        from .vectorized import PredicateCache
+
+        df = sample if isinstance(sample, pd.DataFrame) else pd.DataFrame(list(sample))
+        cache = PredicateCache(df)
+        probabilities = [0.5] * len(self.conditions)
+        seen = set()
+        for rule in self.rules:
+            for condition in rule.get('conditions') or []:
+                slot = self._slot_of(condition, slots)
+                if slot is None or slot in seen:
+                    continue
+                seen.add(slot)
+                mask = cache.mask(condition, self.engine.derived, self.engine.base_dir)
+                probabilities[slot] = float(mask.mean())
+        return probabilities
+
+    def _slot_of(self, condition: dict, slots: Dict[Hashable, int]) -> Optional[int]:
+        from .vectorized import condition_key
+        return slots.get(condition_key(condition, self.engine.derived))
+
+    def _initial_states(self) -> Tuple:
+        states = []
+        for entry in self._rule_slots:
+            if entry is None:
+                states.append(MATCHED)
+            elif -1 in entry[1]:
+                states.append(DEAD)
+            else:
+                states.append(entry[1])
+        return tuple(states)
+
+    # -- building ------------------------------------------------------------
+
+    def _leaf(self, leaf: Leaf) -> int:
+        idx = self._leaf_ids.get(leaf)
+        if idx is None:
+            idx = self._leaf_ids[leaf] = len(self.leaves)
+            self.leaves.append(leaf)
+        return ~idx
+
+    def _implied(self, slot: int, knowledge: Dict[str, ValueSet]) -> Optional[bool]:
+        entry = self._values[slot]
+        if entry is None:
+            return None
+        field, values = entry
+        known = knowledge.get(field)
+        if known is None:
+            return None
+        if known.intersect(values).is_empty():
+            return False
+        if known.intersect(values.complement()).is_empty():
+            return True
+        return None
+
+    def _assign(
+        self,
+        states: Tuple,
+        knowledge: Dict[str, ValueSet],
+        slot: int,
+        value: bool
+    ) -> Tuple[Tuple, Dict[str, ValueSet]]:
+        entry = self._values[slot]
+        if entry is not None:
+            field, values = entry
+            knowledge = dict(knowledge)
+            known = knowledge.get(field) or ValueSet.any()
+            knowledge[field] = known.intersect(values if value else values.complement())
+
+        new_states = []
+        for idx, state in enumerate(states):
+            if state is DEAD or state is MATCHED:
+                new_states.append(state)
+                continue
+            is_and = self._rule_slots[idx][0]
+            pending = []
+            decided = None
+            for s in state:
+                v = value if s == slot else self._implied(s, knowledge)
+                if v is None:
+                    pending.append(s)
+                elif is_and and not v:
+                    decided = DEAD
+                    break
+                elif not is_and and v:
+                    decided = MATCHED
+                    break
+            if decided is None:
+                if not pending:
+                    decided = MATCHED if is_and else DEAD
+                else:
+                    decided = frozenset(pending)
+            new_states.append(decided)
+        return tuple(new_states), knowledge
+
+    def _choose(self, states: Tuple, first: int) -> int:
+        is_and = self._rule_slots[first][0]
+        probabilities, usage = self.probabilities, self._usage
+
+        def score(slot: int) -> Tuple[float, int, int]:
+            p = probabilities[slot]
+            # Chance this test decides the rule, then how many rules share it
+            return (1 - p if is_and else p, usage[slot], -slot)
+
+        return max(states[first], key=score)
+
+    def _build(self, states: Tuple, knowledge: Dict[str, ValueSet]) -> int:
+        first = next((i for i, s in enumerate(states) if s is not DEAD), None)
+        if first is None:
+            return self._leaf(-1)
+        if states[first] is MATCHED:
+            return self._leaf(first)
+
+        pending = {s for state in states[first:] if isinstance(state, frozenset) for s in state}
+        fields = {self._values[s][0] for s in pending if self._values[s] is not None}
+        key = (
+            first,
+            states[first:],
+            frozenset((f, _value_key(v)) for f, v in knowledge.items() if f in fields)
+        )
+        node = self._memo.get(key)
+        if node is not None:
+            return node
+
+        if len(self._slot) >= self.max_nodes:
+            node = self._leaf(tuple(i for i in range(first, len(states)) if states[i] is not DEAD))
+            self._memo[key] = node
+            return node
+
+        slot = self._choose(states, first)
+        on_true = self._build(*self._assign(states, knowledge, slot, True))
+        on_false = self._build(*self._assign(states, knowledge, slot, False))
+        if on_true == on_false:
+            # Both branches lead to the same place; the test is unnecessary
+            node = on_true
+        else:
+            node = len(self._slot)
+            self._slot.append(slot)
+            self._true.append(on_true)
+            self._false.append(on_false)
+        self._memo[key] = node
+        return node
+
+    # -- evaluation ----------------------------------------------------------
+
+    def match(self, record: dict) -> int:
+        """Index of the first matching rule (-1 if none)"""
+        record = self.engine.record_view(record)
+        conditions, slots, on_true, on_false = self.conditions, self._slot, self._true, self._false
+        node = self.root
+        while node >= 0:
+            field, value_field, op_func, test = conditions[slots[node]]
+            actual = record.get(field)
+            if actual is None:
+                passed = False
+            elif value_field is not None:
+                expected = record.get(value_field)
+                passed = expected is not None and op_func(actual, expected)
+            else:
+                passed = test(actual)
+            node = on_true[node] if passed else on_false[node]
+
+        leaf = self.leaves[~node]
+        if isinstance(leaf, int):
+            return leaf
+        evaluate_rule = self.engine.evaluate_rule
+        for idx in leaf:
+            if evaluate_rule(self.rules[idx], record):
+                return idx
+        return -1
+
+    def evaluate(self, record: dict) -> RuleResult:
+        """Same result as RuleEngine.evaluate()"""
+        idx = self.match(record)
+        if idx < 0:
+            raise ValueError("No matching rule found and no DEFAULT rule defined")
+        rule = self.rules[idx]
+        outcome = rule['outcome']
+        return RuleResult(
+            transaction_id=record.get('transaction_id', 'unknown'),
+            matched_rule_id=rule['id'],
+            matched_rule_name=rule['name'],
+            risk_score=outcome['risk_score'],
+            decision=Decision(outcome['decision']),
+            rule_reason=outcome['reason']
+        )
+
+    def evaluate_batch(self, records: List[dict]) -> List[RuleResult]:
+        return [self.evaluate(record) for record in records]
+
+    # -- introspection -------------------------------------------------------
+
+    def checks(self, record: dict) -> int:
+        """Predicates tested for a record (chain leaves count their conditions)"""
+        record = self.engine.record_view(record)
+        count, node = 0, self.root
+        while node >= 0:
+            count += 1
+            field, value_field, op_func, test = self.conditions[self._slot[node]]
+            actual = record.get(field)
+            if actual is None:
+                passed = False
+            elif value_field is not None:
+                expected = record.get(value_field)
+                passed = expected is not None and op_func(actual, expected)
+            else:
+                passed = test(actual)
+            node = self._true[node] if passed else self._false[node]
+        leaf = self.leaves[~node]
+        if not isinstance(leaf, int):
+            for idx in leaf:
+                count += len(self.rules[idx].get('conditions') or [])
+                if self.engine.evaluate_rule(self.rules[idx], record):
+                    break
+        return count
+
+    def depth(self) -> int:
+        """Longest root-to-leaf path in predicate tests"""
+        depths: Dict[int, int] = {}
+
+        def walk(node: int) -> int:
+            if node < 0:
+                return 0
+            if node not in depths:
+                depths[node] = 1 + max(walk(self._true[node]), walk(self._false[node]))
+            return depths[node]
+
+        return walk(self.root)
+
+    def stats(self, records: Optional[Sequence[dict]] = None) -> Dict[str, Any]:
+        """Size of the DAG, and mean predicate checks per record against linear evaluation"""
+        stats: Dict[str, Any] = {
+            'nodes': len(self._slot),
+            'leaves': len(self.leaves),
+            'chain_leaves': sum(1 for leaf in self.leaves if not isinstance(leaf, int)),
+            'predicates': len(self.conditions),
+            'depth': self.depth(),
+        }
+        if records:
+            stats['mean_checks'] = sum(self.checks(r) for r in records) / len(records)
+            stats['mean_linear_checks'] = sum(
+                linear_checks(self.engine, r) for r in records
+            ) / len(records)
+        return stats
+
+
+def linear_checks(engine, record: dict) -> int:
+    """Conditions RuleEngine.evaluate() tests for a record"""
+    record = engine.record_view(record)
+    count = 0
+    for rule in engine.rules:
+        count += len(rule.get('conditions') or []) if rule.get('logic') != 'ALWAYS' else 0
+        if engine.evaluate_rule(rule, record):
+            break
+    return count
@@ -0,0 +1,131 @@
+import copy
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from .rule_engine import RuleEngine
+from .data_validator import DataValidator
+
+
+class EngineCache:
+    """Cache compiled RuleEngines (and their validators) per config version
+
+    Entries are keyed by version and reloaded when the mtime or size of the
+    config file (or of a value_file list it references) changes, so edits made
+    through ConfigManager and replaced lists are picked up on the next lookup
+    without re-parsing YAML on every request.
+
+    Engines published with a content hash are also kept in a small LRU keyed by
+    that hash, so rolling back to a recently served config swaps in the already
+    compiled engine instead of rebuilding it.
+    """
+
+    def __init__(
+        self,
+        config_dir: str = "config",
+        max_compiled: int = 8,
+        prune_unreachable: bool = False,
+        decision_dag: bool = False
+    ):
+        """
+        Args:
+            config_dir: Directory holding rules_<version>.yaml files
+            max_compiled: Engines kept per content hash for fast rollbacks
+            prune_unreachable: Compile engines without rules that can never fire
+            decision_dag: Serve evaluate() from a compiled decision DAG
+        """
+        self.config_dir = Path(config_dir)
+        self.max_compiled = max_compiled
+        self.prune_unreachable = prune_unreachable
+        self.decision_dag = decision_dag
+        self._entries: Dict[str, Tuple[tuple, RuleEngine, DataValidator]] = {}
+        self._compiled: 'OrderedDict[str, Tuple[RuleEngine, DataValidator]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def config_path(self, version: str) -> Path:
+        return self.config_dir / f"rules_{version}.yaml"
+
+    @staticmethod
+    def _stamp(stat: os.stat_result, list_files: List[str]) -> tuple:
+        """(mtime, size) of the config followed by those of its list files"""
+        stamp = [(stat.st_mtime_ns, stat.st_size)]
+        for list_file in list_files:
+            try:
+                s = os.stat(list_file)
+                stamp.append((s.st_mtime_ns, s.st_size))
+            except FileNotFoundError:
+                stamp.append(None)
+        return tuple(stamp)
+
+    def _load(self, version: str) -> Tuple[RuleEngine, DataValidator]:
+        path = self.config_path(version)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            self._entries.pop(version, None)
+            raise FileNotFoundError(f"Config file not found: {path}")
+
+        entry = self._entries.get(version)
+        if entry is not None and entry[0] == self._stamp(stat, entry[1].list_files):
+            return entry[1], entry[2]
+
+        with self._lock:
+            entry = self._entries.get(version)
+            if entry is not None and entry[0] == self._stamp(stat, entry[1].list_files):
+                return entry[1], entry[2]
+
+            engine = RuleEngine(str(path), prune_unreachable=self.prune_unreachable)
+            if self.decision_dag:
+                engine.use_decision_dag()
+            # Validation and evaluation share one parsed schema
+            validator = DataValidator(schema=engine.schema)
+            self._entries[version] = (self._stamp(stat, engine.list_files), engine, validator)
+            return engine, validator
+
+    def publish(self, version: str, config: Dict[str, Any], digest: Optional[str] = None) -> RuleEngine:
+        """Serve config for a version right after it was written to disk
+
+        Args:
+            version: Config version the file was saved as
+            config: The config that was saved
+            digest: Content hash of config; reuses a previously compiled engine
+        """
+        stat = os.stat(self.config_path(version))
+
+        with self._lock:
+            compiled = self._compiled.get(digest) if digest else None
+            if compiled is not None and compiled[0].list_files:
+                # Its lists may have been replaced since; recompiling reuses unchanged ones
+                compiled = None
+            if compiled is None:
+                engine = RuleEngine.from_config(
+                    copy.deepcopy(config), str(self.config_dir), self.prune_unreachable
+                )
+                if self.decision_dag:
+                    engine.use_decision_dag()
+                compiled = (engine, DataValidator(schema=engine.schema))
+            if digest:
+                self._compiled[digest] = compiled
+                self._compiled.move_to_end(digest)
+                while len(self._compiled) > self.max_compiled:
+                    self._compiled.popitem(last=False)
+            self._entries[version] = (self._stamp(stat, compiled[0].list_files), *compiled)
+            return compiled[0]
+
+    def get(self, version: str = "v1") -> RuleEngine:
+        """Return the compiled engine for a config version"""
+        return self._load(version)[0]
+
+    def get_validator(self, version: str = "v1") -> DataValidator:
+        """Return the validator built from the config version's features section"""
+        return self._load(version)[1]
+
+    def invalidate(self, version: Optional[str] = None) -> None:
+        """Drop cached entries for one version (or all versions)"""
+        with self._lock:
+            if version is None:
+                self._entries.clear()
+                self._compiled.clear()
+            else:
+                self._entries.pop(version, None)
@@ -0,0 +1,489 @@
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+DAY_SECONDS = 86400
+
+
+def to_epoch(value: Any) -> Optional[float]:
+    """Epoch seconds from a datetime, pandas Timestamp, number or ISO string"""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, datetime):
+        return value.timestamp()
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+        except ValueError:
+            return None
+    timestamp = getattr(value, 'timestamp', None)
+    return timestamp() if callable(timestamp) else None
+
+
+class _AccountWindow:
+    """Per-account buckets of (bucket id, count, amount sum), oldest first"""
+
+    __slots__ = ('buckets', 'count', 'amount', 'countries')
+
+    def __init__(self):
+        self.buckets: deque = deque()
+        self.count = 0
+        self.amount = 0.0
+        self.countries: Dict[str, int] = {}  # country -> last bucket id seen
+
+    def evict(self, oldest: int) -> None:
+        buckets = self.buckets
+        while buckets and buckets[0][0] < oldest:
+            _, count, amount = buckets.popleft()
+            self.count -= count
+            self.amount -= amount
+        if not buckets:
+            # Reset accumulated float error once the window is empty
+            self.count, self.amount = 0, 0.0
+
+    def add(self, bucket: int, amount: float) -> None:
+        buckets = self.buckets
+        if buckets and buckets[-1][0] == bucket:
+            buckets[-1][1] += 1
+            buckets[-1][2] += amount
+        elif not buckets or buckets[-1][0] < bucket:
+            buckets.append([bucket, 1, amount])
+        else:
+            # Out-of-order event: find (or insert) its bucket
+            for i in range(len(buckets) - 1, -1, -1):
+                if buckets[i][0] == bucket:
+                    buckets[i][1] += 1
+                    buckets[i][2] += amount
+                    break
+                if buckets[i][0] < bucket:
+                    buckets.insert(i + 1, [bucket, 1, amount])
+                    break
+            else:
+                buckets.appendleft([bucket, 1, amount])
+        self.count += 1
+        self.amount += amount
+
+    def distinct_countries(self, oldest: int) -> int:
+        countries = self.countries
+        stale = [c for c, b in countries.items() if b < oldest]
+        for country in stale:
+            del countries[country]
+        return len(countries)
+
+
+class VelocityStore:
+    """In-process sliding-window counters per account
+
+    The window is split into fixed buckets (default 24 x 1h), so each account
+    holds at most window/bucket small entries no matter how many transactions
+    it makes, and the window slides by evicting whole buckets. Counts are
+    accurate to one bucket width at the trailing edge of the window; late
+    (out-of-order) events are counted against the newest window seen.
+
+    First-seen (account creation) times are kept apart from the windows, so
+    they survive eviction; they are only known once set_first_seen() is called.
+    """
+
+    def __init__(self, window_seconds: int = DAY_SECONDS, bucket_seconds: int = 3600):
+        if window_seconds % bucket_seconds:
+            raise ValueError("window_seconds must be a multiple of bucket_seconds")
+        self.window_seconds = window_seconds
+        self.bucket_seconds = bucket_seconds
+        self.n_buckets = window_seconds // bucket_seconds
+        self._accounts: Dict[str, _AccountWindow] = {}
+        self._first_seen: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._accounts)
+
+    def set_first_seen(self, account_id: str, timestamp: float) -> None:
+        """Record when an account was created (the earliest time given wins)"""
+        with self._lock:
+            current = self._first_seen.get(account_id)
+            if current is None or timestamp < current:
+                self._first_seen[account_id] = timestamp
+
+    def update(
+        self,
+        account_id: str,
+        timestamp: float,
+        amount: float = 0.0,
+        country: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Record a transaction and return the account's window features (including it)"""
+        bucket = int(timestamp // self.bucket_seconds)
+
+        with self._lock:
+            window = self._accounts.get(account_id)
+            if window is None:
+                window = self._accounts[account_id] = _AccountWindow()
+
+            # Late events do not move the window back
+            newest = max(bucket, window.buckets[-1][0]) if window.buckets else bucket
+            oldest = newest - self.n_buckets + 1
+            window.evict(oldest)
+            if bucket >= oldest:
+                window.add(bucket, amount)
+            if country is not None and window.countries.get(country, oldest - 1) < bucket:
+                window.countries[country] = bucket
+            return self._features(window, oldest, self._first_seen.get(account_id))
+
+    def features(self, account_id: str, timestamp: float) -> Dict[str, Any]:
+        """Window features for an account at a point in time, without recording anything"""
+        bucket = int(timestamp // self.bucket_seconds)
+        oldest = bucket - self.n_buckets + 1
+        with self._lock:
+            window = self._accounts.get(account_id)
+            first_seen = self._first_seen.get(account_id)
+            if window is None:
+                return {'count': 0, 'amount': 0.0, 'countries': 0, 'first_seen': first_seen}
+            window.evict(oldest)
+            return self._features(window, oldest, first_seen)
+
+    @staticmethod
+    def _features(
+        window: _AccountWindow, oldest: int, first_seen: Optional[float]
+    ) -> Dict[str, Any]:
+        return {
+            'count': window.count,
+            'amount': window.amount,
+            'countries': window.distinct_countries(oldest),
+            'first_seen': first_seen,
+        }
+
+    def evict_idle(self, now: Optional[float] = None) -> int:
+        """Drop accounts with no transactions in the window; returns how many were dropped
+
+        First-seen times are kept, so account age is unaffected.
+        """
+        now = time.time() if now is None else now
+        oldest = int(now // self.bucket_seconds) - self.n_buckets + 1
+        with self._lock:
+            idle = [
+                account_id for account_id, window in self._accounts.items()
+                if not window.buckets or window.buckets[-1][0] < oldest
+            ]
+            for account_id in idle:
+                del self._accounts[account_id]
+        return len(idle)
+
+
+class LocalKV:
+    """Minimal in-process stand-in for the Redis hash commands KVVelocityStore uses
+
+    Lets the shared-store code path run on one node (and in development)
+    without a Redis server; a redis.Redis client can be passed instead.
+    """
+
+    def __init__(self):
+        self._data: Dict[str, Dict[str, Any]] = {}
+        self._expiry: Dict[str, float] = {}
+        self._lock = threading.RLock()
+
+    def _hash(self, key: str, create: bool = False) -> Optional[Dict[str, Any]]:
+        expires = self._expiry.get(key)
+        if expires is not None and expires <= time.time():
+            self._data.pop(key, None)
+            self._expiry.pop(key, None)
+        if create:
+            return self._data.setdefault(key, {})
+        return self._data.get(key)
+
+    def hincrby(self, key: str, field: str, amount: int = 1) -> int:
+        with self._lock:
+            h = self._hash(key, create=True)
+            h[field] = int(h.get(field, 0)) + amount
+            return h[field]
+
+    def hincrbyfloat(self, key: str, field: str, amount: float = 1.0) -> float:
+        with self._lock:
+            h = self._hash(key, create=True)
+            h[field] = float(h.get(field, 0)) + amount
+            return h[field]
+
+    def hset(self, key: str, field: str, value: Any) -> int:
+        with self._lock:
+            h = self._hash(key, create=True)
+            new = field not in h
+            h[field] = value
+            return int(new)
+
+    def hsetnx(self, key: str, field: str, value: Any) -> int:
+        with self._lock:
+            h = self._hash(key, create=True)
+            if field in h:
+                return 0
+            h[field] = value
+            return 1
+
+    def hget(self, key: str, field: str) -> Any:
+        with self._lock:
+            return (self._hash(key) or {}).get(field)
+
+    def hgetall(self, key: str) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._hash(key) or {})
+
+    def hdel(self, key: str, *fields: str) -> int:
+        with self._lock:
+            h = self._hash(key) or {}
+            return sum(h.pop(field, None) is not None for field in fields)
+
+    def expire(self, key: str, seconds: int) -> bool:
+        with self._lock:
+            if self._hash(key) is None:
+                return False
+            self._expiry[key] = time.time() + seconds
+            return True
+
+    def delete(self, *keys: str) -> int:
+        with self._lock:
+            self._expiry.update((k, 0) for k in keys if k in self._expiry)
+            return sum(self._data.pop(k, None) is not None for k in keys)
+
+    def pipeline(self, transaction: bool = True) -> 'LocalPipeline':
+        return LocalPipeline(self)
+
+
+class LocalPipeline:
+    """Queued LocalKV commands run together by execute(), like a Redis MULTI/EXEC"""
+
+    def __init__(self, kv: LocalKV):
+        self._kv = kv
+        self._commands: List[Tuple[str, tuple]] = []
+
+    def __getattr__(self, name: str) -> Callable[..., 'LocalPipeline']:
+        getattr(self._kv, name)  # AttributeError for commands LocalKV lacks
+
+        def queue(*args: Any) -> 'LocalPipeline':
+            self._commands.append((name, args))
+            return self
+        return queue
+
+    def execute(self) -> List[Any]:
+        with self._kv._lock:
+            results = [getattr(self._kv, name)(*args) for name, args in self._commands]
+        self._commands = []
+        return results
+
+
+class KVVelocityStore:
+    """Sliding-window counters kept in a shared Redis-like hash per account
+
+    Same interface and bucketing as VelocityStore, but state lives in the
+    key-value store (redis.Redis or LocalKV), so several API nodes see the same
+    counters. Each account is one hash: c:<bucket> counts, a:<bucket> amount
+    sums and k:<bucket>:<country> flags; keys expire after the window when an
+    account goes idle. Country flags are only ever added, so a late event
+    cannot move a country's last bucket back. First-seen times live in one
+    separate hash (first_seen_key, field per account) that never expires. An
+    update is one MULTI/EXEC pipeline (one round-trip) that also reads back.
+    """
+
+    def __init__(
+        self,
+        client: Any = None,
+        window_seconds: int = DAY_SECONDS,
+        bucket_seconds: int = 3600,
+        prefix: str = "velocity:",
+        first_seen_key: str = "velocity-first-seen"
+    ):
+        if window_seconds % bucket_seconds:
+            raise ValueError("window_seconds must be a multiple of bucket_seconds")
+        self.client = client if client is not None else LocalKV()
+        self.window_seconds = window_seconds
+        self.bucket_seconds = bucket_seconds
+        self.n_buckets = window_seconds // bucket_seconds
+        self.prefix = prefix
+        self.first_seen_key = first_seen_key
+
+    def set_first_seen(self, account_id: str, timestamp: float) -> None:
+        """Record when an account was created (the earliest time given wins)
+
+        Check-then-set: concurrent writers race, but they write the same
+        creation time for an account, so the outcome does not depend on order.
+        """
+        current = self.client.hget(self.first_seen_key, account_id)
+        if current is None or timestamp < float(current):
+            self.client.hset(self.first_seen_key, account_id, timestamp)
+
+    def update(
+        self,
+        account_id: str,
+        timestamp: float,
+        amount: float = 0.0,
+        country: Optional[str] = None
+    ) -> Dict[str, Any]:
+        key = self.prefix + account_id
+        bucket = int(timestamp // self.bucket_seconds)
+        pipe = self.client.pipeline(transaction=True)
+        pipe.hincrby(key, f"c:{bucket}", 1)
+        pipe.hincrbyfloat(key, f"a:{bucket}", amount)
+        if country is not None:
+            pipe.hset(key, f"k:{bucket}:{country}", 1)
+        pipe.expire(key, self.window_seconds + self.bucket_seconds)
+        pipe.hgetall(key)
+        pipe.hget(self.first_seen_key, account_id)
+        stored, first_seen = pipe.execute()[-2:]
+        return self._features(key, stored, timestamp, first_seen)
+
+    def features(self, account_id: str, timestamp: float) -> Dict[str, Any]:
+        key = self.prefix + account_id
+        pipe = self.client.pipeline(transaction=False)
+        pipe.hgetall(key)
+        pipe.hget(self.first_seen_key, account_id)
+        stored, first_seen = pipe.execute()
+        return self._features(key, stored, timestamp, first_seen)
+
+    def _features(
+        self, key: str, stored: Dict[Any, Any], timestamp: float, first_seen: Any
+    ) -> Dict[str, Any]:
+        """Window totals from an account's hash, deleting buckets that fell out of it"""
+        entries = []
+        stale = []
+        for field, value in stored.items():
+            if isinstance(field, bytes):
+                field, value = field.decode(), value.decode()
+            kind, _, rest = field.partition(":")
+            bucket, _, country = rest.partition(":")
+            try:
+                entries.append((field, kind, int(bucket), country, value))
+            except ValueError:
+                stale.append(field)  # Not a field this layout writes
+
+        # Late events do not move the window back
+        newest = max(
+            [int(timestamp // self.bucket_seconds)]
+            + [entry[2] for entry in entries if entry[1] == "c"]
+        )
+        oldest = newest - self.n_buckets + 1
+        count, amount, countries = 0, 0.0, set()
+        for field, kind, bucket, country, value in entries:
+            if bucket < oldest:
+                stale.append(field)
+            elif kind == "c":
+                count += int(value)
+            elif kind == "a":
+                amount += float(value)
+            elif kind == "k":
+                countries.add(country)
+
+        if stale:
+            self.client.hdel(key, *stale)
+        if isinstance(first_seen, bytes):
+            first_seen = first_seen.decode()
+        return {
+            'count': count,
+            'amount': amount,
+            'countries': len(countries),
+            'first_seen': float(first_seen) if first_seen is not None else None,
+        }
+
+
+class FeatureEnricher:
+    """Fill per-account velocity features on records before rule evaluation
+
+    For each record with an account id, the transaction is added to the
+    account's sliding window and these fields are set (unless the record
+    already has them, or overwrite=True):
+        transaction_velocity_<w>h  transactions in the window, including this one
+        amount_sum_<w>h            transaction_amount total over the window
+        distinct_countries_<w>h    distinct transaction_country values in the window
+        account_age_days           whole days since the account was created
+
+    account_age_days is only set when the creation time is known: from the
+    record's account_created_field, or an earlier set_first_seen() on the
+    store. Transactions seen in the window say nothing about account age.
+    """
+
+    def __init__(
+        self,
+        store: Any = None,
+        account_field: str = 'account_id',
+        timestamp_field: str = 'timestamp',
+        amount_field: str = 'transaction_amount',
+        country_field: str = 'transaction_country',
+        account_created_field: Optional[str] = 'account_created_at',
+        overwrite: bool = False,
+        evict_every: int = 100000
+    ):
+        """
+        Args:
+            store: VelocityStore (default) or KVVelocityStore
+            account_field: Record field identifying the account
+            timestamp_field: Record field with the transaction time (now if missing)
+            amount_field: Record field summed over the window
+            country_field: Record field counted distinctly over the window
+            account_created_field: Record field with the account creation time
+            overwrite: Replace feature values already present on the record
+            evict_every: Drop idle accounts from the store every N updates
+        """
+        self.store = store if store is not None else VelocityStore()
+        self.account_field = account_field
+        self.timestamp_field = timestamp_field
+        self.amount_field = amount_field
+        self.country_field = country_field
+        self.account_created_field = account_created_field
+        self.overwrite = overwrite
+        self.evict_every = evict_every
+        self._updates = 0
+
+        hours = self.store.window_seconds // 3600
+        self.fields: Tuple[str, ...] = (
+            f'transaction_velocity_{hours}h',
+            f'amount_sum_{hours}h',
+            f'distinct_countries_{hours}h',
+            'account_age_days',
+        )
+
+    def enrich(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        """Record the transaction and return a copy of the record with features added"""
+        account_id = record.get(self.account_field)
+        if account_id is None:
+            return record
+
+        timestamp = to_epoch(record.get(self.timestamp_field))
+        if timestamp is None:
+            timestamp = time.time()
+        amount = record.get(self.amount_field)
+        try:
+            amount = float(amount) if amount is not None else 0.0
+        except (TypeError, ValueError):
+            amount = 0.0
+        country = record.get(self.country_field)
+        account_id = str(account_id)
+
+        if self.account_created_field is not None:
+            created = to_epoch(record.get(self.account_created_field))
+            if created is not None:
+                self.store.set_first_seen(account_id, created)
+
+        stats = self.store.update(account_id, timestamp, amount, country)
+        self._updates += 1
+        if self._updates % self.evict_every == 0 and hasattr(self.store, 'evict_idle'):
+            self.store.evict_idle(timestamp)
+        first_seen = stats['first_seen']
+        values = (
+            stats['count'],
+            round(stats['amount'], 2),
+            stats['countries'],
+            int((timestamp - first_seen) // DAY_SECONDS)
+            if first_seen is not None and timestamp >= first_seen else None,
+        )
+
+        enriched = dict(record)
+        for field, value in zip(self.fields, values):
+            if value is None:
+                continue
+            if self.overwrite or enriched.get(field) is None:
+                enriched[field] = value
+        return enriched
+
+    def enrich_batch(self, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Enrich records in order (earlier records count towards later ones)"""
+        return [self.enrich(record) for record in records]
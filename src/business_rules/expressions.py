@@ -0,0 +1,336 @@
+import ast
+import operator
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+# Scalar semantics: a missing (None) operand makes the result None, which a
+# condition treats like a missing field (False). Division by zero is None too.
+BINARY_OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+}
+
+COMPARE_OPERATORS = {
+    ast.Gt: operator.gt,
+    ast.Lt: operator.lt,
+    ast.GtE: operator.ge,
+    ast.LtE: operator.le,
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+    ast.In: lambda a, b: a in b,
+    ast.NotIn: lambda a, b: a not in b,
+}
+
+FUNCTIONS: Dict[str, Callable] = {
+    'abs': abs,
+    'min': min,
+    'max': max,
+    'round': round,
+    'len': len,
+    'lower': lambda s: s.lower(),
+    'upper': lambda s: s.upper(),
+}
+
+# Functions with an equivalent column-wise implementation
+COLUMN_FUNCTIONS: Dict[str, Callable] = {
+    'abs': lambda s: s.abs() if hasattr(s, 'abs') else abs(s),
+    'round': lambda s, n=0: s.round(n) if hasattr(s, 'round') else round(s, n),
+}
+
+_DIVISIONS = (ast.Div, ast.FloorDiv, ast.Mod)
+
+
+class Expression:
+    """A safe arithmetic/comparison expression over record fields
+
+    Only literals, field names, arithmetic (+ - * / // %), comparisons,
+    and/or/not, conditional expressions and a few functions (abs, min, max,
+    round, len, lower, upper) are allowed; the expression is compiled once into
+    nested closures, so evaluating it never goes through eval().
+    """
+
+    def __init__(self, source: str):
+        self.source = source
+        try:
+            tree = ast.parse(str(source).strip(), mode='eval')
+        except SyntaxError as e:
+            raise ValueError(f"Invalid expression '{source}': {e.msg}")
+        self.names: List[str] = []
+        self._scalar = self._compile(tree.body)
+        # Column-wise evaluation only for plain arithmetic; anything else runs per row
+        self.vectorizable = self._arithmetic(tree.body)
+        self._tree = tree.body
+
+    def __repr__(self) -> str:
+        return f"Expression({self.source!r})"
+
+    def _arithmetic(self, node: ast.AST) -> bool:
+        if isinstance(node, (ast.Name, ast.Constant)):
+            return not isinstance(getattr(node, 'value', 0), str)
+        if isinstance(node, ast.BinOp):
+            return self._arithmetic(node.left) and self._arithmetic(node.right)
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)):
+            return self._arithmetic(node.operand)
+        if isinstance(node, ast.Call) and node.func.id in COLUMN_FUNCTIONS:
+            return all(self._arithmetic(a) for a in node.args)
+        return False
+
+    def _compile(self, node: ast.AST) -> Callable[[Callable[[str], Any]], Any]:
+        if isinstance(node, ast.Constant):
+            if not isinstance(node.value, (int, float, str, bool, type(None))):
+                raise ValueError(f"Unsupported literal in '{self.source}'")
+            value = node.value
+            return lambda get: value
+
+        if isinstance(node, ast.Name):
+            name = node.id
+            if name not in self.names:
+                self.names.append(name)
+            return lambda get: get(name)
+
+        if isinstance(node, (ast.List, ast.Tuple)):
+            items = [self._compile(e) for e in node.elts]
+            return lambda get: tuple(item(get) for item in items)
+
+        if isinstance(node, ast.BinOp) and type(node.op) in BINARY_OPERATORS:
+            op = BINARY_OPERATORS[type(node.op)]
+            left, right = self._compile(node.left), self._compile(node.right)
+
+            def binary(get):
+                a = left(get)
+                if a is None:
+                    return None
+                b = right(get)
+                if b is None:
+                    return None
+                try:
+                    return op(a, b)
+                except ZeroDivisionError:
+                    return None
+            return binary
+
+        if isinstance(node, ast.UnaryOp):
+            operand = self._compile(node.operand)
+            if isinstance(node.op, ast.USub):
+                return lambda get: None if (v := operand(get)) is None else -v
+            if isinstance(node.op, ast.UAdd):
+                return operand
+            if isinstance(node.op, ast.Not):
+                return lambda get: None if (v := operand(get)) is None else not v
+
+        if isinstance(node, ast.Compare):
+            operands = [self._compile(node.left)] + [self._compile(c) for c in node.comparators]
+            ops = []
+            for op in node.ops:
+                if type(op) not in COMPARE_OPERATORS:
+                    raise ValueError(f"Unsupported comparison in '{self.source}'")
+                ops.append(COMPARE_OPERATORS[type(op)])
+
+            def compare(get):
+                a = operands[0](get)
+                if a is None:
+                    return None
+                for op, operand in zip(ops, operands[1:]):
+                    b = operand(get)
+                    if b is None:
+                        return None
+                    if not op(a, b):
+                        return False
+                    a = b
+                return True
+            return compare
+
+        if isinstance(node, ast.BoolOp):
+            values = [self._compile(v) for v in node.values]
+            is_and = isinstance(node.op, ast.And)
+
+            def boolean(get):
+                for value in values:
+                    v = value(get)
+                    if v is None:
+                        return None
+                    if bool(v) != is_and:
+                        return not is_and
+                return is_and
+            return boolean
+
+        if isinstance(node, ast.IfExp):
+            test, body, orelse = (self._compile(n) for n in (node.test, node.body, node.orelse))
+
+            def conditional(get):
+                t = test(get)
+                if t is None:
+                    return None
+                return body(get) if t else orelse(get)
+            return conditional
+
+        if (isinstance(node, ast.Call) and isinstance(node.func, ast.Name)
+                and node.func.id in FUNCTIONS and not node.keywords):
+            func = FUNCTIONS[node.func.id]
+            args = [self._compile(a) for a in node.args]
+
+            def call(get):
+                values = [arg(get) for arg in args]
+                if any(v is None for v in values):
+                    return None
+                return func(*values)
+            return call
+
+        raise ValueError(f"Unsupported syntax in expression '{self.source}': {type(node).__name__}")
+
+    def evaluate(self, get: Callable[[str], Any]) -> Any:
+        """Evaluate for one record; get(name) returns a field's value (None if missing)"""
+        return self._scalar(get)
+
+    def evaluate_columns(self, column: Callable[[str], Any], n: int) -> Any:
+        """Evaluate over a DataFrame; column(name) returns a Series (missing values as NaN/None)
+
+        Returns a Series of length n; missing results are NaN/None, like missing fields.
+        """
+        import pandas as pd
+
+        if self.vectorizable:
+            try:
+                result = self._columns(self._tree, column)
+                if isinstance(result, pd.Series):
+                    return result
+            except TypeError:
+                pass
+
+        columns = {name: column(name) for name in self.names}
+        values = {
+            name: [None if pd.isna(v) else v for v in col.to_numpy(dtype=object)]
+            if isinstance(col, pd.Series) else [col] * n
+            for name, col in ((k, v) for k, v in columns.items())
+        }
+        results = [self._scalar(lambda name: values[name][i]) for i in range(n)]
+        index = next((c.index for c in columns.values() if isinstance(c, pd.Series)), None)
+        return pd.Series(results, index=index, dtype=object)
+
+    def _columns(self, node: ast.AST, column: Callable[[str], Any]) -> Any:
+        if isinstance(node, ast.Constant):
+            return node.value
+        if isinstance(node, ast.Name):
+            return column(node.id)
+        if isinstance(node, ast.UnaryOp):
+            value = self._columns(node.operand, column)
+            return -value if isinstance(node.op, ast.USub) else value
+        if isinstance(node, ast.Call):
+            return COLUMN_FUNCTIONS[node.func.id](*(self._columns(a, column) for a in node.args))
+
+        a = self._columns(node.left, column)
+        b = self._columns(node.right, column)
+        if isinstance(node.op, _DIVISIONS):
+            if hasattr(b, 'where'):
+                b = b.where(b != 0)
+            elif b == 0:
+                b = float('nan')
+        return BINARY_OPERATORS[type(node.op)](a, b)
+
+
+class DerivedFields:
+    """Named expressions from a config's 'derived_fields' section
+
+    Accepts `name: "expression"` or `name: {expression: "...", description: ...}`.
+    Derived fields may reference record fields and other derived fields (cycles
+    are rejected at load time).
+    """
+
+    def __init__(self, definitions: Optional[Dict[str, Any]] = None):
+        self.expressions: Dict[str, Expression] = {}
+        for name, spec in (definitions or {}).items():
+            source = spec.get('expression') if isinstance(spec, dict) else spec
+            if source is None:
+                raise ValueError(f"Derived field '{name}' has no expression")
+            try:
+                self.expressions[name] = Expression(source)
+            except ValueError as e:
+                raise ValueError(f"Derived field '{name}': {e}")
+        self._check_cycles()
+        self.signatures = {name: self._signature(name) for name in self.expressions}
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> 'DerivedFields':
+        return cls(config.get('derived_fields'))
+
+    def __bool__(self) -> bool:
+        return bool(self.expressions)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.expressions
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.expressions)
+
+    def _check_cycles(self) -> None:
+        visiting, done = set(), set()
+
+        def visit(name: str, path: Tuple[str, ...]) -> None:
+            if name in done or name not in self.expressions:
+                return
+            if name in visiting:
+                raise ValueError(f"Derived fields form a cycle: {' -> '.join(path + (name,))}")
+            visiting.add(name)
+            for dep in self.expressions[name].names:
+                visit(dep, path + (name,))
+            visiting.discard(name)
+            done.add(name)
+
+        for name in self.expressions:
+            visit(name, ())
+
+    def _signature(self, name: str) -> Tuple:
+        """Identity of a derived field including the definitions it depends on"""
+        expression = self.expressions[name]
+        return (expression.source,) + tuple(
+            (dep, self._signature(dep)) for dep in expression.names if dep in self.expressions
+        )
+
+    def signature(self, field: Optional[str]) -> Optional[Tuple]:
+        return self.signatures.get(field)
+
+    def dependencies(self, name: str) -> List[str]:
+        """Record fields (not derived ones) a derived field reads, directly or indirectly"""
+        fields: List[str] = []
+        for dep in self.expressions[name].names:
+            for field in (self.dependencies(dep) if dep in self.expressions else [dep]):
+                if field not in fields:
+                    fields.append(field)
+        return fields
+
+
+class RecordView:
+    """Read-only view of a record that computes derived fields on first access
+
+    Each derived value is computed at most once per record and shared by every
+    condition (and rule) that reads it. Record fields take precedence over
+    derived fields of the same name, unless they are missing or None.
+    """
+
+    __slots__ = ('record', 'derived', 'memo')
+
+    def __init__(self, record: Dict[str, Any], derived: DerivedFields):
+        self.record = record
+        self.derived = derived
+        self.memo: Dict[str, Any] = {}
+
+    def get(self, field: str, default: Any = None) -> Any:
+        value = self.record.get(field)
+        if value is None and field in self.derived.expressions:
+            memo = self.memo
+            if field in memo:
+                value = memo[field]
+            else:
+                value = memo[field] = self.derived.expressions[field].evaluate(self.get)
+        return default if value is None else value
+
+    def __getitem__(self, field: str) -> Any:
+        if field in self.derived.expressions:
+            return self.get(field)
+        return self.record[field]
+
+    def __contains__(self, field: str) -> bool:
+        return field in self.record or field in self.derived.expressions
@@ -0,0 +1,175 @@
+import copy
+from typing import Any, Dict, List, Optional
+import numpy as np
+import pandas as pd
+from .vectorized import PredicateCache, VectorizedRuleSet
+
+# Config sections besides the rules that can change what any rule matches
+SETTINGS_KEYS = ('derived_fields', 'features')
+
+
+class IncrementalScorer:
+    """Re-score a stored dataset incrementally as rules are edited
+
+    Keeps the first-matching rule index of every record. Because evaluation is
+    first-match-wins, an edit at position p cannot change records whose first
+    match is before p, so only records matched at or after p are re-evaluated.
+    Condition masks are shared across edits through one PredicateCache.
+
+    The mutating methods mirror ConfigManager (add_rule, update_rule,
+    delete_rule, reorder_rules) and return the row positions whose matched rule
+    changed.
+    """
+
+    def __init__(self, df: pd.DataFrame, config: Dict[str, Any], base_dir: Optional[str] = None):
+        self.df = df
+        self.base_dir = base_dir
+        self.cache = PredicateCache(df)
+        self.config = copy.deepcopy(config)
+        self.rule_set = VectorizedRuleSet(self.config, self.base_dir)
+        self.first = self.rule_set.first_match(self.cache)
+        self.baseline_ids = self.matched_rule_ids()
+        self.rows_evaluated = len(df)
+
+    @property
+    def rules(self) -> List[dict]:
+        return self.config['rules']
+
+    def matched_rule_ids(self, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        ids = np.array(self.rule_set.rule_ids + [None], dtype=object)
+        first = self.first if rows is None else self.first[rows]
+        return ids[first]  # -1 (no match) maps to None
+
+    def results(self) -> pd.DataFrame:
+        """Current matched rule id, risk score and decision per record"""
+        result = self.rule_set.outcomes(self.first)
+        result.index = self.df.index
+        return result
+
+    def changed_since_baseline(self) -> np.ndarray:
+        """Row positions whose matched rule differs from the initial config"""
+        return np.flatnonzero(self.matched_rule_ids() != self.baseline_ids)
+
+    def _position(self, rule_id: str) -> Optional[int]:
+        return next((i for i, r in enumerate(self.rules) if r.get('id') == rule_id), None)
+
+    def _set_rules(self, rules: List[dict]) -> None:
+        self.config['rules'] = rules
+        self.rule_set = VectorizedRuleSet(self.config, self.base_dir)
+
+    def _rescore_from(self, rows: np.ndarray, start: int) -> None:
+        """Re-evaluate the given rows against rules[start:]"""
+        if len(rows):
+            self.first[rows] = self.rule_set.first_match(self.cache, rows=rows, start=start)
+            self.rows_evaluated += len(rows)
+
+    def _changed(self, rows: np.ndarray, before: np.ndarray) -> np.ndarray:
+        return rows[self.matched_rule_ids(rows) != before]
+
+    def update_rule(self, rule_id: str, updated_rule: Dict[str, Any]) -> np.ndarray:
+        """Replace a rule in place and re-score the affected records"""
+        p = self._position(rule_id)
+        if p is None:
+            raise KeyError(f"Rule {rule_id} not found")
+        return self._update_at(p, updated_rule)
+
+    def _update_at(self, p: int, updated_rule: Dict[str, Any]) -> np.ndarray:
+        rows = np.flatnonzero((self.first >= p) | (self.first < 0))
+        before = self.matched_rule_ids(rows)
+
+        rules = list(self.rules)
+        rules[p] = updated_rule
+        self._set_rules(rules)
+
+        matches = self.rule_set.rule_mask(updated_rule, self.cache)[rows]
+        was_p = self.first[rows] == p
+        self.rows_evaluated += len(rows)
+
+        # Records matched later now match the edited rule; records that matched the
+        # old rule and no longer match fall through to the rules after it
+        self.first[rows[matches]] = p
+        self._rescore_from(rows[was_p & ~matches], p + 1)
+        return self._changed(rows, before)
+
+    def add_rule(self, rule: Dict[str, Any], position: Optional[int] = None) -> np.ndarray:
+        """Insert a rule (default: before the DEFAULT rule) and re-score"""
+        if position is None:
+            position = next(
+                (i for i, r in enumerate(self.rules) if r.get('logic') == 'ALWAYS'), len(self.rules)
+            )
+
+        rows = np.flatnonzero((self.first >= position) | (self.first < 0))
+        before = self.matched_rule_ids(rows)
+
+        rules = list(self.rules)
+        rules.insert(position, rule)
+        self._set_rules(rules)
+
+        shifted = rows[self.first[rows] >= position]
+        self.first[shifted] += 1
+        matches = self.rule_set.rule_mask(rule, self.cache)[rows]
+        self.first[rows[matches]] = position
+        self.rows_evaluated += len(rows)
+        return self._changed(rows, before)
+
+    def delete_rule(self, rule_id: str) -> np.ndarray:
+        """Remove a rule and re-score the records it matched"""
+        p = self._position(rule_id)
+        if p is None:
+            raise KeyError(f"Rule {rule_id} not found")
+
+        rows = np.flatnonzero(self.first >= p)
+        before = self.matched_rule_ids(rows)
+        was_p = self.first[rows] == p
+
+        self._set_rules([r for i, r in enumerate(self.rules) if i != p])
+
+        self.first[rows[self.first[rows] > p]] -= 1
+        self._rescore_from(rows[was_p], p)
+        return self._changed(rows, before)
+
+    def reorder_rules(self, rule_ids: List[str]) -> np.ndarray:
+        """Reorder rules by id and re-score records matched at or after the first move"""
+        rule_map = {r.get('id'): r for r in self.rules}
+        rules = [rule_map[rid] for rid in rule_ids if rid in rule_map]
+        return self.sync({**self.config, 'rules': rules})
+
+    def sync(self, config: Dict[str, Any]) -> np.ndarray:
+        """Bring the scorer up to date with an arbitrarily edited config
+
+        Records whose first match is before the first differing rule position
+        are unaffected; everything else is re-evaluated from that position. An
+        edit to derived_fields or features can affect any rule, so it counts as
+        a change at position 0.
+        """
+        new_config = copy.deepcopy(config)
+        new_rules = new_config['rules']
+        old_rules = self.rules
+
+        settings_changed = any(
+            new_config.get(key) != self.config.get(key) for key in SETTINGS_KEYS
+        )
+        p = 0
+        if not settings_changed:
+            while p < min(len(old_rules), len(new_rules)) and old_rules[p] == new_rules[p]:
+                p += 1
+
+            if p == len(old_rules) == len(new_rules):
+                self.config = {**new_config, 'rules': old_rules}
+                return np.array([], dtype=np.int64)
+
+        # Rule sets are rebuilt from self.config, so it must hold the new settings first
+        self.config = {**new_config, 'rules': old_rules}
+
+        # A single in-place edit only needs the edited rule's mask
+        if (not settings_changed
+                and len(old_rules) == len(new_rules)
+                and old_rules[p + 1:] == new_rules[p + 1:]
+                and old_rules[p].get('id') == new_rules[p].get('id')):
+            return self._update_at(p, new_rules[p])
+
+        rows = np.flatnonzero((self.first >= p) | (self.first < 0))
+        before = self.matched_rule_ids(rows)
+        self._set_rules(new_rules)
+        self._rescore_from(rows, p)
+        return self._changed(rows, before)
@@ -0,0 +1,166 @@
+"""
+Compiled list files for large value_file blocklists
+
+A compiled list is a sorted array of 64-bit hashes of the entries, preceded by
+a small header:
+
+    magic      8 bytes   b"BRLIST01"
+    count      uint64    number of hashes
+    n_lengths  uint64    number of distinct entry lengths
+    lengths    uint32 * n_lengths, padded to a multiple of 8 bytes
+    hashes     uint64 * count, sorted ascending
+
+All integers are little-endian. The file is opened with mmap, so every worker
+process reading the same list shares one copy through the page cache, and a
+membership check is a binary search (O(log n)) with no parsing at load time.
+The entry lengths let the same file answer `prefix` conditions: a value is
+looked up once per distinct prefix length.
+
+Entries are hashed with 64-bit BLAKE2b; with a million entries the chance
+that a value not in the list collides with one that is is about 1 in 10^13.
+
+Update a list with compile_list(), which writes a temporary file and renames
+it over the old one; readers that already mapped the old file keep a valid
+view of it until they reload.
+
+    python -m business_rules.lists config/lists/blocked_bins.txt config/lists/blocked_bins.blist
+"""
+
+import argparse
+import bisect
+import hashlib
+import mmap
+import os
+import struct
+import sys
+from array import array
+from typing import Any, Iterable, List
+
+MAGIC = b"BRLIST01"
+_HEADER = struct.Struct("<8sQQ")
+
+
+def entry_hash(value: Any) -> int:
+    """64-bit hash of an entry's string form (stable across processes)"""
+    digest = hashlib.blake2b(str(value).encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little')
+
+
+def is_compiled_list(path: str) -> bool:
+    """True if the file starts with the compiled list magic"""
+    with open(path, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def write_list(entries: Iterable[Any], dest: str) -> int:
+    """Write entries as a compiled list, atomically replacing dest; returns the entry count"""
+    entries = [str(e) for e in entries]
+    hashes = array('Q', sorted({entry_hash(e) for e in entries}))
+    lengths = array('I', sorted({len(e) for e in entries}))
+    if sys.byteorder != 'little':
+        hashes.byteswap()
+        lengths.byteswap()
+
+    tmp = f"{dest}.tmp.{os.getpid()}"
+    with open(tmp, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, len(hashes), len(lengths)))
+        f.write(lengths.tobytes())
+        f.write(b"\0" * (-(len(lengths) * 4) % 8))
+        f.write(hashes.tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, dest)
+    return len(hashes)
+
+
+def compile_list(source: str, dest: str) -> int:
+    """Compile a text list (one entry per line, # comments) into dest"""
+    from .operators import read_list_file
+    return write_list(read_list_file(source), dest)
+
+
+class MappedList:
+    """Read-only, memory-mapped view of a compiled list file
+
+    Supports `value in lst` (exact match of the value's string form) and
+    has_prefix(value) for prefix lists.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < _HEADER.size:
+                raise ValueError(f"Not a compiled list file: {path}")
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, count, n_lengths = _HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise ValueError(f"Not a compiled list file: {path}")
+        offset = _HEADER.size
+        lengths = array('I', self._mmap[offset:offset + 4 * n_lengths])
+        offset += 4 * n_lengths + (-(4 * n_lengths) % 8)
+        if offset + 8 * count != size:
+            raise ValueError(f"Truncated compiled list file: {path}")
+        self._offset = offset
+        self._count = count
+
+        if sys.byteorder == 'little':
+            self._hashes = memoryview(self._mmap)[offset:offset + 8 * count].cast('Q')
+        else:
+            # Big-endian hosts get a private, byte-swapped copy
+            lengths.byteswap()
+            self._hashes = array('Q', self._mmap[offset:offset + 8 * count])
+            self._hashes.byteswap()
+        self.lengths: List[int] = list(lengths)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _has_hash(self, h: int) -> bool:
+        hashes = self._hashes
+        i = bisect.bisect_left(hashes, h)
+        return i < self._count and hashes[i] == h
+
+    def __contains__(self, value: Any) -> bool:
+        return self._has_hash(entry_hash(value))
+
+    def has_prefix(self, value: Any) -> bool:
+        """True if some entry is a prefix of the value's string form"""
+        value = str(value)
+        n = len(value)
+        for length in self.lengths:
+            if length > n:
+                break
+            if self._has_hash(entry_hash(value[:length])):
+                return True
+        return False
+
+    def contains_many(self, values: Iterable[Any]) -> Any:
+        """Boolean numpy array: membership of each value (one searchsorted call)"""
+        import numpy as np
+
+        values = list(values)
+        memo = {}
+        hashes = np.fromiter(
+            (memo[v] if v in memo else memo.setdefault(v, entry_hash(v)) for v in values),
+            dtype=np.uint64, count=len(values)
+        )
+        table = np.frombuffer(self._mmap, dtype='<u8', count=self._count, offset=self._offset)
+        if len(table) == 0:
+            return np.zeros(len(values), dtype=bool)
+        i = np.searchsorted(table, hashes)
+        return table[np.minimum(i, len(table) - 1)] == hashes
+
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description="Compile a text list file for value_file conditions")
+    parser.add_argument("source", help="Text list, one entry per line")
+    parser.add_argument("dest", help="Compiled list to write (replaced atomically)")
+    args = parser.parse_args(argv)
+    count = compile_list(args.source, args.dest)
+    print(f"Wrote {count} entries to {args.dest}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,75 +1,182 @@
-import anthropic
 import json
-from .models import RuleResult, LLMExplanation, Confidence
+from typing import Iterable, Optional
+from .models import RuleResult, LLMExplanation, Confidence, PromptUsage
 
-class LLMExplainer:
-    def __init__(self, api_key: str = None):
-        self.client = anthropic.Anthropic(api_key=api_key)
-        self.model = "claude-sonnet-4-20250514"
-
-    def generate_explanation(
-        self, 
-        record: dict, 
-        rule_result: RuleResult
-    ) -> LLMExplanation:
-        """Generate human-readable explanation for a decision"""
-        
-        prompt = f"""You are a fraud analyst assistant. Your job is to explain 
+# Static instructions are sent as the system prompt so they are identical on every
+# call and can be served from Anthropic's prompt cache.
+SYSTEM_PROMPT = """You are a fraud analyst assistant. Your job is to explain
 fraud detection decisions to human reviewers in clear, professional language.
 
-IMPORTANT: You do NOT make decisions. The decision has already been made by 
+IMPORTANT: You do NOT make decisions. The decision has already been made by
 deterministic rules. You only EXPLAIN the decision.
 
-## Transaction Data
-```json
-{json.dumps(record, indent=2, default=str)}
-```
-
-## Rule Engine Decision
-- Rule Matched: {rule_result.matched_rule_name} ({rule_result.matched_rule_id})
-- Risk Score: {rule_result.risk_score}/100
-- Decision: {rule_result.decision.value}
-- Rule Reason: {rule_result.rule_reason}
+You will receive one or more transactions. Each transaction contains the
+transaction fields relevant to the decision ("data") and the rule engine
+decision ("rule": matched rule name and id, risk score 0-100, decision, reason
+and, when known, the rule's logic and conditions).
 
-## Your Task
-1. Explain this decision in 2-3 sentences a non-technical reviewer can understand
+For each transaction:
+1. Explain the decision in 2-3 sentences a non-technical reviewer can understand
 2. Assess your confidence in the EXPLANATION (not the decision):
    - HIGH: The rule clearly applies, explanation is straightforward
    - MEDIUM: Some ambiguity in the data or edge case
    - LOW: Missing data, conflicting signals, or unusual pattern
-3. If confidence is MEDIUM or LOW, suggest 1-3 clarifying questions 
+3. If confidence is MEDIUM or LOW, suggest 1-3 clarifying questions
    that a human reviewer should investigate
 
-Respond in this exact JSON format:
-{{
+Respond with a JSON array containing exactly one object per transaction, in the
+same order as the input, each in this exact format:
+{
     "human_readable_explanation": "string",
     "confidence": "HIGH" | "MEDIUM" | "LOW",
     "needs_human_review": boolean,
     "clarifying_questions": ["string"] or [],
     "additional_context": "string or null"
-}}"""
+}"""
+
+# Fields always sent to the LLM, in addition to those referenced by the matched rule
+DEFAULT_FIELD_ALLOWLIST = ("transaction_id", "transaction_amount", "merchant_category")
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate for Claude models (~4 characters per token)"""
+    return max(1, (len(text) + 3) // 4)
+
+
+def _sum_usage(total: Optional[PromptUsage], usage: Optional[PromptUsage]) -> Optional[PromptUsage]:
+    """Usage of two requests combined (token counts the API did not report stay None)"""
+    if total is None or usage is None:
+        return usage or total
+
+    def add(a: Optional[int], b: Optional[int]) -> Optional[int]:
+        return None if a is None and b is None else (a or 0) + (b or 0)
+
+    return PromptUsage(
+        records=total.records + usage.records,
+        estimated_input_tokens=total.estimated_input_tokens + usage.estimated_input_tokens,
+        input_tokens=add(total.input_tokens, usage.input_tokens),
+        output_tokens=add(total.output_tokens, usage.output_tokens),
+        cache_read_input_tokens=add(total.cache_read_input_tokens, usage.cache_read_input_tokens),
+    )
+
+
+class LLMExplainer:
+    def __init__(
+        self,
+        api_key: str = None,
+        rules: Optional[list[dict]] = None,
+        field_allowlist: Iterable[str] = DEFAULT_FIELD_ALLOWLIST,
+        batch_size: int = 5,
+    ):
+        """
+        Args:
+            api_key: Anthropic API key (defaults to ANTHROPIC_API_KEY)
+            rules: Rules from the config (config['rules']). When given, only fields
+                referenced by the matched rule (plus field_allowlist) are sent.
+            field_allowlist: Fields always included in the prompt payload
+            batch_size: Transactions per request in generate_batch
+        """
+        import anthropic  # Deferred: the SDK and its HTTP stack are slow to import
+        self.client = anthropic.Anthropic(api_key=api_key)
+        self.model = "claude-sonnet-4-20250514"
+        self.field_allowlist = tuple(field_allowlist)
+        self.batch_size = batch_size
+        self.rule_fields = {}
+        self.rule_conditions = {}
+        if rules is not None:
+            self.set_rules(rules)
+        self.last_usage: Optional[PromptUsage] = None
+
+    def set_rules(self, rules: list[dict]) -> None:
+        """Index each rule's referenced fields (payload filtering) and conditions"""
+        self.rule_conditions = {
+            rule['id']: {'logic': rule.get('logic', 'AND'), 'conditions': rule['conditions']}
+            for rule in rules if rule.get('conditions')
+        }
+        self.rule_fields = {
+            rule['id']: tuple(dict.fromkeys(
+                f for c in rule.get('conditions', [])
+                for f in (c.get('field'), c.get('value_field')) if f is not None
+            ))
+            for rule in rules
+        }
+
+    def filter_record(self, record: dict, rule_result: RuleResult) -> dict:
+        """Keep only fields referenced by the matched rule plus the allowlist
+
+        If the matched rule is unknown (no rules configured), the full record is kept.
+        """
+        rule_fields = self.rule_fields.get(rule_result.matched_rule_id)
+        if rule_fields is None:
+            return dict(record)
+
+        fields = dict.fromkeys(self.field_allowlist + rule_fields)
+        return {f: record[f] for f in fields if f in record}
+
+    def build_prompt(self, records: list[dict], rule_results: list[RuleResult]) -> str:
+        """Build the compact user prompt for one or more transactions"""
+        items = []
+        for record, result in zip(records, rule_results):
+            rule = {
+                "matched": f"{result.matched_rule_name} ({result.matched_rule_id})",
+                "risk_score": result.risk_score,
+                "decision": result.decision.value,
+                "reason": result.rule_reason,
+            }
+            # Only the matched rule's conditions: the rest of the config adds no context
+            rule.update(self.rule_conditions.get(result.matched_rule_id, {}))
+            items.append({"data": self.filter_record(record, result), "rule": rule})
+        return json.dumps(items, separators=(',', ':'), default=str)
+
+    def estimate_prompt_tokens(self, records: list[dict], rule_results: list[RuleResult]) -> int:
+        """Estimated input tokens (system + user prompt) for a request"""
+        return estimate_tokens(SYSTEM_PROMPT) + estimate_tokens(
+            self.build_prompt(records, rule_results)
+        )
+
+    def _request(self, records: list[dict], rule_results: list[RuleResult]) -> list[dict]:
+        """Send one request and return the parsed explanation objects"""
+        prompt = self.build_prompt(records, rule_results)
 
         response = self.client.messages.create(
             model=self.model,
-            max_tokens=500,
+            max_tokens=500 * len(records),
+            system=[{
+                "type": "text",
+                "text": SYSTEM_PROMPT,
+                "cache_control": {"type": "ephemeral"},
+            }],
             messages=[{"role": "user", "content": prompt}]
         )
-        
+
+        usage = getattr(response, 'usage', None)
+        self.last_usage = PromptUsage(
+            records=len(records),
+            estimated_input_tokens=estimate_tokens(SYSTEM_PROMPT) + estimate_tokens(prompt),
+            input_tokens=getattr(usage, 'input_tokens', None),
+            output_tokens=getattr(usage, 'output_tokens', None),
+            cache_read_input_tokens=getattr(usage, 'cache_read_input_tokens', None),
+        )
+
         # Parse structured output
         response_text = response.content[0].text
-        
+
         # Handle potential markdown code blocks
         if "```json" in response_text:
             response_text = response_text.split("```json")[1].split("```")[0]
         elif "```" in response_text:
             response_text = response_text.split("```")[1].split("```")[0]
-        
+
         parsed = json.loads(response_text.strip())
-        
+        if isinstance(parsed, dict):
+            parsed = [parsed]
+        return parsed
+
+    def _to_explanation(self, parsed: dict) -> LLMExplanation:
         # Apply confidence threshold for human review
         confidence = Confidence(parsed['confidence'])
         needs_review = confidence in [Confidence.LOW, Confidence.MEDIUM]
-        
+
         return LLMExplanation(
             human_readable_explanation=parsed['human_readable_explanation'],
             confidence=confidence,
@@ -78,13 +185,45 @@ Respond in this exact JSON format:
             additional_context=parsed.get('additional_context')
         )
 
+    def generate_explanation(
+        self,
+        record: dict,
+        rule_result: RuleResult
+    ) -> LLMExplanation:
+        """Generate human-readable explanation for a decision"""
+        parsed = self._request([record], [rule_result])
+        return self._to_explanation(parsed[0])
+
     def generate_batch(
-        self, 
-        records: list[dict], 
-        rule_results: list[RuleResult]
+        self,
+        records: list[dict],
+        rule_results: list[RuleResult],
+        batch_size: Optional[int] = None
     ) -> list[LLMExplanation]:
-        """Generate explanations for multiple records"""
-        return [
-            self.generate_explanation(record, result)
-            for record, result in zip(records, rule_results)
-        ]
\ No newline at end of file
+        """Generate explanations for multiple records
+
+        Transactions are sent batch_size at a time in a single request. If the
+        model returns the wrong number of explanations for a batch, that batch is
+        retried one transaction per request. last_usage is the total over every
+        request made, retries included.
+        """
+        batch_size = batch_size or self.batch_size
+        explanations = []
+        total: Optional[PromptUsage] = None
+
+        for start in range(0, len(records), batch_size):
+            chunk_records = records[start:start + batch_size]
+            chunk_results = rule_results[start:start + batch_size]
+
+            parsed = self._request(chunk_records, chunk_results)
+            total = _sum_usage(total, self.last_usage)
+            if len(parsed) != len(chunk_records):
+                for record, result in zip(chunk_records, chunk_results):
+                    explanations.append(self.generate_explanation(record, result))
+                    total = _sum_usage(total, self.last_usage)
+                continue
+
+            explanations.extend(self._to_explanation(p) for p in parsed)
+
+        self.last_usage = total
+        return explanations
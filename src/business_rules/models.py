@@ -21,6 +21,14 @@ class RuleResult(BaseModel):
     decision: Decision
     rule_reason: str
 
+class AllMatchesResult(BaseModel):
+    """Every rule a record matches, with an aggregated score"""
+    transaction_id: str
+    matched_rule_ids: list[str]  # In rule order
+    matched_mask: int  # Bit i set when rules[i] matched
+    score: int = Field(ge=0)
+    decision: Decision  # Most severe decision among the matched rules
+
 class LLMExplanation(BaseModel):
     """Structured output from LLM"""
     human_readable_explanation: str
@@ -29,6 +37,14 @@ class LLMExplanation(BaseModel):
     clarifying_questions: list[str] = Field(default_factory=list)
     additional_context: Optional[str] = None
 
+class PromptUsage(BaseModel):
+    """Token usage of an LLM request (summed over every request of a batch)"""
+    records: int
+    estimated_input_tokens: int
+    input_tokens: Optional[int] = None
+    output_tokens: Optional[int] = None
+    cache_read_input_tokens: Optional[int] = None
+
 class FinalDecisionOutput(BaseModel):
     """Combined output for each transaction"""
     transaction_id: str
@@ -48,6 +64,7 @@ class ConditionEvaluation(BaseModel):
     expected_value: Any
     actual_value: Any
     passed: bool
+    value_field: Optional[str] = None  # Set when compared against another field
 
 class RuleEvaluation(BaseModel):
     """Result of evaluating a single rule"""
@@ -64,4 +81,36 @@ class EvaluationTrace(BaseModel):
     evaluated_rules: list[RuleEvaluation]
     matched_rule_index: int  # Index in evaluated_rules list
     total_evaluation_time_ms: float
-    config_version: str
\ No newline at end of file
+    config_version: str
+
+
+class RuleImpact(BaseModel):
+    """Per-rule statistics from a backtest"""
+    rule_id: str
+    position: int
+    hits: int  # Records where this rule was the first match
+    matches: int  # Records satisfying the rule's conditions, regardless of order
+    shadowed: bool  # Matches records, but earlier rules always match first
+
+class ScoreDistribution(BaseModel):
+    """Risk score distribution over a dataset"""
+    mean: float
+    p50: float
+    p90: float
+    p99: float
+    histogram: list[int]  # Counts per 10-point bucket: [0,10), [10,20), ..., [90,100]
+
+class BacktestReport(BaseModel):
+    """Comparison of two rule configs over the same dataset"""
+    rows: int
+    baseline_version: Optional[str]
+    candidate_version: Optional[str]
+    decision_changes: int
+    matched_rule_changes: int
+    decision_flips: dict[str, dict[str, int]]  # from decision -> to decision -> count
+    baseline_rules: list[RuleImpact]
+    candidate_rules: list[RuleImpact]
+    baseline_scores: ScoreDistribution
+    candidate_scores: ScoreDistribution
+    mean_score_delta: float
+    predicates_evaluated: int
@@ -0,0 +1,243 @@
+import bisect
+import ipaddress
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+from .lists import MappedList, is_compiled_list
+
+
+class PrefixSet:
+    """Prefix membership: one set lookup per distinct prefix length
+
+    Equivalent to walking a prefix trie, but uses one hash set so large lists
+    (e.g. card BIN ranges) cost only a few lookups per value.
+    """
+
+    def __init__(self, prefixes: Iterable[Any]):
+        self.prefixes = frozenset(str(p) for p in prefixes)
+        self.lengths = sorted({len(p) for p in self.prefixes})
+
+    def __len__(self) -> int:
+        return len(self.prefixes)
+
+    def __contains__(self, value: Any) -> bool:
+        value = str(value)
+        prefixes = self.prefixes
+        n = len(value)
+        for length in self.lengths:
+            if length > n:
+                break
+            if value[:length] in prefixes:
+                return True
+        return False
+
+
+class CidrSet:
+    """IP network membership over merged address ranges, searched with bisect"""
+
+    def __init__(self, networks: Iterable[Any]):
+        parsed = [ipaddress.ip_network(str(n).strip(), strict=False) for n in networks]
+        self._ranges: Dict[int, Tuple[list, list]] = {}
+        for version in (4, 6):
+            starts, ends = [], []
+            for net in ipaddress.collapse_addresses(n for n in parsed if n.version == version):
+                starts.append(int(net.network_address))
+                ends.append(int(net.broadcast_address))
+            self._ranges[version] = (starts, ends)
+
+    def __len__(self) -> int:
+        return sum(len(starts) for starts, _ in self._ranges.values())
+
+    def __contains__(self, value: Any) -> bool:
+        try:
+            ip = ipaddress.ip_address(value)
+        except ValueError:
+            return False
+        starts, ends = self._ranges[ip.version]
+        address = int(ip)
+        i = bisect.bisect_right(starts, address) - 1
+        return i >= 0 and address <= ends[i]
+
+
+def _prefixes(value: Any) -> Tuple[str, ...]:
+    return (value,) if isinstance(value, str) else tuple(str(v) for v in value)
+
+
+def _between(a: Any, bounds: Any) -> bool:
+    return bounds[0] <= a <= bounds[1]
+
+
+def _prefix(a: Any, prefixes: Any) -> bool:
+    return str(a).startswith(_prefixes(prefixes))
+
+
+def _cidr(a: Any, networks: Any) -> bool:
+    return a in CidrSet([networks] if isinstance(networks, str) else networks)
+
+
+def _regex(a: Any, pattern: Any) -> bool:
+    return re.search(pattern, str(a)) is not None
+
+
+# Generic (uncompiled) implementations of the structured operators, used for
+# value_field comparisons and as a reference for the compiled forms
+EXTRA_OPERATORS: Dict[str, Callable[[Any, Any], bool]] = {
+    "between": _between,
+    "prefix": _prefix,
+    "cidr": _cidr,
+    "regex": _regex,
+}
+
+# Operators whose value_file entries are parsed into a structure
+FILE_OPERATORS = ("in", "not_in", "prefix", "cidr")
+
+_list_cache: Dict[Tuple[str, str, int, int], Any] = {}
+_list_lock = threading.Lock()
+
+
+def resolve_list_path(path: str, base_dir: Optional[str] = None) -> Path:
+    """Resolve a value_file path (relative paths are relative to the config directory)"""
+    p = Path(path)
+    if not p.is_absolute():
+        p = Path(base_dir or os.getcwd()) / p
+    return p
+
+
+def read_list_file(path: Path) -> Tuple[str, ...]:
+    """Entries of a text list file: one per line, blank lines and # comments ignored"""
+    with open(path, 'r') as f:
+        entries = (line.strip() for line in f)
+        return tuple(e for e in entries if e and not e.startswith('#'))
+
+
+def load_list(path: str, operator: str, base_dir: Optional[str] = None) -> Any:
+    """Compiled structure for a value_file, shared by every condition (and engine) using it
+
+    Cached by path, mtime and size, so replacing the file is picked up the next
+    time a config is compiled. Compiled list files (see lists.py) are memory-mapped
+    instead of parsed; they serve in, not_in and prefix.
+    """
+    resolved = resolve_list_path(path, base_dir)
+    try:
+        stat = os.stat(resolved)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"List file not found: {resolved}")
+
+    kind = {"not_in": "in"}.get(operator, operator)
+    version = (stat.st_mtime_ns, stat.st_size)
+    with _list_lock:
+        mapped = _list_cache.get((str(resolved), "mapped") + version)
+        if mapped is not None:
+            if kind == "cidr":
+                raise ValueError(f"cidr lists must be text files: {resolved}")
+            return mapped
+        key = (str(resolved), kind) + version
+        compiled = _list_cache.get(key)
+        if compiled is None:
+            if is_compiled_list(str(resolved)):
+                if kind == "cidr":
+                    raise ValueError(f"cidr lists must be text files: {resolved}")
+                # One mapping serves exact and prefix lookups
+                key = (str(resolved), "mapped") + version
+                compiled = MappedList(str(resolved))
+            elif kind == "prefix":
+                compiled = PrefixSet(read_list_file(resolved))
+            elif kind == "cidr":
+                compiled = CidrSet(read_list_file(resolved))
+            else:
+                compiled = frozenset(read_list_file(resolved))
+            # Keep only the current version of each file
+            for stale in [k for k in _list_cache if k[0] == key[0] and k[2:] != version]:
+                del _list_cache[stale]
+            _list_cache[key] = compiled
+        return compiled
+
+
+def compile_operator(
+    operator: str,
+    expected: Any,
+    op_func: Callable[[Any, Any], bool]
+) -> Callable[[Any], bool]:
+    """Specialize `op_func(actual, expected)` for a literal expected value
+
+    Structured operators get a precomputed structure: frozenset for in/not_in
+    lists, PrefixSet for prefix, CidrSet for cidr and a compiled pattern for
+    regex.
+    """
+    if operator in ("in", "not_in") and isinstance(expected, (list, tuple, set, frozenset)):
+        try:
+            members = frozenset(expected)
+        except TypeError:
+            return lambda a: op_func(a, expected)
+        values = tuple(expected)
+
+        def member(a: Any) -> bool:
+            try:
+                return a in members
+            except TypeError:  # unhashable actual value
+                return a in values
+
+        if operator == "in":
+            return member
+        return lambda a: not member(a)
+
+    if operator == "between":
+        if not isinstance(expected, (list, tuple)) or len(expected) != 2:
+            raise ValueError(f"'between' needs a [low, high] value, got {expected!r}")
+        low, high = expected
+        return lambda a: low <= a <= high
+
+    if operator == "prefix":
+        prefixes = PrefixSet(_prefixes(expected))
+        return prefixes.__contains__
+
+    if operator == "cidr":
+        networks = CidrSet([expected] if isinstance(expected, str) else expected)
+        return networks.__contains__
+
+    if operator == "regex":
+        try:
+            pattern = re.compile(expected)
+        except re.error as e:
+            raise ValueError(f"Invalid regex {expected!r}: {e}")
+        search = pattern.search
+        return lambda a: search(str(a)) is not None
+
+    return lambda a: op_func(a, expected)
+
+
+def compile_file_operator(
+    operator: str,
+    path: str,
+    base_dir: Optional[str] = None
+) -> Callable[[Any], bool]:
+    """Membership test against a value_file list (values are compared as strings)"""
+    if operator not in FILE_OPERATORS:
+        raise ValueError(f"value_file is not supported for operator '{operator}'")
+    members = load_list(path, operator, base_dir)
+    if isinstance(members, MappedList):
+        if operator == "prefix":
+            return members.has_prefix
+        if operator == "not_in":
+            return lambda a: a not in members
+        return members.__contains__
+    if operator == "not_in":
+        return lambda a: str(a) not in members
+    if operator == "in":
+        return lambda a: str(a) in members
+    return members.__contains__
+
+
+def compile_condition(
+    condition: dict,
+    op_func: Callable[[Any, Any], bool],
+    base_dir: Optional[str] = None
+) -> Optional[Callable[[Any], bool]]:
+    """Test for a condition's actual value (None for value_field conditions)"""
+    if 'value_field' in condition:
+        return None
+    if 'value_file' in condition:
+        return compile_file_operator(condition['operator'], condition['value_file'], base_dir)
+    return compile_operator(condition['operator'], condition['value'], op_func)
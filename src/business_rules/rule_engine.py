@@ -1,7 +1,15 @@
 import yaml
 import time
-from typing import Any, Optional, Tuple
-from .models import RuleResult, Decision, EvaluationTrace, RuleEvaluation, ConditionEvaluation
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional, Tuple
+from .models import RuleResult, Decision, EvaluationTrace, RuleEvaluation, ConditionEvaluation, AllMatchesResult
+from .all_matches import AllMatchesPlan
+from .analyzer import prune_unreachable as prune_rules
+from .expressions import DerivedFields, RecordView
+from .operators import EXTRA_OPERATORS, compile_condition, resolve_list_path
+
+if TYPE_CHECKING:
+    from .decision_dag import DecisionDAG
 
 class RuleEngine:
     OPERATORS = {
@@ -13,57 +21,145 @@ class RuleEngine:
         "!=": lambda a, b: a != b,
         "in": lambda a, b: a in b,
         "not_in": lambda a, b: a not in b,
+        # between [low, high], prefix, cidr and regex
+        **EXTRA_OPERATORS,
     }
 
-    def __init__(self, config_path: str):
+    def __init__(self, config_path: str, prune_unreachable: bool = False):
+        """
+        Args:
+            config_path: Path to the rules YAML file
+            prune_unreachable: Drop rules the static analyzer proves can never be
+                the first match (results are unchanged; traces omit those rules)
+        """
         with open(config_path, 'r') as f:
-            self.config = yaml.safe_load(f)
+            self._set_config(yaml.safe_load(f), str(Path(config_path).parent), prune_unreachable)
+
+    @classmethod
+    def from_config(
+        cls,
+        config: dict,
+        base_dir: Optional[str] = None,
+        prune_unreachable: bool = False
+    ) -> 'RuleEngine':
+        """Build an engine from an already-loaded config dict
+
+        Args:
+            config: Parsed rules config
+            base_dir: Directory value_file paths are relative to (default: cwd)
+            prune_unreachable: Drop rules that can never be the first match
+        """
+        engine = cls.__new__(cls)
+        engine._set_config(config, base_dir, prune_unreachable)
+        return engine
+
+    def _set_config(self, config: dict, base_dir: Optional[str] = None, prune_unreachable: bool = False) -> None:
+        self.config = config
         self.rules = self.config['rules']
+        self.pruned_rule_ids = []
+        if prune_unreachable:
+            self.rules = prune_rules(config)[0]['rules']
+            kept = {id(r) for r in self.rules}
+            self.pruned_rule_ids = [r['id'] for r in config['rules'] if id(r) not in kept]
         self.version = self.config['version']
+        self.base_dir = base_dir
+        self._schema = None
+        self._all_matches = None
+        self._dag = None
+        # Derived fields are compiled once here and computed lazily per record
+        self.derived = DerivedFields.from_config(self.config)
+        # Each condition's operator and value are compiled once (sets, ranges,
+        # prefix/CIDR structures, regexes), keyed by condition identity
+        self._conditions: Dict[int, Tuple[dict, tuple]] = {}
+        for rule in self.rules:
+            for condition in rule.get('conditions') or []:
+                self._conditions[id(condition)] = (condition, self._compile_condition(condition))
+        # External lists this config reads (a change to any of them means a reload)
+        self.list_files = sorted({
+            str(resolve_list_path(c['value_file'], base_dir))
+            for c, _ in self._conditions.values() if 'value_file' in c
+        })
 
-    def evaluate_condition(self, condition: dict, record: dict) -> bool:
-        field = condition['field']
+    def _compile_condition(self, condition: dict) -> Tuple[str, Optional[str], Callable, Optional[Callable]]:
         operator = condition['operator']
-        expected_value = condition['value']
+        op_func = self.OPERATORS.get(operator)
+        if not op_func:
+            raise ValueError(f"Unknown operator: {operator}")
+        test = compile_condition(condition, op_func, self.base_dir)
+        return condition['field'], condition.get('value_field'), op_func, test
+
+    def compiled_condition(self, condition: dict) -> Tuple[str, Optional[str], Callable, Optional[Callable]]:
+        """(field, value_field, operator function, compiled test) for a condition"""
+        entry = self._conditions.get(id(condition))
+        if entry is not None and entry[0] is condition:
+            return entry[1]
+        # A condition that is not part of the loaded rules
+        return self._compile_condition(condition)
+
+    def record_view(self, record: dict) -> dict:
+        """Record as seen by conditions: derived fields resolve on first access"""
+        if self.derived and not isinstance(record, RecordView):
+            return RecordView(record, self.derived)
+        return record
+
+    @property
+    def schema(self):
+        """FeatureSchema compiled from the config 'features' section (built on first use)"""
+        if self._schema is None:
+            from .schema import FeatureSchema
+            self._schema = FeatureSchema.from_config(self.config)
+        return self._schema
+
+    def evaluate_condition(self, condition: dict, record: dict) -> bool:
+        field, value_field, op_func, test = self.compiled_condition(condition)
         actual_value = record.get(field)
 
         if actual_value is None:
             return False
 
-        op_func = self.OPERATORS.get(operator)
-        if not op_func:
-            raise ValueError(f"Unknown operator: {operator}")
+        # Field-to-field comparison: the other field must be present too
+        if value_field is not None:
+            expected_value = record.get(value_field)
+            if expected_value is None:
+                return False
+            return op_func(actual_value, expected_value)
 
-        return op_func(actual_value, expected_value)
+        return test(actual_value)
 
     def evaluate_condition_with_trace(self, condition: dict, record: dict) -> ConditionEvaluation:
         """Evaluate condition and return detailed trace"""
-        field = condition['field']
+        field, value_field, op_func, test = self.compiled_condition(condition)
         operator = condition['operator']
-        expected_value = condition['value']
+        if value_field is not None:
+            expected_value = record.get(value_field)
+        elif 'value_file' in condition:
+            expected_value = condition['value_file']
+        else:
+            expected_value = condition['value']
         actual_value = record.get(field)
 
-        if actual_value is None:
+        if actual_value is None or (value_field is not None and expected_value is None):
             return ConditionEvaluation(
                 field=field,
                 operator=operator,
                 expected_value=expected_value,
-                actual_value=None,
-                passed=False
+                actual_value=actual_value,
+                passed=False,
+                value_field=value_field
             )
 
-        op_func = self.OPERATORS.get(operator)
-        if not op_func:
-            raise ValueError(f"Unknown operator: {operator}")
-
-        passed = op_func(actual_value, expected_value)
+        if value_field is not None:
+            passed = op_func(actual_value, expected_value)
+        else:
+            passed = test(actual_value)
 
         return ConditionEvaluation(
             field=field,
             operator=operator,
             expected_value=expected_value,
             actual_value=actual_value,
-            passed=passed
+            passed=passed,
+            value_field=value_field
         )
 
     def evaluate_rule(self, rule: dict, record: dict) -> bool:
@@ -116,10 +212,23 @@ class RuleEngine:
             timestamp_ms=timestamp_ms
         )
 
+    def use_decision_dag(self, sample: Any = None, max_nodes: int = 20000) -> 'DecisionDAG':
+        """Serve evaluate() from a decision DAG compiled from these rules
+
+        Results are identical to linear first-match evaluation; traces still
+        evaluate every rule. See decision_dag.DecisionDAG for the arguments.
+        """
+        from .decision_dag import DecisionDAG
+        self._dag = DecisionDAG(self, sample, max_nodes)
+        return self._dag
+
     def evaluate(self, record: dict) -> RuleResult:
         """Evaluate a single record against all rules"""
+        if self._dag is not None:
+            return self._dag.evaluate(record)
         transaction_id = record.get('transaction_id', 'unknown')
-        
+        record = self.record_view(record)
+
         for rule in self.rules:
             if self.evaluate_rule(rule, record):
                 outcome = rule['outcome']
@@ -148,6 +257,7 @@ class RuleEngine:
         """
         transaction_id = record.get('transaction_id', 'unknown')
         start_time = time.time()
+        record = self.record_view(record)
 
         evaluated_rules = []
         matched_rule_index = -1
@@ -206,4 +316,20 @@ class RuleEngine:
 
     def evaluate_batch_with_trace(self, records: list[dict], enable_trace: bool = True) -> list[Tuple[RuleResult, Optional[EvaluationTrace]]]:
         """Evaluate multiple records with optional tracing"""
-        return [self.evaluate_with_trace(record, enable_trace) for record in records]
\ No newline at end of file
+        return [self.evaluate_with_trace(record, enable_trace) for record in records]
+
+    def evaluate_all(self, record: dict, aggregate: str = "max", cap: int = 100) -> AllMatchesResult:
+        """Find every rule the record matches (not just the first) and aggregate their scores
+
+        Args:
+            record: Transaction data dictionary
+            aggregate: "max", "sum" (capped at cap) or "weighted" (rule 'weight' keys)
+            cap: Upper bound for sum and weighted scores
+        """
+        if self._all_matches is None:
+            self._all_matches = AllMatchesPlan(self)
+        return self._all_matches.evaluate(record, aggregate, cap)
+
+    def evaluate_batch_all(self, records: list[dict], aggregate: str = "max", cap: int = 100) -> list[AllMatchesResult]:
+        """All-matches evaluation of multiple records"""
+        return [self.evaluate_all(record, aggregate, cap) for record in records]
@@ -0,0 +1,262 @@
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+# Python types accepted for each feature type declared in the config
+FEATURE_TYPES = {
+    'float': (int, float),
+    'int': (int,),
+    'bool': (bool,),
+    'string': (str,),
+}
+
+TYPE_ERRORS = {
+    'float': "must be numeric",
+    'int': "must be integer",
+    'bool': "must be boolean (true/false)",
+    'string': "must be a string",
+}
+
+
+def _native(value: Any) -> Any:
+    """Box numpy scalars into Python scalars, as Series.to_dict() does"""
+    if isinstance(value, (np.integer, np.floating, np.bool_)):
+        return value.item()
+    return value
+
+
+class FieldCheck:
+    """Compiled validation for a single feature"""
+
+    def __init__(self, name: str, spec: Dict[str, Any]):
+        self.name = name
+        self.type = spec.get('type')
+        self.minimum = spec.get('min')
+        self.maximum = spec.get('max')
+        self.allowed = spec.get('allowed')
+        self.allowed_set = None
+
+        # String features with an allowed list only need the membership check
+        self.types = FEATURE_TYPES.get(self.type)
+        if self.allowed is not None and self.type in (None, 'string'):
+            self.types = None
+        self.type_error = f"{name} {TYPE_ERRORS.get(self.type, '')}"
+
+        if self.minimum == 0:
+            self.min_error = f"{name} cannot be negative"
+        else:
+            self.min_error = f"{name} must be >= {self.minimum}"
+        self.max_error = f"{name} must be <= {self.maximum}"
+
+        if self.allowed is not None:
+            self.allowed_error = f"Invalid {name}. Must be one of: {self.allowed}"
+            try:
+                self.allowed_set = frozenset(self.allowed)
+            except TypeError:
+                pass
+
+        self.check = self._compile()
+
+    def _compile(self):
+        """Specialize check() for the common feature shapes"""
+        types, minimum, maximum = self.types, self.minimum, self.maximum
+        type_error, min_error, max_error = self.type_error, self.min_error, self.max_error
+
+        if self.allowed is not None:
+            if types is None and minimum is None and maximum is None:
+                is_allowed, allowed_error = self._is_allowed, self.allowed_error
+
+                def check_allowed(value):
+                    return None if is_allowed(value) else allowed_error
+                return check_allowed
+            return self._check
+
+        if types is None or types is FEATURE_TYPES['string']:
+            return self._check
+
+        if minimum is None and maximum is None:
+            def check_type(value):
+                return None if isinstance(value, types) else type_error
+            return check_type
+
+        if maximum is None:
+            def check_min(value):
+                if not isinstance(value, types):
+                    return type_error
+                if value < minimum:
+                    return min_error
+                return None
+            return check_min
+
+        def check_range(value):
+            if not isinstance(value, types):
+                return type_error
+            if minimum is not None and value < minimum:
+                return min_error
+            if value > maximum:
+                return max_error
+            return None
+        return check_range
+
+    def _check(self, value: Any) -> Optional[str]:
+        """Return the error message for a value, or None if it is valid"""
+        types = self.types
+        if types is not None:
+            if not isinstance(value, types):
+                return self.type_error
+            ranged = types is not FEATURE_TYPES['string']
+        else:
+            ranged = isinstance(value, (int, float))
+
+        if ranged:
+            if self.minimum is not None and value < self.minimum:
+                return self.min_error
+            if self.maximum is not None and value > self.maximum:
+                return self.max_error
+
+        if self.allowed is not None and not self._is_allowed(value):
+            return self.allowed_error
+
+        return None
+
+    def _is_allowed(self, value: Any) -> bool:
+        if self.allowed_set is not None:
+            try:
+                return value in self.allowed_set
+            except TypeError:
+                pass
+        return value in self.allowed
+
+    def _accepts_kind(self, kind: str) -> bool:
+        """Whether every value of a numpy column of this kind passes the type check"""
+        if self.types is None:
+            return True
+        if kind == 'b':
+            return bool in self.types or int in self.types
+        if kind in 'iu':
+            return int in self.types
+        if kind == 'f':
+            return float in self.types
+        return False
+
+    def column_masks(self, col: pd.Series) -> List[Tuple[np.ndarray, str]]:
+        """Compute (row mask, error message) pairs for a column"""
+        n = len(col)
+        # Extension dtypes (nullable ints, strings, categoricals) report kind 'O'
+        kind = col.dtype.kind if isinstance(col.dtype, np.dtype) else 'O'
+
+        if kind not in 'biuf':
+            if self.types is None and col.dtype != object and self.allowed is not None:
+                return [(~col.isin(self.allowed).to_numpy(dtype=bool), self.allowed_error)]
+            return self._elementwise_masks(col)
+
+        if not self._accepts_kind(kind):
+            return [(np.ones(n, dtype=bool), self.type_error)]
+
+        masks = []
+        values = col.to_numpy()
+        seen = np.zeros(n, dtype=bool)
+        if self.minimum is not None:
+            below = values < self.minimum
+            masks.append((below, self.min_error))
+            seen |= below
+        if self.maximum is not None:
+            above = (values > self.maximum) & ~seen
+            masks.append((above, self.max_error))
+            seen |= above
+        if self.allowed is not None:
+            masks.append((~col.isin(self.allowed).to_numpy(dtype=bool) & ~seen, self.allowed_error))
+        return masks
+
+    def _elementwise_masks(self, col: pd.Series) -> List[Tuple[np.ndarray, str]]:
+        masks = {}
+        for pos, value in enumerate(col.to_numpy(dtype=object)):
+            message = self.check(_native(value))
+            if message is not None:
+                if message not in masks:
+                    masks[message] = np.zeros(len(col), dtype=bool)
+                masks[message][pos] = True
+        return [(mask, message) for message, mask in masks.items()]
+
+
+class FeatureSchema:
+    """Validation schema compiled from the 'features' section of a rules config
+
+    Features are required unless declared with ``required: false``. Checks are
+    compiled once; check_record() validates a single record and check_dataframe()
+    validates a whole frame column-wise.
+    """
+
+    def __init__(
+        self,
+        features: Dict[str, Dict[str, Any]],
+        required: Optional[Iterable[str]] = None,
+        version: Optional[str] = None
+    ):
+        self.features = features
+        self.version = version
+        if required is None:
+            required = [
+                name for name, spec in features.items() if (spec or {}).get('required', True)
+            ]
+        self.required = list(required)
+        self.fields = [FieldCheck(name, spec or {}) for name, spec in features.items()]
+        self._checks = [(f.name, f.check) for f in self.fields]
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], id_field: str = 'transaction_id') -> 'FeatureSchema':
+        """Build the schema for a loaded rules config"""
+        features = config.get('features') or {}
+        required = [id_field] + [
+            name for name, spec in features.items() if (spec or {}).get('required', True)
+        ]
+        return cls(features, required=required, version=config.get('version'))
+
+    def check_record(self, record: Dict[str, Any]) -> List[str]:
+        """Validate a single record and return list of errors"""
+        errors = [f"Missing required field: {field}" for field in self.required if field not in record]
+
+        for name, check in self._checks:
+            if name in record:
+                message = check(record[name])
+                if message is not None:
+                    errors.append(message)
+
+        return errors
+
+    def check_dataframe(self, df: pd.DataFrame) -> Dict[Any, List[str]]:
+        """Validate a dataframe and return errors by row label
+
+        Equivalent to calling check_record() on every row, but dtypes are checked
+        once per column and value checks are boolean masks. Per-row error lists
+        are only built for failing rows.
+        """
+        errors_by_row = {}
+
+        missing_cols = set(self.required) - set(df.columns)
+        if missing_cols:
+            errors_by_row['schema'] = [f"Missing required columns: {missing_cols}"]
+            return errors_by_row
+
+        # Rows of a frame without object columns are upcast to a common dtype
+        # (e.g. ints become floats); validate the values as a row would see them
+        row_dtype = df.iloc[:0].to_numpy().dtype
+        if row_dtype != object and len(df.columns):
+            df = df.astype(row_dtype)
+
+        checks = []
+        for field in self.fields:
+            if field.name in df.columns:
+                checks.extend((m, msg) for m, msg in field.column_masks(df[field.name]) if m.any())
+        if not checks:
+            return errors_by_row
+
+        failing = np.zeros(len(df), dtype=bool)
+        for mask, _ in checks:
+            failing |= mask
+
+        index = df.index
+        for pos in np.flatnonzero(failing):
+            errors_by_row[index[pos]] = [message for mask, message in checks if mask[pos]]
+
+        return errors_by_row
@@ -0,0 +1,274 @@
+import logging
+import os
+import queue
+import threading
+import time
+import weakref
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from .expressions import DerivedFields
+from .models import Decision, EvaluationTrace, RuleResult
+from .rule_engine import RuleEngine
+from .vectorized import condition_key
+
+logger = logging.getLogger(__name__)
+
+# Every distinct condition (across all loaded configs) gets one integer slot, so
+# a per-record memo of condition results can be shared between engines
+_slots: Dict[Any, int] = {}
+_slots_lock = threading.Lock()
+
+
+def condition_slot(condition: dict, derived: Optional[DerivedFields] = None) -> int:
+    key = condition_key(condition, derived)
+    slot = _slots.get(key)
+    if slot is None:
+        with _slots_lock:
+            slot = _slots.setdefault(key, len(_slots))
+    return slot
+
+
+class SlottedRules:
+    """An engine's rules with each condition mapped to its shared memo slot
+
+    match() has the same first-match semantics as RuleEngine.evaluate() (all
+    conditions of a rule are evaluated), but looks condition results up in a
+    memo first and records the ones it computes.
+    """
+
+    def __init__(self, engine: RuleEngine):
+        self.engine = engine
+        self.rules = [
+            (
+                rule,
+                rule.get('logic'),
+                [(condition_slot(c, engine.derived), c) for c in rule.get('conditions') or []]
+            )
+            for rule in engine.rules
+        ]
+
+    def match(self, record: dict, memo: Dict[int, bool]) -> int:
+        """Index of the first matching rule (-1 if none)"""
+        evaluate_condition = self.engine.evaluate_condition
+        record = self.engine.record_view(record)
+        for idx, (_, logic, conditions) in enumerate(self.rules):
+            if logic == 'ALWAYS':
+                return idx
+            if not conditions:
+                continue
+            results = []
+            for slot, condition in conditions:
+                passed = memo.get(slot)
+                if passed is None:
+                    passed = memo[slot] = bool(evaluate_condition(condition, record))
+                results.append(passed)
+            if (logic == 'AND' and all(results)) or (logic == 'OR' and any(results)):
+                return idx
+        return -1
+
+    def seed(self, trace: EvaluationTrace, memo: Dict[int, bool]) -> None:
+        """Fill the memo from a full execution trace of the same engine"""
+        for (_, _, conditions), rule_eval in zip(self.rules, trace.evaluated_rules):
+            for (slot, _), condition_eval in zip(conditions, rule_eval.conditions):
+                memo[slot] = bool(condition_eval.passed)
+
+    def result(self, idx: int, record: dict) -> RuleResult:
+        if idx < 0:
+            raise ValueError("No matching rule found and no DEFAULT rule defined")
+        rule = self.rules[idx][0]
+        outcome = rule['outcome']
+        return RuleResult(
+            transaction_id=record.get('transaction_id', 'unknown'),
+            matched_rule_id=rule['id'],
+            matched_rule_name=rule['name'],
+            risk_score=outcome['risk_score'],
+            decision=Decision(outcome['decision']),
+            rule_reason=outcome['reason']
+        )
+
+
+class ShadowEvaluator:
+    """Serve decisions from a primary engine while shadow versions run on the side
+
+    The primary version is evaluated on the request path and its condition
+    results are kept in a per-record memo. The record, the memo and the primary
+    outcome are queued to a background thread, which evaluates each shadow
+    version reusing the memo (only conditions the primary never evaluated are
+    computed) and reports disagreements. A full queue drops shadow work rather
+    than slowing requests down.
+    """
+
+    def __init__(
+        self,
+        resolve: Callable[[str], RuleEngine],
+        on_disagreement: Optional[Callable[[Dict[str, Any]], None]] = None,
+        max_queue: int = 10000
+    ):
+        """
+        Args:
+            resolve: Returns the engine for a config version (e.g. EngineCache.get)
+            on_disagreement: Called (on the worker thread) with each disagreement;
+                defaults to logging it as a warning
+            max_queue: Pending shadow jobs before new ones are dropped
+        """
+        self.resolve = resolve
+        self.on_disagreement = on_disagreement or self._log
+        self.max_queue = max_queue
+        self._compiled: 'weakref.WeakKeyDictionary[RuleEngine, SlottedRules]' = weakref.WeakKeyDictionary()
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self.dropped = 0
+        self._start()
+        # Threads do not survive fork(): a forked worker process starts its own
+        ref = weakref.ref(self)
+        os.register_at_fork(after_in_child=lambda: ref() is not None and ref()._start())
+
+    def _start(self) -> None:
+        self._compiled_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._queue: 'queue.Queue' = queue.Queue(maxsize=self.max_queue)
+        self._worker = threading.Thread(target=self._run, name="shadow-evaluator", daemon=True)
+        self._worker.start()
+
+    @staticmethod
+    def _log(event: Dict[str, Any]) -> None:
+        logger.warning("shadow disagreement: %s", event)
+
+    def compiled(self, engine: RuleEngine) -> SlottedRules:
+        with self._compiled_lock:
+            rules = self._compiled.get(engine)
+            if rules is None:
+                rules = self._compiled[engine] = SlottedRules(engine)
+            return rules
+
+    def evaluate(
+        self,
+        record: dict,
+        engine: RuleEngine,
+        shadow_versions: List[str],
+        enable_trace: bool = False,
+        version: Optional[str] = None
+    ) -> Tuple[RuleResult, Optional[EvaluationTrace]]:
+        """Evaluate record with the primary engine and schedule shadow evaluation
+
+        Args:
+            record: Transaction data dictionary
+            engine: Primary engine; its result is returned
+            shadow_versions: Config versions evaluated in the background
+            enable_trace: Return the primary engine's execution trace
+            version: Primary version label used in disagreement reports
+        """
+        return self.evaluate_batch([record], engine, shadow_versions, enable_trace, version)[0]
+
+    def evaluate_batch(
+        self,
+        records: List[dict],
+        engine: RuleEngine,
+        shadow_versions: List[str],
+        enable_trace: bool = False,
+        version: Optional[str] = None
+    ) -> List[Tuple[RuleResult, Optional[EvaluationTrace]]]:
+        """Batch form of evaluate(); shadow work for the batch is queued as one job"""
+        primary = self.compiled(engine)
+        outputs = []
+        jobs = []
+        for record in records:
+            memo: Dict[int, bool] = {}
+            if enable_trace:
+                result, trace = engine.evaluate_with_trace(record, enable_trace=True)
+                primary.seed(trace, memo)
+                idx = trace.matched_rule_index
+            else:
+                idx = primary.match(record, memo)
+                result, trace = primary.result(idx, record), None
+            outputs.append((result, trace))
+            jobs.append((record, memo, idx))
+
+        if shadow_versions:
+            try:
+                self._queue.put_nowait((engine, version or engine.version, list(shadow_versions), jobs))
+            except queue.Full:
+                self.dropped += len(jobs)
+        return outputs
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                self._compare(*item)
+            except Exception:
+                logger.exception("shadow evaluation failed")
+            finally:
+                self._queue.task_done()
+
+    def _count(self, version: str, key: str, n: int = 1) -> None:
+        with self._stats_lock:
+            stats = self._stats.setdefault(
+                version, {'evaluated': 0, 'disagreements': 0, 'decision_changes': 0, 'errors': 0}
+            )
+            stats[key] += n
+
+    def _compare(
+        self, engine: RuleEngine, primary_version: str, shadow_versions: List[str], jobs: list
+    ) -> None:
+        primary = self.compiled(engine)
+        for version in shadow_versions:
+            try:
+                shadow = self.compiled(self.resolve(version))
+            except Exception:
+                self._count(version, 'errors', len(jobs))
+                continue
+
+            for record, memo, idx in jobs:
+                try:
+                    shadow_idx = shadow.match(record, memo)
+                except Exception:
+                    self._count(version, 'errors')
+                    continue
+                self._count(version, 'evaluated')
+
+                primary_rule = primary.rules[idx][0]
+                shadow_rule = shadow.rules[shadow_idx][0] if shadow_idx >= 0 else None
+                if shadow_rule is not None and shadow_rule['id'] == primary_rule['id'] \
+                        and shadow_rule['outcome'] == primary_rule['outcome']:
+                    continue
+
+                decision_changed = (
+                    shadow_rule is None
+                    or shadow_rule['outcome']['decision'] != primary_rule['outcome']['decision']
+                )
+                self._count(version, 'disagreements')
+                if decision_changed:
+                    self._count(version, 'decision_changes')
+                self.on_disagreement({
+                    'transaction_id': record.get('transaction_id', 'unknown'),
+                    'primary_version': primary_version,
+                    'shadow_version': version,
+                    'primary': self._outcome(primary_rule),
+                    'shadow': self._outcome(shadow_rule) if shadow_rule else None,
+                    'decision_changed': decision_changed,
+                    'timestamp': time.time(),
+                })
+
+    @staticmethod
+    def _outcome(rule: dict) -> Dict[str, Any]:
+        return {
+            'rule_id': rule['id'],
+            'decision': rule['outcome']['decision'],
+            'risk_score': rule['outcome']['risk_score'],
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """Per shadow version counts, plus jobs pending and dropped"""
+        with self._stats_lock:
+            versions = {v: dict(s) for v, s in self._stats.items()}
+        return {'versions': versions, 'pending': self._queue.qsize(), 'dropped': self.dropped}
+
+    def flush(self) -> None:
+        """Block until all queued shadow work has been processed"""
+        self._queue.join()
+
+    def close(self) -> None:
+        """Process remaining work and stop the worker thread"""
+        self._queue.put(None)
+        self._worker.join()
@@ -0,0 +1,263 @@
+import hashlib
+import json
+import os
+import threading
+import zlib
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: one process per store
+    fcntl = None
+
+
+def content_hash(config: Dict[str, Any]) -> str:
+    """SHA-256 of the canonical JSON form of a config"""
+    canonical = json.dumps(config, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def _atomic_write(path: Path, data: bytes) -> None:
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def diff_configs(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    """Rule-level diff between two configs"""
+    old_rules = {r.get('id'): r for r in old.get('rules', [])}
+    new_rules = {r.get('id'): r for r in new.get('rules', [])}
+
+    changed = {}
+    for rule_id in old_rules.keys() & new_rules.keys():
+        before, after = old_rules[rule_id], new_rules[rule_id]
+        if before != after:
+            changed[rule_id] = sorted(
+                key for key in before.keys() | after.keys() if before.get(key) != after.get(key)
+            )
+
+    common_old = [rid for rid in old_rules if rid in new_rules]
+    common_new = [rid for rid in new_rules if rid in old_rules]
+
+    return {
+        'added': [rid for rid in new_rules if rid not in old_rules],
+        'removed': [rid for rid in old_rules if rid not in new_rules],
+        'changed': changed,
+        'reordered': common_old != common_new,
+        'settings_changed': sorted(
+            key for key in (old.keys() | new.keys()) - {'rules'} if old.get(key) != new.get(key)
+        ),
+    }
+
+
+class SnapshotStore:
+    """Content-addressed, deduplicated store of config snapshots
+
+    Each distinct config is stored once as compressed compact JSON under
+    objects/<hash[:2]>/<hash>.json.z. History is an append-only index
+    (index.jsonl, one entry per snapshot) held in memory for O(1) lookups by
+    hash or by (version, seq).
+
+    Several processes (e.g. forked API workers) may share one store: writes
+    take an exclusive lock on index.lock, and every operation first picks up
+    index lines appended (or an index rewritten) by other processes.
+    """
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+        self.objects_dir = self.root / "objects"
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self.index_path = self.root / "index.jsonl"
+        self.lock_path = self.root / "index.lock"
+        self._lock = threading.Lock()
+        self._history: Dict[str, List[Dict[str, Any]]] = {}
+        self._by_seq: Dict[tuple, Dict[str, Any]] = {}
+        self._index_id: Optional[tuple] = None
+        self._offset = 0
+        self._refresh()
+
+    @contextmanager
+    def _locked(self, shared: bool = False) -> Iterator[None]:
+        """Hold the thread lock and the cross-process file lock, with the index up to date"""
+        with self._lock:
+            if fcntl is None:
+                self._refresh()
+                yield
+                return
+            with open(self.lock_path, 'a') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+                try:
+                    self._refresh()
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _refresh(self) -> None:
+        """Read index lines written since the last refresh (all of it if it was rewritten)"""
+        try:
+            stat = os.stat(self.index_path)
+        except FileNotFoundError:
+            self._history, self._by_seq, self._index_id, self._offset = {}, {}, None, 0
+            return
+        index_id = (stat.st_dev, stat.st_ino)
+        if index_id != self._index_id or stat.st_size < self._offset:
+            self._history, self._by_seq = {}, {}
+            self._index_id, self._offset = index_id, 0
+        if stat.st_size == self._offset:
+            return
+        with open(self.index_path, 'rb') as f:
+            f.seek(self._offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                self._offset += len(line)
+                line = line.strip()
+                if line:
+                    self._add_entry(json.loads(line))
+
+    def _add_entry(self, entry: Dict[str, Any]) -> None:
+        self._history.setdefault(entry['version'], []).append(entry)
+        self._by_seq[(entry['version'], entry['seq'])] = entry
+
+    def _object_path(self, digest: str) -> Path:
+        return self.objects_dir / digest[:2] / f"{digest}.json.z"
+
+    def has_object(self, digest: str) -> bool:
+        return self._object_path(digest).exists()
+
+    def put(
+        self,
+        config: Dict[str, Any],
+        version: str,
+        timestamp: Optional[datetime] = None,
+        note: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Record a snapshot of config for a version and return its index entry
+
+        The config body is only written if no identical config is stored yet; a
+        save identical to the version's latest snapshot adds no entry.
+        """
+        digest = content_hash(config)
+        with self._locked():
+            history = self._history.get(version)
+            latest = history[-1] if history else None
+            if latest is not None and latest['hash'] == digest:
+                return latest
+
+            path = self._object_path(digest)
+            if not path.exists():
+                path.parent.mkdir(exist_ok=True)
+                body = json.dumps(config, separators=(',', ':'), default=str).encode()
+                _atomic_write(path, zlib.compress(body, 6))
+
+            entry = {
+                'version': version,
+                'seq': latest['seq'] + 1 if latest is not None else 1,
+                'hash': digest,
+                'timestamp': (timestamp or datetime.now()).isoformat(timespec='seconds'),
+            }
+            if note:
+                entry['note'] = note
+
+            line = (json.dumps(entry, separators=(',', ':')) + "\n").encode()
+            with open(self.index_path, 'ab') as f:
+                f.write(line)
+            self._refresh()
+            return entry
+
+    def get(self, digest: str) -> Dict[str, Any]:
+        """Load a stored config by content hash"""
+        path = self._object_path(digest)
+        if not path.exists():
+            raise KeyError(f"Snapshot {digest} not found")
+        with open(path, 'rb') as f:
+            return json.loads(zlib.decompress(f.read()))
+
+    def entry(self, version: str, seq: int) -> Dict[str, Any]:
+        """Index entry for snapshot number seq of a version"""
+        with self._locked(shared=True):
+            entry = self._by_seq.get((version, seq))
+        if entry is None:
+            raise KeyError(f"Snapshot {seq} of {version} not found")
+        return entry
+
+    def resolve(self, version: str, ref: str) -> str:
+        """Resolve a snapshot reference (sequence number or hash prefix) to a hash"""
+        if ref.isdigit():
+            return self.entry(version, int(ref))['hash']
+        matches = {e['hash'] for e in self.history(version) if e['hash'].startswith(ref)}
+        if len(matches) != 1:
+            raise KeyError(f"Snapshot {ref} of {version} not found or ambiguous")
+        return matches.pop()
+
+    def latest(self, version: str) -> Optional[Dict[str, Any]]:
+        with self._locked(shared=True):
+            history = self._history.get(version)
+            return history[-1] if history else None
+
+    def history(self, version: str) -> List[Dict[str, Any]]:
+        """Snapshot entries for a version, oldest first"""
+        with self._locked(shared=True):
+            return list(self._history.get(version, []))
+
+    def count(self, version: str) -> int:
+        with self._locked(shared=True):
+            return len(self._history.get(version, ()))
+
+    def versions(self) -> List[str]:
+        with self._locked(shared=True):
+            return sorted(self._history)
+
+    def diff(self, old_hash: str, new_hash: str) -> Dict[str, Any]:
+        """Rule-level diff between two stored configs"""
+        return diff_configs(self.get(old_hash), self.get(new_hash))
+
+    def apply_retention(
+        self,
+        keep_last: Optional[int] = None,
+        max_age_days: Optional[float] = None
+    ) -> int:
+        """Drop old history entries and compact; returns the number of entries removed
+
+        The latest snapshot of every version is always kept.
+        """
+        cutoff = None
+        if max_age_days is not None:
+            cutoff = (datetime.now() - timedelta(days=max_age_days)).isoformat(timespec='seconds')
+
+        removed = 0
+        with self._locked():
+            for version, history in self._history.items():
+                kept = history
+                if keep_last is not None:
+                    kept = kept[-max(keep_last, 1):]
+                if cutoff is not None:
+                    kept = [e for e in kept[:-1] if e['timestamp'] >= cutoff] + kept[-1:]
+                removed += len(history) - len(kept)
+                self._history[version] = kept
+            self._compact()
+        return removed
+
+    def compact(self) -> None:
+        """Rewrite the index and delete objects no entry references"""
+        with self._locked():
+            self._compact()
+
+    def _compact(self) -> None:
+        """Rewrite the index from the (freshly refreshed) history; call with the lock held"""
+        entries = [e for history in self._history.values() for e in history]
+        lines = "".join(json.dumps(e, separators=(',', ':')) + "\n" for e in entries)
+        _atomic_write(self.index_path, lines.encode())
+        stat = os.stat(self.index_path)
+        self._index_id, self._offset = (stat.st_dev, stat.st_ino), stat.st_size
+
+        self._by_seq = {(e['version'], e['seq']): e for e in entries}
+        # Safe to delete: other processes only write objects while holding the lock
+        referenced = {e['hash'] for e in entries}
+        for path in self.objects_dir.glob("*/*.json.z"):
+            if path.name[:-len(".json.z")] not in referenced:
+                path.unlink()
@@ -0,0 +1,400 @@
+"""
+Append-only store of evaluation traces, encoded against their config
+
+A full EvaluationTrace repeats every rule's id, name and logic and every
+condition's field, operator and expected value. Those only depend on the
+config, so the store writes them once per file as a config record and each
+trace as:
+
+    ["t", transaction_id, stored_at, config_id, matched_rule_index,
+     total_ms, condition_bitmask, [values of the referenced fields]]
+
+Bit i of the hex bitmask is whether the i-th condition of the config (rules in
+order, conditions in order) passed. Rule matches are derived from the bits and
+the rule logic when the trace is expanded. Per-rule timings are not kept.
+
+Files are newline-delimited JSON named traces-<start time>-<pid>.ndjson, so
+several worker processes can write to one directory; each file is readable on
+its own. Old files are deleted beyond max_files.
+
+Lookups use an in-memory index of the most recently stored transaction ids
+(max_indexed). Older ids are found by searching the file regions whose index
+entries were evicted for the record prefix ["t","<transaction id>",.
+"""
+
+import atexit
+import hashlib
+import json
+import os
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from .models import ConditionEvaluation, EvaluationTrace, RuleEvaluation
+from .rule_engine import RuleEngine
+
+FILE_PREFIX = "traces-"
+FILE_SUFFIX = ".ndjson"
+
+
+def config_template(engine: RuleEngine) -> Dict[str, Any]:
+    """What a trace repeats for every record: rules, conditions and referenced fields"""
+    fields: Dict[str, int] = {}
+    rules = []
+    for rule in engine.rules:
+        conditions = []
+        # ALWAYS rules are traced without conditions
+        rule_conditions = [] if rule.get('logic') == 'ALWAYS' else rule.get('conditions') or []
+        for condition in rule_conditions:
+            value_field = condition.get('value_field')
+            if value_field is not None:
+                expected = None
+            elif 'value_file' in condition:
+                expected = condition['value_file']
+            else:
+                expected = condition.get('value')
+            fields.setdefault(condition['field'], len(fields))
+            if value_field is not None:
+                fields.setdefault(value_field, len(fields))
+            conditions.append([condition['field'], condition['operator'], expected, value_field])
+        rules.append({
+            'id': rule['id'],
+            'name': rule['name'],
+            'logic': rule.get('logic', 'AND'),
+            'conditions': conditions,
+        })
+    return {'version': engine.version, 'fields': list(fields), 'rules': rules}
+
+
+def _digest(template: Dict[str, Any]) -> str:
+    encoded = json.dumps(template, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.blake2b(encoded.encode(), digest_size=16).hexdigest()
+
+
+def encode_trace(template: Dict[str, Any], trace: EvaluationTrace) -> Tuple[int, List[Any]]:
+    """(condition bitmask, field values) of a trace produced by the template's engine"""
+    rules = template['rules']
+    if len(trace.evaluated_rules) != len(rules):
+        raise ValueError(
+            f"Trace has {len(trace.evaluated_rules)} rules, config has {len(rules)}"
+        )
+    slots = {field: i for i, field in enumerate(template['fields'])}
+    values: List[Any] = [None] * len(slots)
+    mask = 0
+    bit = 0
+    for rule, rule_eval in zip(rules, trace.evaluated_rules):
+        if rule_eval.rule_id != rule['id'] or len(rule_eval.conditions) != len(rule['conditions']):
+            raise ValueError(f"Trace does not match config at rule {rule['id']}")
+        for condition, cond_eval in zip(rule['conditions'], rule_eval.conditions):
+            if cond_eval.passed:
+                mask |= 1 << bit
+            bit += 1
+            values[slots[condition[0]]] = cond_eval.actual_value
+            if condition[3] is not None:
+                values[slots[condition[3]]] = cond_eval.expected_value
+    return mask, values
+
+
+def decode_trace(
+    template: Dict[str, Any],
+    transaction_id: str,
+    matched_rule_index: int,
+    total_ms: float,
+    mask: int,
+    values: List[Any]
+) -> EvaluationTrace:
+    """Expand an encoded trace back into the EvaluationTrace the engine returned"""
+    by_field = dict(zip(template['fields'], values))
+    evaluated_rules = []
+    bit = 0
+    for rule in template['rules']:
+        conditions = []
+        for field, operator, expected, value_field in rule['conditions']:
+            conditions.append(ConditionEvaluation(
+                field=field,
+                operator=operator,
+                expected_value=by_field.get(value_field) if value_field is not None else expected,
+                actual_value=by_field.get(field),
+                passed=bool(mask >> bit & 1),
+                value_field=value_field
+            ))
+            bit += 1
+        logic = rule['logic']
+        passed = [c.passed for c in conditions]
+        if logic == 'ALWAYS':
+            matched = True
+        elif not conditions:
+            matched = False
+        elif logic == 'AND':
+            matched = all(passed)
+        elif logic == 'OR':
+            matched = any(passed)
+        else:
+            matched = False
+        evaluated_rules.append(RuleEvaluation(
+            rule_id=rule['id'],
+            rule_name=rule['name'],
+            conditions=conditions,
+            logic=logic,
+            matched=matched,
+            timestamp_ms=0.0
+        ))
+    return EvaluationTrace(
+        transaction_id=transaction_id,
+        evaluated_rules=evaluated_rules,
+        matched_rule_index=matched_rule_index,
+        total_evaluation_time_ms=total_ms,
+        config_version=template['version']
+    )
+
+
+class TraceStore:
+    """Append-only, compactly encoded trace storage with lookup by transaction id
+
+    put() encodes a trace and appends it to this process's current file (buffered;
+    flushed at least every flush_interval seconds and before reads). get() finds
+    every stored trace of a transaction, including ones written by other
+    processes sharing the directory: files are indexed incrementally as they grow.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        max_file_bytes: int = 64 * 1024 * 1024,
+        max_files: int = 32,
+        flush_interval: float = 1.0,
+        max_indexed: int = 1_000_000
+    ):
+        """
+        Args:
+            directory: Where trace files are written (created if missing)
+            max_file_bytes: Start a new file above this size
+            max_files: Files kept; the oldest are deleted (with their traces)
+            flush_interval: Longest time (seconds) a trace stays in the write buffer
+            max_indexed: Transaction ids kept in the lookup index; older ones are
+                found by scanning the files they were evicted from
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_file_bytes = max_file_bytes
+        self.max_files = max_files
+        self.flush_interval = flush_interval
+        self.max_indexed = max_indexed
+        self._templates: 'weakref.WeakKeyDictionary[RuleEngine, Tuple[str, Dict[str, Any]]]' = (
+            weakref.WeakKeyDictionary()
+        )
+        self._reset()
+        ref = weakref.ref(self)
+        # A forked worker process must not share its parent's open file
+        os.register_at_fork(after_in_child=lambda: ref() is not None and ref()._reset())
+        atexit.register(lambda: ref() is not None and ref().close())
+
+    def _reset(self) -> None:
+        self._lock = threading.Lock()
+        self._file = None
+        self._path: Optional[Path] = None
+        self._size = 0
+        self._config_ids: Dict[str, int] = {}
+        self._last_flush = 0.0
+        # Read side: transaction id -> [(path, offset)] of the most recent ids, and
+        # per file the end of the region holding records evicted from the index
+        self._index: 'OrderedDict[str, List[Tuple[Path, int]]]' = OrderedDict()
+        self._evicted: Dict[Path, int] = {}
+        self._offsets: Dict[Path, int] = {}
+        self._configs: Dict[Tuple[Path, int], Dict[str, Any]] = {}
+
+    def _template(self, engine: RuleEngine) -> Tuple[str, Dict[str, Any]]:
+        entry = self._templates.get(engine)
+        if entry is None:
+            template = config_template(engine)
+            entry = self._templates[engine] = (_digest(template), template)
+        return entry
+
+    # -- writing -------------------------------------------------------------
+
+    def _open(self) -> None:
+        if self._file is not None:
+            self._file.close()
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+        self._path = self.directory / f"{FILE_PREFIX}{stamp}-{os.getpid()}{FILE_SUFFIX}"
+        self._file = open(self._path, "a", encoding="utf-8")
+        self._size = 0
+        self._config_ids = {}
+        self._prune()
+
+    def _prune(self) -> None:
+        files = self.files()
+        for path in files[:max(0, len(files) - self.max_files)]:
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+
+    def _append(self, record: List[Any]) -> None:
+        line = json.dumps(record, separators=(",", ":"), default=str) + "\n"
+        self._file.write(line)
+        self._size += len(line)
+
+    def put(self, engine: RuleEngine, trace: EvaluationTrace) -> None:
+        """Store the trace of one evaluation by engine"""
+        digest, template = self._template(engine)
+        mask, values = encode_trace(template, trace)
+        with self._lock:
+            if self._file is None or self._size >= self.max_file_bytes:
+                self._open()
+            config_id = self._config_ids.get(digest)
+            if config_id is None:
+                config_id = self._config_ids[digest] = len(self._config_ids)
+                self._append(["c", config_id, digest, template])
+            self._append([
+                "t", trace.transaction_id, round(time.time(), 6), config_id,
+                trace.matched_rule_index, round(trace.total_evaluation_time_ms, 4),
+                format(mask, "x"), values
+            ])
+            now = time.monotonic()
+            if now - self._last_flush >= self.flush_interval:
+                self._file.flush()
+                self._last_flush = now
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+                self._last_flush = time.monotonic()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    # -- reading -------------------------------------------------------------
+
+    def files(self) -> List[Path]:
+        """Trace files, oldest first"""
+        return sorted(
+            (p for p in self.directory.glob(f"{FILE_PREFIX}*{FILE_SUFFIX}")),
+            key=lambda p: p.name[len(FILE_PREFIX):]
+        )
+
+    def _refresh(self) -> None:
+        """Index records appended to any file since the last refresh"""
+        files = self.files()
+        live = set(files)
+        removed = [p for p in self._offsets if p not in live]
+        if removed:
+            for path in removed:
+                del self._offsets[path]
+                self._evicted.pop(path, None)
+            for key in [k for k in self._configs if k[0] not in live]:
+                del self._configs[key]
+            for txid in list(self._index):
+                kept = [loc for loc in self._index[txid] if loc[0] in live]
+                if kept:
+                    self._index[txid] = kept
+                else:
+                    del self._index[txid]
+
+        for path in files:
+            offset = self._offsets.get(path, 0)
+            try:
+                with open(path, "rb") as f:
+                    f.seek(offset)
+                    for line in f:
+                        if not line.endswith(b"\n"):
+                            break  # Partially written; picked up next time
+                        try:
+                            record = json.loads(line)
+                        except ValueError:
+                            offset += len(line)
+                            continue
+                        if record[0] == "c":
+                            self._configs[(path, record[1])] = record[3]
+                        elif record[0] == "t":
+                            self._add(record[1], path, offset)
+                        offset += len(line)
+            except FileNotFoundError:
+                continue
+            self._offsets[path] = offset
+
+    def _add(self, transaction_id: str, path: Path, offset: int) -> None:
+        locations = self._index.get(transaction_id)
+        if locations is None:
+            self._index[transaction_id] = [(path, offset)]
+        else:
+            locations.append((path, offset))
+            self._index.move_to_end(transaction_id)
+        while len(self._index) > self.max_indexed:
+            _, evicted = self._index.popitem(last=False)
+            for evicted_path, evicted_offset in evicted:
+                end = self._evicted.get(evicted_path, 0)
+                self._evicted[evicted_path] = max(end, evicted_offset + 1)
+
+    def _scan(self, path: Path, end: int, transaction_id: str) -> List[int]:
+        """Offsets of the transaction's trace records starting before end in a file"""
+        needle = ("\n" + json.dumps(["t", transaction_id], separators=(",", ":"))[:-1] + ",")
+        needle = needle.encode()
+        try:
+            with open(path, "rb") as f:
+                # The region is searched whole; a record may extend past its end
+                data = b"\n" + f.read(self._offsets.get(path, end))
+        except FileNotFoundError:
+            return []
+        found = []
+        at = data.find(needle)
+        while at != -1 and at < end:
+            found.append(at)  # data is shifted by the leading newline
+            at = data.find(needle, at + 1)
+        return found
+
+    def _read(self, path: Path, offset: int) -> Optional[List[Any]]:
+        try:
+            with open(path, "rb") as f:
+                f.seek(offset)
+                return json.loads(f.readline())
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def get(self, transaction_id: str) -> List[Dict[str, Any]]:
+        """Every stored trace of a transaction, oldest first
+
+        Returns dicts with stored_at (epoch seconds), config_version and trace
+        (the expanded EvaluationTrace).
+        """
+        self.flush()
+        with self._lock:
+            self._refresh()
+            locations = list(self._index.get(transaction_id, []))
+            evicted = dict(self._evicted)
+            configs = dict(self._configs)
+        for path, end in evicted.items():
+            locations.extend((path, offset) for offset in self._scan(path, end, transaction_id))
+
+        out = []
+        for path, offset in sorted(set(locations)):
+            record = self._read(path, offset)
+            if record is None:
+                continue
+            _, txid, stored_at, config_id, matched, total_ms, mask, values = record
+            template = configs.get((path, config_id))
+            if template is None:
+                continue
+            out.append({
+                'stored_at': stored_at,
+                'config_version': template['version'],
+                'trace': decode_trace(template, txid, matched, total_ms, int(mask, 16), values),
+            })
+        out.sort(key=lambda t: t['stored_at'])
+        return out
+
+    def stats(self) -> Dict[str, Any]:
+        files = self.files()
+        return {
+            'files': len(files),
+            'bytes': sum(p.stat().st_size for p in files if p.exists()),
+            'current_file': self._path.name if self._path else None,
+            'indexed_transactions': len(self._index),
+        }
@@ -0,0 +1,343 @@
+from typing import Any, Dict, Hashable, List, Optional
+import numpy as np
+import pandas as pd
+from .all_matches import SEVERITY, ScoreAggregator, fallback_index
+from .expressions import DerivedFields
+from .lists import MappedList
+from .operators import compile_condition, load_list
+from .rule_engine import RuleEngine
+
+
+def freeze(value: Any) -> Hashable:
+    """Hashable form of a condition value (lists become tuples)"""
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, freeze(v)) for k, v in value.items()))
+    return value
+
+
+def condition_key(condition: dict, derived: Optional[DerivedFields] = None) -> Hashable:
+    """Identity of a condition, shared by every rule (and config) using it
+
+    Conditions on derived fields only share an identity when the derived
+    field definitions are the same.
+    """
+    field, value_field = condition.get('field'), condition.get('value_field')
+    key = (
+        field, condition.get('operator'), freeze(condition.get('value')), value_field,
+        condition.get('value_file')
+    )
+    if derived:
+        key += (derived.signature(field), derived.signature(value_field))
+    return key
+
+
+class PredicateCache:
+    """Condition masks over one DataFrame, computed once and shared across rule sets
+
+    Null values (None/NaN) and missing columns are treated like missing record
+    fields in RuleEngine.evaluate_condition(): the condition is False. Derived
+    field columns are computed on first use and cached by their definition.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self.n = len(df)
+        self._masks: Dict[Hashable, np.ndarray] = {}
+        self._notna: Dict[Hashable, np.ndarray] = {}
+        self._derived: Dict[Hashable, pd.Series] = {}
+
+    def __len__(self) -> int:
+        return len(self._masks)
+
+    def column(self, field: str, derived: Optional[DerivedFields] = None) -> Optional[pd.Series]:
+        """A record field's column, or a derived field computed over the frame (None if neither)
+
+        As in RecordView, a column named like a derived field takes precedence
+        except in null rows, which get the derived value.
+        """
+        is_derived = bool(derived) and field in derived
+        if field in self.df.columns:
+            col = self.df[field]
+            if not is_derived:
+                return col
+            key = (field, derived.signature(field))
+            merged = self._derived.get(key)
+            if merged is None:
+                nulls = col.isna()
+                merged = col
+                if nulls.any():
+                    merged = col.astype(object).where(~nulls, self._derived_column(field, derived))
+                self._derived[key] = merged
+            return merged
+        if not is_derived:
+            return None
+        return self._derived_column(field, derived)
+
+    def _derived_column(self, field: str, derived: DerivedFields) -> pd.Series:
+        signature = derived.signature(field)
+        col = self._derived.get(signature)
+        if col is None:
+            def lookup(name):
+                c = self.column(name, derived)
+                return c if c is not None else pd.Series([None] * self.n, index=self.df.index, dtype=object)
+            col = derived.expressions[field].evaluate_columns(lookup, self.n)
+            self._derived[signature] = col
+        return col
+
+    def notna(self, field: str, derived: Optional[DerivedFields] = None) -> np.ndarray:
+        if derived and field in derived:
+            signature = derived.signature(field)
+            key = (field, signature) if field in self.df.columns else signature
+        else:
+            key = field
+        if key not in self._notna:
+            self._notna[key] = self.column(field, derived).notna().to_numpy()
+        return self._notna[key]
+
+    def mask(
+        self,
+        condition: dict,
+        derived: Optional[DerivedFields] = None,
+        base_dir: Optional[str] = None
+    ) -> np.ndarray:
+        """Rows where the condition holds
+
+        Args:
+            condition: Rule condition
+            derived: Derived fields of the config the condition belongs to
+            base_dir: Directory value_file paths are relative to
+        """
+        key = condition_key(condition, derived)
+        mask = self._masks.get(key)
+        if mask is None:
+            mask = self._compute(condition, derived, base_dir)
+            self._masks[key] = mask
+        return mask
+
+    def _compute(
+        self,
+        condition: dict,
+        derived: Optional[DerivedFields] = None,
+        base_dir: Optional[str] = None
+    ) -> np.ndarray:
+        field = condition['field']
+        operator = condition['operator']
+        value_field = condition.get('value_field')
+
+        if operator not in RuleEngine.OPERATORS:
+            raise ValueError(f"Unknown operator: {operator}")
+        col = self.column(field, derived)
+        if col is None:
+            return np.zeros(self.n, dtype=bool)
+        present = self.notna(field, derived)
+
+        if value_field is not None:
+            other = self.column(value_field, derived)
+            if other is None:
+                return np.zeros(self.n, dtype=bool)
+            present = present & self.notna(value_field, derived)
+            expected = other
+        else:
+            expected = condition.get('value')
+
+        if 'value_file' in condition and operator in ('in', 'not_in'):
+            # File lists hold strings; values are compared by their string form
+            members = load_list(condition['value_file'], operator, base_dir)
+            if isinstance(members, MappedList):
+                mask = members.contains_many(col.astype(str).to_numpy(dtype=object))
+            else:
+                mask = col.astype(str).isin(list(members)).to_numpy(dtype=bool)
+            return (~mask if operator == 'not_in' else mask) & present
+        elif 'value_file' in condition:
+            test = compile_condition(condition, RuleEngine.OPERATORS[operator], base_dir)
+            return self._elementwise_test(col, test, present)
+        elif operator in ('prefix', 'cidr', 'regex') and value_field is None:
+            test = compile_condition(condition, RuleEngine.OPERATORS[operator], base_dir)
+            return self._elementwise_test(col, test, present)
+        elif operator == 'between' and value_field is None:
+            low, high = expected
+            try:
+                mask = col.between(low, high).to_numpy(dtype=bool, na_value=False)
+            except TypeError:
+                return self._elementwise(col, operator, expected, present)
+        elif value_field is not None and operator not in ('>', '<', '>=', '<=', '==', '!='):
+            return self._elementwise(col, operator, expected, present)
+        elif operator in ('in', 'not_in') and isinstance(expected, (list, tuple, set, frozenset)):
+            mask = col.isin(list(expected)).to_numpy(dtype=bool)
+            if operator == 'not_in':
+                mask = ~mask
+        elif operator in ('in', 'not_in'):
+            # e.g. substring checks against a string value
+            return self._elementwise(col, operator, expected, present)
+        else:
+            try:
+                mask = RuleEngine.OPERATORS[operator](col, expected)
+                mask = np.asarray(mask.to_numpy(dtype=bool, na_value=False), dtype=bool)
+            except TypeError:
+                return self._elementwise(col, operator, expected, present)
+
+        return mask & present
+
+    def _elementwise_test(self, col: pd.Series, test, present: np.ndarray) -> np.ndarray:
+        values = col.to_numpy(dtype=object)
+        return np.fromiter(
+            (bool(p) and bool(test(v)) for v, p in zip(values, present)),
+            dtype=bool, count=len(values)
+        )
+
+    def _elementwise(self, col: pd.Series, operator: str, expected: Any, present: np.ndarray) -> np.ndarray:
+        op_func = RuleEngine.OPERATORS[operator]
+        values = col.to_numpy(dtype=object)
+        if isinstance(expected, pd.Series):
+            pairs = zip(values, expected.to_numpy(dtype=object))
+        else:
+            pairs = ((v, expected) for v in values)
+        return np.fromiter(
+            (bool(p) and bool(op_func(v, e)) for (v, e), p in zip(pairs, present)),
+            dtype=bool, count=len(values)
+        )
+
+
+class VectorizedRuleSet:
+    """Evaluate an ordered rule list over a DataFrame with boolean masks
+
+    Produces the same first-match outcome as RuleEngine.evaluate() for every row.
+    """
+
+    def __init__(self, config: Dict[str, Any], base_dir: Optional[str] = None):
+        self.config = config
+        self.base_dir = base_dir
+        self.rules = config['rules']
+        self.version = config.get('version')
+        self.rule_ids = [r['id'] for r in self.rules]
+        self.derived = DerivedFields.from_config(config)
+
+        outcomes = [r['outcome'] for r in self.rules]
+        self.risk_scores = np.array([o['risk_score'] for o in outcomes], dtype=np.int64)
+        self.decisions = np.array([o['decision'] for o in outcomes], dtype=object)
+
+    @classmethod
+    def from_engine(cls, engine: RuleEngine) -> 'VectorizedRuleSet':
+        return cls(engine.config, engine.base_dir)
+
+    def rule_mask(self, rule: dict, cache: PredicateCache) -> np.ndarray:
+        """Rows where the rule's conditions hold (ignoring rule order)"""
+        logic = rule.get('logic')
+        if logic == 'ALWAYS':
+            return np.ones(cache.n, dtype=bool)
+
+        conditions = rule.get('conditions', [])
+        if not conditions or logic not in ('AND', 'OR'):
+            return np.zeros(cache.n, dtype=bool)
+
+        derived, base_dir = self.derived, self.base_dir
+        mask = cache.mask(conditions[0], derived, base_dir).copy()
+        for condition in conditions[1:]:
+            if logic == 'AND':
+                mask &= cache.mask(condition, derived, base_dir)
+            else:
+                mask |= cache.mask(condition, derived, base_dir)
+        return mask
+
+    def rule_masks(self, cache: PredicateCache) -> List[np.ndarray]:
+        return [self.rule_mask(rule, cache) for rule in self.rules]
+
+    def first_match(
+        self,
+        cache: PredicateCache,
+        rule_masks: Optional[List[np.ndarray]] = None,
+        rows: Optional[np.ndarray] = None,
+        start: int = 0
+    ) -> np.ndarray:
+        """Index of the first matching rule per row (-1 if none matches)
+
+        Args:
+            cache: Predicate cache over the dataset
+            rule_masks: Precomputed rule masks (computed lazily otherwise)
+            rows: Only evaluate these row positions (returns one index per row)
+            start: Only consider rules from this position onward
+        """
+        n = cache.n if rows is None else len(rows)
+        first = np.full(n, -1, dtype=np.int64)
+        pending = np.ones(n, dtype=bool)
+
+        for idx in range(start, len(self.rules)):
+            if rule_masks is not None:
+                mask = rule_masks[idx]
+            else:
+                mask = self.rule_mask(self.rules[idx], cache)
+            if rows is not None:
+                mask = mask[rows]
+            hit = mask & pending
+            first[hit] = idx
+            pending &= ~hit
+            if not pending.any():
+                break
+
+        return first
+
+    def outcomes(self, first: np.ndarray) -> pd.DataFrame:
+        """Decision columns for first-match indices"""
+        if (first < 0).any():
+            raise ValueError("No matching rule found and no DEFAULT rule defined")
+        ids = np.array(self.rule_ids, dtype=object)
+        return pd.DataFrame({
+            'matched_rule_id': ids[first],
+            'risk_score': self.risk_scores[first],
+            'decision': self.decisions[first],
+        })
+
+    def evaluate(self, df: pd.DataFrame, cache: Optional[PredicateCache] = None) -> pd.DataFrame:
+        """Evaluate every row and return matched rule id, risk score and decision"""
+        cache = cache or PredicateCache(df)
+        result = self.outcomes(self.first_match(cache))
+        result.index = df.index
+        return result
+
+    def all_matches(
+        self,
+        df: pd.DataFrame,
+        aggregate: str = "max",
+        cap: int = 100,
+        weights: Optional[Dict[str, float]] = None,
+        cache: Optional[PredicateCache] = None
+    ) -> pd.DataFrame:
+        """Every matching rule per row, like RuleEngine.evaluate_all()
+
+        Returns matched_mask (bit i = rules[i]; uint64 up to 64 rules, Python
+        ints beyond), match_count, score and decision columns. ALWAYS rules
+        only count for rows no other rule matched.
+        """
+        cache = cache or PredicateCache(df)
+        n_rules = len(self.rules)
+        matches = np.zeros((cache.n, n_rules), dtype=bool)
+        for idx, rule in enumerate(self.rules):
+            if rule.get('logic') != 'ALWAYS':
+                matches[:, idx] = self.rule_mask(rule, cache)
+        fallback = fallback_index(self.rules)
+        if fallback >= 0:
+            matches[:, fallback] = ~matches.any(axis=1)
+        if not matches.any(axis=1).all():
+            raise ValueError("No matching rule found and no DEFAULT rule defined")
+
+        if n_rules <= 64:
+            bits = np.left_shift(np.uint64(1), np.arange(n_rules, dtype=np.uint64))
+            mask = np.bitwise_or.reduce(np.where(matches, bits, np.uint64(0)), axis=1)
+        else:
+            mask = np.array(
+                [sum(1 << int(i) for i in np.flatnonzero(row)) for row in matches], dtype=object
+            )
+
+        severity = np.array([SEVERITY[d] for d in self.decisions], dtype=np.int64)
+        by_severity = np.array(sorted(SEVERITY, key=SEVERITY.__getitem__), dtype=object)
+        aggregator = ScoreAggregator(self.rules, aggregate, cap, weights)
+        result = pd.DataFrame({
+            'matched_mask': mask,
+            'match_count': matches.sum(axis=1),
+            'score': aggregator.score_columns(matches),
+            'decision': by_severity[np.where(matches, severity, -1).max(axis=1)],
+        })
+        result.index = df.index
+        return result
@@ -0,0 +1,142 @@
+"""
+Binary wire formats for evaluation requests and responses
+
+JSON stays the default. MessagePack carries the same documents (a transaction
+dict, a list of them, or the response object) in a smaller, faster to parse
+form. Arrow IPC streams carry batches column-wise: a table of transactions in,
+a table of decision columns out, evaluated by VectorizedRuleSet without
+building a dict per record.
+
+msgpack and pyarrow are optional (pip install "business-rules[binary]") and
+imported on first use.
+"""
+
+from typing import Any, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+from .vectorized import PredicateCache, VectorizedRuleSet
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+ARROW = "application/vnd.apache.arrow.stream"
+
+MEDIA_TYPES = (JSON, MSGPACK, ARROW)
+
+# Other names clients commonly send for the same formats
+ALIASES = {
+    "application/x-msgpack": MSGPACK,
+    "application/vnd.msgpack": MSGPACK,
+    "application/vnd.apache.arrow.file": ARROW,
+    "application/x-arrow": ARROW,
+}
+
+# Decision columns of an evaluated Arrow batch, in RuleResult field order
+RESULT_COLUMNS = (
+    "transaction_id", "matched_rule_id", "matched_rule_name", "risk_score", "decision",
+    "rule_reason",
+)
+
+
+def media_type(header: Optional[str]) -> Optional[str]:
+    """Canonical media type of a Content-Type header (None if absent or unsupported)"""
+    if not header:
+        return None
+    name = header.split(";", 1)[0].strip().lower()
+    name = ALIASES.get(name, name)
+    return name if name in MEDIA_TYPES else None
+
+
+def negotiate(
+    accept: Optional[str], default: str = JSON, supported: Sequence[str] = MEDIA_TYPES
+) -> Optional[str]:
+    """Response media type for an Accept header
+
+    The highest-q supported type wins; */* (or no header) gives default.
+    Returns None when nothing acceptable is supported.
+    """
+    if not accept:
+        return default
+    best: Tuple[float, int, Optional[str]] = (0.0, 0, None)
+    for position, part in enumerate(accept.split(",")):
+        name, *params = [p.strip() for p in part.split(";")]
+        q = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        name = name.lower()
+        if name in ("*/*", "application/*"):
+            name = default
+        name = ALIASES.get(name, name)
+        # Earlier entries win ties
+        if name in supported and q > 0 and (q, -position) > best[:2]:
+            best = (q, -position, name)
+    return best[2]
+
+
+def unpack(body: bytes) -> Any:
+    """Decode a MessagePack document"""
+    import msgpack
+    return msgpack.unpackb(body, raw=False, strict_map_key=False)
+
+
+def pack(document: Any) -> bytes:
+    """Encode a document as MessagePack (unknown types as their string form)"""
+    import msgpack
+    return msgpack.packb(document, use_bin_type=True, default=str)
+
+
+def read_table(body: bytes) -> pd.DataFrame:
+    """Columns of an Arrow IPC stream (or file) as a DataFrame
+
+    Numeric columns without nulls are converted without copying.
+    """
+    import pyarrow as pa
+    try:
+        table = pa.ipc.open_stream(pa.py_buffer(body)).read_all()
+    except pa.ArrowInvalid:
+        table = pa.ipc.open_file(pa.py_buffer(body)).read_all()
+    return table.to_pandas()
+
+
+def write_table(df: pd.DataFrame) -> bytes:
+    """A DataFrame as an Arrow IPC stream"""
+    import pyarrow as pa
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def evaluate_frame(rule_set: VectorizedRuleSet, df: pd.DataFrame) -> pd.DataFrame:
+    """RuleResult columns for every row, the column-wise equivalent of engine.evaluate()"""
+    first = rule_set.first_match(PredicateCache(df))
+    result = rule_set.outcomes(first)
+    rules = rule_set.rules
+    names = np.array([r['name'] for r in rules], dtype=object)
+    reasons = np.array([r['outcome']['reason'] for r in rules], dtype=object)
+    if 'transaction_id' in df.columns:
+        ids = df['transaction_id'].astype(object).where(df['transaction_id'].notna(), 'unknown')
+        transaction_ids = ids.astype(str).to_numpy(dtype=object)
+    else:
+        transaction_ids = np.full(len(df), 'unknown', dtype=object)
+    return pd.DataFrame({
+        'transaction_id': transaction_ids,
+        'matched_rule_id': result['matched_rule_id'].to_numpy(),
+        'matched_rule_name': names[first],
+        'risk_score': result['risk_score'].to_numpy(),
+        'decision': result['decision'].to_numpy(),
+        'rule_reason': reasons[first],
+    }, columns=list(RESULT_COLUMNS))
+
+
+def frame_records(df: pd.DataFrame) -> list:
+    """Rows as dicts (for JSON and MessagePack responses to Arrow requests)"""
+    return [
+        dict(zip(df.columns, row))
+        for row in zip(*(df[c].to_numpy(dtype=object).tolist() for c in df.columns))
+    ]
+
@@ -0,0 +1,7 @@
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+
+# Tests run against the source tree without installing the package
+sys.path.insert(0, str(ROOT / "src"))
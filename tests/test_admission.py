@@ -0,0 +1,62 @@
+import asyncio
+import threading
+
+import pytest
+
+from business_rules.admission import BUSY, TOO_LARGE, BulkExecutor, Rejected
+
+
+def test_cancelled_request_keeps_capacity_until_the_job_ends():
+    executor = BulkExecutor(max_inflight=1, max_queued_batches=0, max_queued_records=100)
+    started, finish = threading.Event(), threading.Event()
+
+    def job():
+        started.set()
+        finish.wait(5)
+        return 'done'
+
+    async def scenario():
+        task = asyncio.ensure_future(executor.run(job, 60))
+        await asyncio.get_running_loop().run_in_executor(None, started.wait, 5)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        # The job is still running on the worker thread
+        assert executor.stats()['admitted_records'] == 60
+        with pytest.raises(Rejected) as rejected:
+            await executor.run(lambda: None, 10)
+        assert rejected.value.reason == BUSY
+
+        finish.set()
+        for _ in range(100):
+            if executor.stats()['admitted_records'] == 0:
+                break
+            await asyncio.sleep(0.01)
+        assert executor.stats()['admitted_records'] == 0
+        assert await executor.run(lambda: 'next', 10) == 'next'
+
+    asyncio.run(scenario())
+    stats = executor.stats()
+    assert stats['completed'] == 2 and stats['failed'] == 0
+    executor.shutdown()
+
+
+def test_failures_and_oversized_jobs_are_counted():
+    executor = BulkExecutor(max_queued_records=100)
+
+    def fail():
+        raise RuntimeError("boom")
+
+    async def scenario():
+        with pytest.raises(RuntimeError):
+            await executor.run(fail, 10)
+        with pytest.raises(Rejected) as rejected:
+            await executor.run(lambda: None, 101)
+        assert rejected.value.reason == TOO_LARGE
+
+    asyncio.run(scenario())
+    stats = executor.stats()
+    assert stats['failed'] == 1 and stats['admitted_records'] == 0
+    assert stats['rejected'][TOO_LARGE] == 1
+    executor.shutdown()
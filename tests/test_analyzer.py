@@ -0,0 +1,171 @@
+"""Static analysis of rule configs, and pruning that must not change the first match"""
+
+import itertools
+import random
+
+import pytest
+
+from business_rules import RuleEngine
+from business_rules.analyzer import analyze_rules, prune_unreachable
+
+OUTCOME = {"risk_score": 50, "decision": "REVIEW", "reason": "test"}
+
+
+def rule(rule_id, *conditions, logic="AND"):
+    return {
+        "id": rule_id, "name": rule_id, "logic": logic,
+        "conditions": [{"field": f, "operator": op, "value": v} for f, op, v in conditions],
+        "outcome": OUTCOME,
+    }
+
+
+def always(rule_id="DEFAULT"):
+    return {"id": rule_id, "name": rule_id, "logic": "ALWAYS", "conditions": [], "outcome": OUTCOME}
+
+
+def kinds(rules):
+    return {f['rule_id']: (f['kind'], f['by']) for f in analyze_rules(rules)}
+
+
+def test_contradictory_conditions():
+    rules = [
+        rule("R1", ("x", ">", 5), ("x", "<", 3)),
+        rule("R2", ("c", "==", "a"), ("c", "in", ["b", "d"])),
+        rule("R3", ("x", "between", [4, 2])),
+        rule("R4", ("x", ">=", 3), ("x", "<=", 3)),  # x == 3 is still possible
+        always(),
+    ]
+    assert kinds(rules) == {
+        "R1": ("contradictory", []),
+        "R2": ("contradictory", []),
+        "R3": ("contradictory", []),
+    }
+
+
+def test_subsumed_by_one_earlier_rule():
+    rules = [
+        rule("R1", ("x", ">", 10)),
+        rule("R2", ("x", ">", 20), ("c", "==", "a")),
+        rule("R3", ("x", ">=", 10)),  # x == 10 is not covered
+        always(),
+    ]
+    assert kinds(rules) == {"R2": ("subsumed", ["R1"])}
+
+
+def test_unreachable_through_several_earlier_rules():
+    rules = [
+        rule("R1", ("x", "<", 5)),
+        rule("R2", ("x", "between", [5, 7])),
+        rule("R3", ("x", ">", 7), ("c", "!=", "a"), logic="OR"),
+        rule("R4", ("x", "between", [0, 10])),
+        rule("R5", ("y", ">", 0)),
+        always(),
+    ]
+    assert kinds(rules) == {"R4": ("unreachable", ["R1", "R2", "R3"])}
+
+
+def test_everything_after_always_is_unreachable():
+    rules = [always("CATCH_ALL"), rule("R1", ("x", ">", 1)), always()]
+    assert kinds(rules) == {
+        "R1": ("subsumed", ["CATCH_ALL"]),
+        "DEFAULT": ("subsumed", ["CATCH_ALL"]),
+    }
+    # ALWAYS rules are kept even when they can never fire
+    pruned, removed = prune_unreachable({"version": "t", "rules": rules})
+    assert removed == ["R1"]
+    assert [r['id'] for r in pruned['rules']] == ["CATCH_ALL", "DEFAULT"]
+
+
+def test_or_between_and_in_intervals():
+    rules = [
+        rule("R1", ("x", "<", 0), ("x", ">", 100), logic="OR"),
+        rule("R2", ("x", "between", [-5, -1])),
+        rule("R3", ("x", "between", [-5, 5])),  # 0..5 is not covered
+        rule("R4", ("c", "in", ["a", "b"]), ("y", "between", [0, 10]), logic="OR"),
+        rule("R5", ("c", "==", "b"), ("x", "between", [0, 100])),
+        rule("R6", ("y", "in", [0, 10]), ("x", "between", [-3, 0]), logic="OR"),
+        rule("R7", ("y", "in", [10, 11])),  # 11 is not covered
+        always(),
+    ]
+    assert kinds(rules) == {
+        "R2": ("subsumed", ["R1"]),
+        "R5": ("subsumed", ["R4"]),
+        "R6": ("unreachable", ["R1", "R2", "R3", "R4", "R5"]),
+    }
+
+
+def test_conditions_that_cannot_be_modeled_never_cover():
+    rules = [
+        rule("R1", ("c", "regex", "^a")),
+        rule("R2", ("c", "==", "a")),
+        # The regex is ignored when describing R3, which R1 still does not cover
+        rule("R3", ("x", ">", 5), ("c", "regex", "^a")),
+        rule("R4", ("x", ">", 5), ("c", "regex", "^b")),
+        always(),
+    ]
+    assert kinds(rules) == {}
+
+
+# Small domains so pruning has plenty of redundant rules to remove
+DOMAINS = {
+    "x": [0, 1, 2, 3, 4],
+    "c": ["a", "b", "c"],
+    "b": [True, False],
+}
+
+
+def random_condition(rng: random.Random) -> dict:
+    field = rng.choice(list(DOMAINS))
+    domain = DOMAINS[field]
+    ops = ["==", "!=", "in", "not_in"] + (
+        [">", "<", ">=", "<=", "between"] if field == "x" else []
+    )
+    if field == "c":
+        ops.append("regex")
+    op = rng.choice(ops)
+    if op == "between":
+        value = sorted(rng.sample(domain, 2))
+    elif op in ("in", "not_in"):
+        value = rng.sample(domain, rng.randint(1, len(domain) - 1))
+    elif op == "regex":
+        value = rng.choice(["^[ab]", "c", "z"])
+    else:
+        value = rng.choice(domain)
+    return {"field": field, "operator": op, "value": value}
+
+
+def random_config(rng: random.Random, n_rules: int) -> dict:
+    rules = []
+    for i in range(n_rules):
+        rules.append({
+            "id": f"R{i}",
+            "name": f"rule {i}",
+            "logic": rng.choice(["AND", "AND", "OR"]),
+            "conditions": [random_condition(rng) for _ in range(rng.randint(1, 3))],
+            "outcome": OUTCOME,
+        })
+    rules.append(always())
+    return {"version": "random", "rules": rules}
+
+
+# Every combination of field values, each field possibly missing
+GRID = [
+    {f: v for f, v in zip(DOMAINS, values) if v is not None}
+    for values in itertools.product(*([None] + DOMAINS[f] for f in DOMAINS))
+]
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_pruned_engine_gives_the_same_first_match(seed):
+    rng = random.Random(seed)
+    pruned_any = False
+    for _ in range(5):
+        config = random_config(rng, rng.randint(2, 12))
+        engine = RuleEngine.from_config(config)
+        pruned = RuleEngine.from_config(config, prune_unreachable=True)
+        pruned_any |= bool(pruned.pruned_rule_ids)
+        for record in GRID:
+            expected = engine.evaluate(record).matched_rule_id
+            actual = pruned.evaluate(record).matched_rule_id
+            assert actual == expected, f"full={expected} pruned={actual} record={record}"
+    assert pruned_any, "configs should have rules to prune"
@@ -0,0 +1,46 @@
+import gzip
+import json
+
+from business_rules.audit import AuditLog, AuditReader, _file_name
+
+
+def write_file(directory, start, pid, entries):
+    lines = "".join(json.dumps(e) + "\n" for e in entries)
+    with open(directory / _file_name(start, pid), "ab") as f:
+        f.write(gzip.compress(lines.encode()))
+
+
+def entry(ts, txid, decision="ALLOW"):
+    return {'ts': ts, 'transaction_id': txid, 'decision': decision, 'rule_id': 'R1'}
+
+
+def test_query_finds_entries_flushed_into_a_file_opened_after_end(tmp_path):
+    # Recorded at 100.5 and 101.0, written by a flush that opened a file at 101.2
+    write_file(tmp_path, 90.0, 1, [entry(95.0, 't1'), entry(99.0, 't2')])
+    write_file(tmp_path, 101.2, 1, [entry(100.5, 't3'), entry(101.0, 't4'), entry(101.5, 't5')])
+    write_file(tmp_path, 200.0, 1, [entry(200.0, 't6')])
+
+    found = AuditReader(str(tmp_path)).query(start=96.0, end=101.0)
+    assert [e['transaction_id'] for e in found] == ['t2', 't3', 't4']
+
+
+def test_query_merges_writers_in_time_order(tmp_path):
+    write_file(tmp_path, 10.0, 1, [entry(10.0, 'a1'), entry(12.0, 'a2', 'BLOCK')])
+    write_file(tmp_path, 10.5, 2, [entry(11.0, 'b1', 'BLOCK'), entry(13.0, 'b2')])
+
+    reader = AuditReader(str(tmp_path))
+    assert [e['transaction_id'] for e in reader.query()] == ['a1', 'b1', 'a2', 'b2']
+    assert [e['transaction_id'] for e in reader.query(decision='BLOCK')] == ['b1', 'a2']
+    assert [e['transaction_id'] for e in reader.query(limit=2)] == ['a1', 'b1']
+
+
+def test_logged_entries_are_queryable_after_flush(tmp_path):
+    log = AuditLog(str(tmp_path), flush_interval=0.05)
+    for n in range(100):
+        log.record(entry(1000.0 + n, f't{n}'))
+    assert log.flush(timeout=5.0)
+    log.close()
+
+    found = AuditReader(str(tmp_path)).query(start=1010.0, end=1019.0)
+    assert [e['transaction_id'] for e in found] == [f't{n}' for n in range(10, 20)]
+    assert log.stats()['written'] == 100
@@ -0,0 +1,70 @@
+import copy
+from collections import Counter
+from pathlib import Path
+
+import pytest
+import yaml
+
+from business_rules import FraudDataGenerator
+from business_rules.backtest import Backtester
+from business_rules.rule_engine import RuleEngine
+
+CONFIG = Path(__file__).parent.parent / "config" / "rules_v1.yaml"
+
+
+@pytest.fixture(scope="module")
+def df():
+    return FraudDataGenerator(seed=21).generate_columns(3000)
+
+
+@pytest.fixture(scope="module")
+def baseline():
+    return yaml.safe_load(open(CONFIG))
+
+
+@pytest.fixture(scope="module")
+def candidate(baseline):
+    candidate = copy.deepcopy(baseline)
+    candidate['version'] = 'draft'
+    candidate['rules'][0]['conditions'][0]['value'] = 1000
+    candidate['rules'][1]['outcome']['decision'] = 'REVIEW'
+    candidate['rules'].insert(2, copy.deepcopy(candidate['rules'][0]))
+    candidate['rules'][2]['id'] = 'SHADOWED'
+    return candidate
+
+
+def engine_results(config, df):
+    engine = RuleEngine.from_config(config, str(CONFIG.parent))
+    return [engine.evaluate(record) for record in df.to_dict('records')]
+
+
+def test_backtest_matches_row_wise_evaluation(df, baseline, candidate):
+    report = Backtester(df, str(CONFIG.parent)).run(baseline, candidate)
+    before, after = engine_results(baseline, df), engine_results(candidate, df)
+
+    flips = Counter(
+        (b.decision.value, a.decision.value) for b, a in zip(before, after)
+        if b.decision != a.decision
+    )
+    assert report.rows == len(df)
+    assert report.decision_changes == sum(flips.values())
+    assert report.decision_flips == {
+        old: {new: count for (o, new), count in flips.items() if o == old}
+        for old in {o for o, _ in flips}
+    }
+    assert report.matched_rule_changes == sum(
+        b.matched_rule_id != a.matched_rule_id for b, a in zip(before, after)
+    )
+
+    for impacts, results in ((report.baseline_rules, before), (report.candidate_rules, after)):
+        hits = Counter(r.matched_rule_id for r in results)
+        assert {i.rule_id: i.hits for i in impacts} == {i.rule_id: hits[i.rule_id] for i in impacts}
+
+    mean = sum(r.risk_score for r in after) / len(after)
+    assert report.candidate_scores.mean == pytest.approx(mean)
+
+
+def test_duplicate_rule_is_reported_shadowed(df, baseline, candidate):
+    report = Backtester(df, str(CONFIG.parent)).run(baseline, candidate)
+    shadowed = {i.rule_id for i in report.candidate_rules if i.shadowed}
+    assert 'SHADOWED' in shadowed
@@ -0,0 +1,65 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from business_rules.coalescer import BatchCoalescer
+
+
+def test_batches_run_off_the_event_loop():
+    threads = set()
+
+    def evaluate_batch(key, records):
+        threads.add(threading.get_ident())
+        time.sleep(0.05)
+        return [record['n'] * key for record in records]
+
+    coalescer = BatchCoalescer(evaluate_batch, max_batch=8, max_wait_ms=5)
+
+    async def scenario():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.005)
+                ticks += 1
+
+        tick_task = asyncio.ensure_future(ticker())
+        results = await asyncio.gather(*(coalescer.submit(10, {'n': n}) for n in range(16)))
+        tick_task.cancel()
+        return results, ticks, threading.get_ident()
+
+    results, ticks, loop_thread = asyncio.run(scenario())
+    assert results == [n * 10 for n in range(16)]
+    assert loop_thread not in threads
+    # The loop kept running while the two batches slept on a worker thread
+    assert ticks >= 5
+    stats = coalescer.stats()
+    assert stats['batches'] == 2 and stats['flushed_full'] == 2
+
+
+def test_a_bad_record_fails_only_its_own_request():
+    def evaluate_batch(key, records):
+        if any(record.get('bad') for record in records):
+            raise ValueError("bad record")
+        return [record['n'] for record in records]
+
+    coalescer = BatchCoalescer(evaluate_batch, max_batch=4, max_wait_ms=5)
+
+    async def scenario():
+        records = [{'n': 0}, {'n': 1, 'bad': True}, {'n': 2}]
+        return await asyncio.gather(
+            *(coalescer.submit('k', r) for r in records), return_exceptions=True
+        )
+
+    first, bad, last = asyncio.run(scenario())
+    assert (first, last) == (0, 2)
+    assert isinstance(bad, ValueError)
+    assert coalescer.stats()['retried_batches'] == 1
+
+
+def test_invalid_settings_are_rejected():
+    with pytest.raises(ValueError):
+        BatchCoalescer(lambda key, records: records, max_batch=0)
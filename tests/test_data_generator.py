@@ -0,0 +1,36 @@
+from datetime import datetime
+
+import pandas as pd
+
+from business_rules import FraudDataGenerator
+from business_rules.data_generator import SEEDED_END
+
+
+def test_seed_reproduces_the_dataset():
+    first = FraudDataGenerator(seed=3).generate_columns(2000)
+    second = FraudDataGenerator(seed=3).generate_columns(2000)
+    pd.testing.assert_frame_equal(first, second)
+
+
+def test_seeded_timestamps_default_to_a_fixed_range():
+    df = FraudDataGenerator(seed=3).generate_columns(2000)
+    stamps = pd.to_datetime(df['timestamp'])
+    assert stamps.min() >= SEEDED_END.replace(day=1)
+    assert stamps.max() < SEEDED_END
+
+
+def test_explicit_range_is_used():
+    start, end = datetime(2023, 1, 1), datetime(2023, 1, 2)
+    df = FraudDataGenerator(seed=3).generate_columns(500, start=start, end=end)
+    stamps = pd.to_datetime(df['timestamp'])
+    assert stamps.min() >= start and stamps.max() < end
+
+
+def test_chunks_are_reproducible_and_ids_unique():
+    chunks = list(FraudDataGenerator(seed=5).iter_chunks(2500, chunk_size=1000))
+    again = pd.concat(FraudDataGenerator(seed=5).iter_chunks(2500, chunk_size=1000))
+    df = pd.concat(chunks)
+    assert [len(c) for c in chunks] == [1000, 1000, 500]
+    pd.testing.assert_frame_equal(df, again)
+    assert df['transaction_id'].is_unique
+    assert list(df.index) == list(range(2500))
@@ -0,0 +1,177 @@
+import random
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+import yaml
+
+from business_rules import FraudDataGenerator
+from business_rules.data_validator import DataValidator
+from business_rules.schema import FeatureSchema
+
+ROOT = Path(__file__).parent.parent
+CONFIG = ROOT / "config" / "rules_v1.yaml"
+
+
+def row_wise(validator, df):
+    """The reference path: validate_transaction() on every row"""
+    errors = {}
+    for label, row in df.iterrows():
+        row_errors = validator.validate_transaction(row.to_dict())
+        if row_errors:
+            errors[label] = row_errors
+    return errors
+
+
+@pytest.fixture(params=["default", "rules_v1"])
+def validator(request):
+    if request.param == "default":
+        return DataValidator()
+    return DataValidator.from_config(yaml.safe_load(open(CONFIG)))
+
+
+def typed_frame():
+    """Numeric and boolean columns with valid, out-of-range and null values"""
+    return pd.DataFrame({
+        'transaction_id': ['t0', 't1', 't2', 't3', 't4', 't5'],
+        'transaction_amount': [10.0, -1.0, 2_000_000.0, np.nan, 0.0, 50.5],
+        'transaction_velocity_24h': [1, 3, -2, 0, 40, 7],
+        'merchant_category': ['retail', 'casino', None, 'crypto', 'travel', 'electronics'],
+        'is_new_device': [True, False, True, True, False, False],
+        'country_mismatch': [False, False, True, False, True, False],
+        'account_age_days': [10, 400, 0, -5, 30, 2],
+    }, index=[10, 11, 12, 13, 14, 15])
+
+
+def object_frame():
+    """Object columns mixing strings, numbers, booleans and None"""
+    return pd.DataFrame({
+        'transaction_id': ['t0', 't1', 't2', 't3', 't4', None],
+        'transaction_amount': [10, '12.5', None, True, 3.5, -4],
+        'transaction_velocity_24h': [1, 2.0, '3', None, -1, 5],
+        'merchant_category': ['retail', 'RETAIL', 3, None, 'gambling', 'travel'],
+        'is_new_device': [True, 'true', 1, None, False, np.bool_(True)],
+        'country_mismatch': [False, 0, 'no', True, None, False],
+        'account_age_days': [1, None, 'old', 3.0, -1, 7],
+    })
+
+
+def nullable_frame():
+    """Extension dtypes with missing values"""
+    return pd.DataFrame({
+        'transaction_id': pd.array(['t0', 't1', None, 't3'], dtype='string'),
+        'transaction_amount': pd.array([1.5, None, -3.0, 8.0], dtype='Float64'),
+        'transaction_velocity_24h': pd.array([1, None, 3, -4], dtype='Int64'),
+        'merchant_category': pd.Categorical(['retail', None, 'crypto', 'bogus']),
+        'is_new_device': pd.array([True, None, False, True], dtype='boolean'),
+        'country_mismatch': [False, True, False, True],
+        'account_age_days': pd.array([5, 6, None, 8], dtype='Int64'),
+    })
+
+
+def numeric_frame():
+    """Only numeric columns: rows upcast to float, so ints fail the int checks"""
+    return pd.DataFrame({
+        'transaction_amount': [1.0, -2.0, 3.0],
+        'transaction_velocity_24h': [1, 2, -3],
+        'account_age_days': [4, 5, 6],
+    })
+
+
+@pytest.mark.parametrize("make_frame", [typed_frame, object_frame, nullable_frame])
+def test_vectorized_matches_row_wise(validator, make_frame):
+    df = make_frame()
+    expected = row_wise(validator, df)
+    assert expected, "frame should contain invalid rows"
+    assert validator.validate_dataframe(df) == expected
+
+
+def test_vectorized_matches_row_wise_on_generated_data(validator):
+    df = FraudDataGenerator(seed=9).generate_columns(2000)
+    df.loc[df.index[::7], 'transaction_amount'] = -1.0
+    df.loc[df.index[::11], 'merchant_category'] = None
+    assert validator.validate_dataframe(df) == row_wise(validator, df)
+
+
+def test_all_numeric_frame_matches_row_wise():
+    schema = FeatureSchema({
+        'transaction_amount': {'type': 'float', 'min': 0},
+        'transaction_velocity_24h': {'type': 'int', 'min': 0},
+        'account_age_days': {'type': 'int', 'max': 5},
+    }, required=[])
+    validator = DataValidator(schema)
+    df = numeric_frame()
+    assert validator.validate_dataframe(df) == row_wise(validator, df)
+
+
+def test_missing_required_column_is_a_schema_error():
+    df = typed_frame().drop(columns='merchant_category')
+    errors = DataValidator().validate_dataframe(df)
+    assert list(errors) == ['schema']
+    assert 'merchant_category' in errors['schema'][0]
+
+
+BAD_VALUES = ["abc", "12", "true", "No", "", None, -5, 1e9, 2.5, True, 0, [], {}, float('nan')]
+
+
+def messy_records(n, seed):
+    """Generated records with bad values, missing fields and extra fields"""
+    rng = random.Random(seed)
+    records = FraudDataGenerator(seed=seed).generate_columns(n).to_dict('records')
+    for record in records:
+        for _ in range(rng.randint(0, 3)):
+            action = rng.random()
+            field = rng.choice(list(record) or ['transaction_id'])
+            if action < 0.4:
+                record[field] = rng.choice(BAD_VALUES)
+            elif action < 0.7:
+                record.pop(field, None)
+            else:
+                record[f"extra_{rng.randrange(3)}"] = rng.choice(BAD_VALUES)
+    return records
+
+
+@pytest.mark.parametrize("keep_unknown", [False, True])
+def test_sanitize_and_validate_matches_separate_calls(validator, keep_unknown):
+    records = messy_records(1500, seed=11)
+    assert any(validator.validate_transaction(r) for r in records)
+    for record in records:
+        sanitized, errors = validator.sanitize_and_validate(record, keep_unknown=keep_unknown)
+        expected = validator.sanitize_transaction(record)
+        if keep_unknown:
+            expected.update((k, v) for k, v in record.items() if k not in expected)
+        assert errors == validator.validate_transaction(record), record
+        assert sanitized.keys() == expected.keys()
+        # NaN != NaN, so compare sanitized values by their repr
+        assert {k: repr(v) for k, v in sanitized.items()} == {
+            k: repr(v) for k, v in expected.items()
+        }
+
+
+@pytest.fixture(scope="module")
+def client():
+    testclient = pytest.importorskip("fastapi.testclient")
+    sys.path.insert(0, str(ROOT / "backend"))
+    from main import app
+    return testclient.TestClient(app)
+
+
+@pytest.mark.parametrize("n", [20, 600])  # Inline, and on the bulk executor
+def test_batch_endpoint_rejects_invalid_records(client, n):
+    records = FraudDataGenerator(seed=12).generate_columns(n).to_dict('records')
+    for record in records:
+        record['timestamp'] = str(record['timestamp'])
+    params = {"version": "v1", "validate": "true", "enable_trace": "false"}
+
+    valid = client.post("/api/v1/evaluate/batch", json=records, params=params)
+    assert valid.status_code == 200 and valid.json()["count"] == n
+
+    records[3]['transaction_amount'] = -10
+    del records[n - 1]['merchant_category']
+    response = client.post("/api/v1/evaluate/batch", json=records, params=params)
+    assert response.status_code == 422
+    errors = response.json()["detail"]["errors"]
+    assert sorted(errors, key=int) == ["3", str(n - 1)]
+    assert any("merchant_category" in e for e in errors[str(n - 1)])
@@ -0,0 +1,113 @@
+"""Differential tests: DecisionDAG must give the same first match as RuleEngine.evaluate()"""
+
+import itertools
+import random
+import sys
+from pathlib import Path
+
+import pytest
+import yaml
+
+from business_rules import FraudDataGenerator, RuleEngine
+from business_rules.decision_dag import DecisionDAG
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+from run import make_config  # noqa: E402
+
+# Small domains so every combination of values can be enumerated
+DOMAINS = {
+    "x": [0, 1, 2, 2.5, 3, 4, 5, 6],
+    "y": [0, 10, 20, 30],
+    "c": ["a", "b", "c", "d"],
+    "b": [True, False],
+}
+
+
+def random_condition(rng: random.Random) -> dict:
+    field = rng.choice(list(DOMAINS))
+    domain = [v for v in DOMAINS[field] if not isinstance(v, float)]
+    numeric = field in ("x", "y")
+    ops = ["==", "!=", "in", "not_in"] + ([">", "<", ">=", "<=", "between"] if numeric else [])
+    if field == "c":
+        ops.append("regex")
+    op = rng.choice(ops)
+    if op == "between":
+        value = sorted(rng.sample(domain, 2))
+    elif op in ("in", "not_in"):
+        value = rng.sample(domain, rng.randint(1, min(3, len(domain))))
+    elif op == "regex":
+        value = rng.choice(["^[ab]", "c|d", "z"])
+    else:
+        value = rng.choice(domain)
+    return {"field": field, "operator": op, "value": value}
+
+
+def random_config(rng: random.Random, n_rules: int) -> dict:
+    rules = []
+    for i in range(n_rules):
+        rules.append({
+            "id": f"R{i}",
+            "name": f"rule {i}",
+            "logic": rng.choice(["AND", "AND", "OR"]),
+            "conditions": [random_condition(rng) for _ in range(rng.randint(1, 4))],
+            "outcome": {"risk_score": 50, "decision": "REVIEW", "reason": "random"},
+        })
+    rules.append({
+        "id": "DEFAULT", "name": "default", "logic": "ALWAYS", "conditions": [],
+        "outcome": {"risk_score": 0, "decision": "ALLOW", "reason": "default"},
+    })
+    return {"version": "random", "rules": rules}
+
+
+# Every combination of field values, each field possibly missing
+GRID = [
+    {f: v for f, v in zip(DOMAINS, values) if v is not None}
+    for values in itertools.product(*([None] + DOMAINS[f] for f in DOMAINS))
+]
+
+
+def assert_same_matches(engine: RuleEngine, dag: DecisionDAG, records) -> None:
+    for record in records:
+        expected = engine.evaluate(record).matched_rule_id
+        actual = dag.evaluate(record).matched_rule_id
+        assert actual == expected, f"linear={expected} dag={actual} record={record}"
+
+
+@pytest.fixture(scope="module")
+def records():
+    rng = random.Random(0)
+    records = FraudDataGenerator(seed=0).generate_columns(3000).to_dict("records")
+    # Missing fields must fail conditions the same way in both
+    for record in records[::5]:
+        record.pop(rng.choice(list(record)), None)
+    return records
+
+
+@pytest.mark.parametrize("name", ["rules_v1", "synthetic10", "synthetic50", "synthetic200"])
+def test_configs_match_linear(name, records):
+    if name == "rules_v1":
+        config = yaml.safe_load(open(ROOT / "config" / "rules_v1.yaml"))
+    else:
+        config = make_config(int(name[len("synthetic"):]), 0)
+    engine = RuleEngine.from_config(config)
+    assert_same_matches(engine, DecisionDAG(engine), records)
+    # Split points chosen from a data sample instead of uniformly
+    assert_same_matches(engine, DecisionDAG(engine, sample=records[:1000]), records)
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_random_configs_match_linear_on_every_value_combination(seed):
+    rng = random.Random(seed)
+    for _ in range(5):
+        engine = RuleEngine.from_config(random_config(rng, rng.randint(1, 12)))
+        assert_same_matches(engine, DecisionDAG(engine), GRID)
+        # A tiny node budget forces linear chain leaves
+        assert_same_matches(engine, DecisionDAG(engine, max_nodes=3), GRID)
+
+
+def test_dag_checks_fewer_predicates(records):
+    engine = RuleEngine.from_config(make_config(50, 0))
+    stats = DecisionDAG(engine, sample=records[:1000]).stats(records[:2000])
+    assert stats['mean_checks'] < stats['mean_linear_checks']
@@ -0,0 +1,120 @@
+import random
+import time
+from pathlib import Path
+
+import pytest
+
+from business_rules import RuleEngine
+from business_rules.enrichment import (
+    DAY_SECONDS, FeatureEnricher, KVVelocityStore, LocalKV, VelocityStore
+)
+
+CONFIG = Path(__file__).parent.parent / "config" / "rules_v1.yaml"
+
+
+class CountingKV(LocalKV):
+    """LocalKV that counts round-trips: direct commands and pipeline executions"""
+
+    def __init__(self):
+        super().__init__()
+        self.round_trips = 0
+        self.executing = False
+
+    def hgetall(self, key):
+        self.round_trips += not self.executing
+        return super().hgetall(key)
+
+    def pipeline(self, transaction=True):
+        pipe = super().pipeline(transaction)
+        execute = pipe.execute
+
+        def counted():
+            self.round_trips += 1
+            self.executing = True
+            try:
+                return execute()
+            finally:
+                self.executing = False
+        pipe.execute = counted
+        return pipe
+
+
+@pytest.mark.parametrize("late", [0, 6 * 3600])
+def test_kv_store_matches_in_process_store(late):
+    rng = random.Random(4)
+    local, shared = VelocityStore(), KVVelocityStore(LocalKV())
+    now = time.time() - 3 * 86400
+    for i in range(3000):
+        now += rng.expovariate(1 / 120)
+        account = f"acct{rng.randrange(20)}"
+        amount = round(rng.uniform(1, 500), 2)
+        country = rng.choice(["US", "UK", "DE", None])
+        # Some events arrive late, by up to `late` seconds
+        timestamp = now - rng.uniform(0, late)
+        if i % 50 == 0:
+            created = timestamp - rng.uniform(0, 1000) * DAY_SECONDS
+            for store in (local, shared):
+                store.set_first_seen(account, created)
+        expected = local.update(account, timestamp, amount, country)
+        got = shared.update(account, timestamp, amount, country)
+        assert got['count'] == expected['count']
+        assert got['amount'] == pytest.approx(expected['amount'])
+        assert got['countries'] == expected['countries']
+        assert got['first_seen'] == expected['first_seen']
+
+
+def test_update_is_one_round_trip():
+    kv = CountingKV()
+    store = KVVelocityStore(kv)
+    now = time.time()
+    store.update("a", now, 10.0, "US")
+    features = store.update("a", now + 1, 5.0, "DE")
+    assert kv.round_trips == 2
+    assert features == {'count': 2, 'amount': 15.0, 'countries': 2, 'first_seen': None}
+    assert store.features("a", now + 2)['count'] == 2
+
+
+def test_late_event_does_not_expire_a_country_early():
+    store = KVVelocityStore(LocalKV())
+    now = time.time()
+    store.update("a", now, 1.0, "US")
+    store.update("a", now - 20 * 3600, 1.0, "US")
+    # Still within 24h of the newer US event
+    assert store.update("a", now + 10 * 3600, 1.0, "DE")['countries'] == 2
+
+
+@pytest.fixture(params=["local", "kv"])
+def store(request):
+    return VelocityStore() if request.param == "local" else KVVelocityStore(LocalKV())
+
+
+def test_unknown_account_age_is_left_unset(store):
+    engine = RuleEngine(str(CONFIG))
+    record = {
+        'transaction_id': 't1', 'account_id': 'a1', 'timestamp': time.time(),
+        'transaction_amount': 2500,
+        'merchant_category': 'electronics', 'transaction_velocity_24h': 1,
+        'is_new_device': False, 'country_mismatch': False,
+    }
+    enriched = FeatureEnricher(store).enrich(record)
+    assert 'account_age_days' not in enriched
+    assert engine.evaluate(record).matched_rule_id == 'RULE_005'
+    assert engine.evaluate(enriched).matched_rule_id == 'RULE_005'
+
+
+def test_account_age_from_creation_time_survives_eviction(store):
+    enricher = FeatureEnricher(store)
+    now = time.time()
+    created = now - 40 * DAY_SECONDS
+    record = {'account_id': 'a1', 'timestamp': now, 'account_created_at': created}
+    assert enricher.enrich(record)['account_age_days'] == 40
+
+    later = now + 10 * DAY_SECONDS
+    if isinstance(store, VelocityStore):
+        assert store.evict_idle(later) == 1
+    else:
+        store.client.delete(store.prefix + 'a1')  # As if the key had expired
+    # No creation time on the record: the stored one is used
+    enriched = enricher.enrich({'account_id': 'a1', 'timestamp': later})
+    assert enriched['account_age_days'] == 50
+    assert enriched['transaction_velocity_24h'] == 1
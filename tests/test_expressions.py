@@ -0,0 +1,176 @@
+"""Expressions and derived fields: safety checks, evaluation and precedence"""
+
+import pandas as pd
+import pytest
+
+from business_rules import RuleEngine
+from business_rules.expressions import DerivedFields, Expression, RecordView
+from business_rules.vectorized import VectorizedRuleSet
+
+
+@pytest.mark.parametrize("source", [
+    "transaction_amount.real",                  # attribute access
+    "().__class__",
+    "transaction_id.lower()",                   # method call
+    "__import__('os')",                         # call outside the whitelist
+    "eval('1')",
+    "open('/etc/passwd')",
+    "round(transaction_amount, ndigits=2)",     # keyword arguments
+    "(lambda: 1)()",
+    "fields[0]",                                # subscripts
+    "transaction_id[:4]",
+    "{'a': 1}",
+    "[x for x in items]",
+    "(x := 1)",
+    "b'bytes'",
+    "1 is 1",
+    "x ** 2",
+    "x & 1",
+    "",
+    "1 +",
+])
+def test_disallowed_syntax_is_rejected(source):
+    with pytest.raises(ValueError):
+        Expression(source)
+
+
+def evaluate(source, **record):
+    return Expression(source).evaluate(record.get)
+
+
+def test_allowed_syntax():
+    assert evaluate("a + b * 2 - c / 4 // 1 % 3", a=1, b=2, c=8) == 1 + 2 * 2 - 8 / 4 // 1 % 3
+    assert evaluate("-a if a < 0 else a", a=-3) == 3
+    assert evaluate("0 < a <= 10 and not b", a=5, b=False) is True
+    assert evaluate("c in ('x', 'y') or c == 'z'", c="z") is True
+    assert evaluate("max(abs(a), len(s), round(2.6))", a=-1, s="ab") == 3
+    assert evaluate("upper(lower(s))", s="Ab") == "AB"
+    assert Expression("a / (b + a) > c").names == ["a", "b", "c"]
+
+
+def test_missing_values_and_division_by_zero_give_none():
+    assert evaluate("a + 1") is None
+    assert evaluate("a / b", a=1, b=0) is None
+    assert evaluate("a > 1 and b", a=5) is None
+    assert evaluate("abs(a)", a=None) is None
+
+
+def test_column_evaluation_matches_row_evaluation():
+    df = pd.DataFrame({
+        'a': [1.0, -2.0, None, 4.0, 0.0],
+        'b': [0, 3, 1, None, 2],
+        's': ['x', 'yy', None, 'zzz', ''],
+    })
+    for source in ("a / b", "abs(a) * 2 + round(b)", "a % b", "len(s) + a", "a > b"):
+        expression = Expression(source)
+        columns = expression.evaluate_columns(lambda name: df[name], len(df))
+        for (_, row), value in zip(df.iterrows(), columns):
+            expected = expression.evaluate(lambda name: None if pd.isna(row[name]) else row[name])
+            if expected is None:
+                assert pd.isna(value), source
+            else:
+                assert value == pytest.approx(expected), source
+
+
+@pytest.mark.parametrize("definitions", [
+    {"a": "b + 1", "b": "a + 1"},
+    {"a": "a * 2"},
+    {"a": "b", "b": "c", "c": "d + a"},
+])
+def test_cyclic_derived_fields_are_rejected(definitions):
+    with pytest.raises(ValueError, match="cycle"):
+        DerivedFields(definitions)
+
+
+def test_derived_fields_chain_and_report_dependencies():
+    derived = DerivedFields({
+        "per_day": {"expression": "amount / (age + 1)", "description": "spend per day"},
+        "flagged": "per_day > limit",
+    })
+    assert derived.dependencies("flagged") == ["amount", "age", "limit"]
+    view = RecordView({"amount": 100, "age": 4, "limit": 10}, derived)
+    assert view.get("per_day") == 20 and view["flagged"] is True
+    with pytest.raises(ValueError, match="no expression"):
+        DerivedFields({"x": {"description": "missing"}})
+
+
+def test_record_field_shadows_derived_field():
+    derived = DerivedFields({"ratio": "amount / age", "double": "ratio * 2"})
+    view = RecordView({"amount": 100, "age": 1, "ratio": 3}, derived)
+    assert view.get("ratio") == 3 and view["ratio"] == 3
+    # Derived fields read the record's value too
+    assert view.get("double") == 6
+    # A record field set to None is missing, so the derived value is used
+    assert RecordView({"amount": 100, "age": 1, "ratio": None}, derived)["ratio"] == 100
+
+
+def engine(*conditions, derived_fields=None):
+    return RuleEngine.from_config({
+        "version": "test",
+        "derived_fields": derived_fields or {},
+        "rules": [
+            {
+                "id": "HIT", "name": "hit", "logic": "AND", "conditions": list(conditions),
+                "outcome": {"risk_score": 80, "decision": "REVIEW", "reason": "hit"},
+            },
+            {
+                "id": "DEFAULT", "name": "default", "logic": "ALWAYS", "conditions": [],
+                "outcome": {"risk_score": 0, "decision": "ALLOW", "reason": "default"},
+            },
+        ],
+    })
+
+
+def matches(engine, records):
+    """Row-wise and column-wise results, which must agree"""
+    row_wise = [engine.evaluate(r).matched_rule_id == "HIT" for r in records]
+    columns = VectorizedRuleSet.from_engine(engine).evaluate(pd.DataFrame(records))
+    assert list(columns['matched_rule_id'] == "HIT") == row_wise
+    return row_wise
+
+
+def test_record_field_shadows_derived_field_in_conditions():
+    e = engine(
+        {"field": "ratio", "operator": ">", "value": 10},
+        derived_fields={"ratio": "amount / age"},
+    )
+    records = [
+        {"transaction_id": "t0", "amount": 100, "age": 1},
+        {"transaction_id": "t1", "amount": 100, "age": 1, "ratio": 2},
+        {"transaction_id": "t2", "amount": 1, "age": 1, "ratio": 20},
+        {"transaction_id": "t3", "amount": 100, "age": 1, "ratio": None},
+    ]
+    assert matches(e, records) == [True, False, True, True]
+    # All rows have the record field: the derived field is never computed
+    assert matches(e, records[1:3]) == [False, True]
+
+
+def test_value_field_compares_against_the_other_field():
+    e = engine({"field": "amount", "operator": ">", "value_field": "limit"})
+    records = [
+        {"transaction_id": "t0", "amount": 100, "limit": 50},
+        {"transaction_id": "t1", "amount": 100, "limit": 100},
+        {"transaction_id": "t2", "amount": 100, "limit": 150},
+        {"transaction_id": "t3", "amount": 100, "limit": None},
+        {"transaction_id": "t4", "amount": None, "limit": 50},
+    ]
+    assert matches(e, records) == [True, False, False, False, False]
+
+    trace = e.evaluate_with_trace(records[0], enable_trace=True)[1]
+    condition = trace.evaluated_rules[0].conditions[0]
+    assert condition.value_field == "limit"
+    assert (condition.expected_value, condition.passed) == (50, True)
+
+
+def test_value_field_can_name_a_derived_field():
+    e = engine(
+        {"field": "amount", "operator": ">=", "value_field": "twice_average"},
+        {"field": "category", "operator": "in", "value_field": "allowed"},
+        derived_fields={"twice_average": "average * 2"},
+    )
+    records = [
+        {"transaction_id": "t0", "amount": 100, "average": 50, "category": "a", "allowed": "abc"},
+        {"transaction_id": "t1", "amount": 99, "average": 50, "category": "a", "allowed": "abc"},
+        {"transaction_id": "t2", "amount": 100, "average": 50, "category": "z", "allowed": "abc"},
+    ]
+    assert [e.evaluate(r).matched_rule_id == "HIT" for r in records] == [True, False, False]
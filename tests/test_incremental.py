@@ -0,0 +1,78 @@
+import copy
+from pathlib import Path
+
+import numpy as np
+import pytest
+import yaml
+
+from business_rules import FraudDataGenerator
+from business_rules.incremental import IncrementalScorer
+from business_rules.vectorized import VectorizedRuleSet
+
+CONFIG = Path(__file__).parent.parent / "config" / "rules_v1.yaml"
+
+
+@pytest.fixture
+def df():
+    return FraudDataGenerator(seed=7).generate_columns(5000)
+
+
+@pytest.fixture
+def config():
+    config = yaml.safe_load(open(CONFIG))
+    config['derived_fields'] = {'amount_per_day': 'transaction_amount / (account_age_days + 1)'}
+    config['rules'].insert(0, {
+        'id': 'DERIVED',
+        'name': 'High spend per account day',
+        'conditions': [{'field': 'amount_per_day', 'operator': '>', 'value': 200}],
+        'logic': 'AND',
+        'outcome': {'risk_score': 70, 'decision': 'REVIEW', 'reason': 'derived'},
+    })
+    return config
+
+
+def assert_matches_fresh(scorer, df):
+    expected = VectorizedRuleSet(scorer.config).evaluate(df)
+    assert (scorer.results()['matched_rule_id'] == expected['matched_rule_id']).all()
+
+
+def test_rule_edits_match_full_rescore(df, config):
+    scorer = IncrementalScorer(df, config)
+    rule = copy.deepcopy(scorer.rules[2])
+    rule['conditions'][0]['value'] = 100
+    scorer.update_rule(rule['id'], rule)
+    assert_matches_fresh(scorer, df)
+
+    scorer.delete_rule(scorer.rules[1]['id'])
+    assert_matches_fresh(scorer, df)
+
+    scorer.reorder_rules([r['id'] for r in reversed(scorer.rules[:-1])] + ['DEFAULT'])
+    assert_matches_fresh(scorer, df)
+
+
+def test_derived_field_edit_rescores(df, config):
+    scorer = IncrementalScorer(df, config)
+    edited = copy.deepcopy(config)
+    edited['derived_fields']['amount_per_day'] = 'transaction_amount / (account_age_days + 100)'
+
+    changed = scorer.sync(edited)
+
+    assert len(changed) > 0
+    assert scorer.config['derived_fields'] == edited['derived_fields']
+    assert_matches_fresh(scorer, df)
+    before = np.array(VectorizedRuleSet(config).evaluate(df)['matched_rule_id'])
+    assert set(changed) == set(np.flatnonzero(
+        before != np.array(scorer.results()['matched_rule_id'])
+    ))
+
+
+def test_derived_and_rule_edit_uses_new_definitions(df, config):
+    scorer = IncrementalScorer(df, config)
+    edited = copy.deepcopy(config)
+    edited['derived_fields']['amount_per_day'] = 'transaction_amount / (account_age_days + 100)'
+    edited['rules'][1]['outcome']['risk_score'] = 90
+    edited['rules'].pop(2)
+
+    scorer.sync(edited)
+
+    assert_matches_fresh(scorer, df)
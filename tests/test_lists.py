@@ -0,0 +1,130 @@
+"""Compiled list files: round trip, value_file equivalence with text lists, cache refresh"""
+
+import os
+import random
+
+import pytest
+
+from business_rules import RuleEngine
+from business_rules.lists import MappedList, compile_list, is_compiled_list, write_list
+from business_rules.operators import PrefixSet, load_list
+
+
+def write_text(path, entries):
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w') as f:
+        f.write("# blocked values\n\n")
+        f.writelines(f"{e}\n" for e in entries)
+    os.replace(tmp, path)
+
+
+@pytest.fixture
+def bins():
+    rng = random.Random(5)
+    return sorted({str(rng.randrange(10 ** 5, 10 ** 6)) for _ in range(3000)} | {"4", "51", "6011"})
+
+
+def test_round_trip(tmp_path, bins):
+    text, compiled = tmp_path / "bins.txt", tmp_path / "bins.blist"
+    write_text(text, bins)
+    assert compile_list(str(text), str(compiled)) == len(bins)
+    assert is_compiled_list(str(compiled)) and not is_compiled_list(str(text))
+
+    mapped = MappedList(str(compiled))
+    assert len(mapped) == len(bins)
+    assert mapped.lengths == [1, 2, 4, 6]
+
+    rng = random.Random(6)
+    members = set(bins)
+    values = bins + [str(rng.randrange(10 ** 7)) for _ in range(3000)] + [51, 6011, "", "# blocked"]
+    assert [v in mapped for v in values] == [str(v) in members for v in values]
+    assert list(mapped.contains_many(values)) == [str(v) in members for v in values]
+
+    prefixes = PrefixSet(bins)
+    card_numbers = [f"{v}{rng.randrange(10 ** 9)}" for v in values] + [4111111111111111, ""]
+    assert [mapped.has_prefix(v) for v in card_numbers] == [v in prefixes for v in card_numbers]
+
+
+def test_empty_list(tmp_path):
+    path = str(tmp_path / "empty.blist")
+    assert write_list([], path) == 0
+    mapped = MappedList(path)
+    assert len(mapped) == 0 and "a" not in mapped and not mapped.has_prefix("abc")
+    assert not mapped.contains_many(["a", "b"]).any()
+
+
+def test_damaged_file_is_rejected(tmp_path, bins):
+    path = tmp_path / "bins.blist"
+    write_list(bins, str(path))
+    path.write_bytes(path.read_bytes()[:-8])
+    with pytest.raises(ValueError, match="Truncated"):
+        MappedList(str(path))
+
+
+def list_config(list_file):
+    conditions = [
+        ("BIN_BLOCKED", "card_bin", "prefix"),
+        ("MERCHANT_BLOCKED", "merchant_id", "in"),
+        ("MERCHANT_UNKNOWN", "merchant_id", "not_in"),
+    ]
+    rules = [
+        {
+            "id": rule_id, "name": rule_id, "logic": "AND",
+            "conditions": [{"field": field, "operator": operator, "value_file": list_file}],
+            "outcome": {"risk_score": 90, "decision": "BLOCK", "reason": rule_id},
+        }
+        for rule_id, field, operator in conditions
+    ]
+    rules.append({
+        "id": "DEFAULT", "name": "default", "logic": "ALWAYS", "conditions": [],
+        "outcome": {"risk_score": 0, "decision": "ALLOW", "reason": "default"},
+    })
+    return {"version": "lists", "rules": rules}
+
+
+def test_value_file_conditions_match_text_lists(tmp_path, bins):
+    write_text(tmp_path / "blocked.txt", bins)
+    compile_list(str(tmp_path / "blocked.txt"), str(tmp_path / "blocked.blist"))
+    text = RuleEngine.from_config(list_config("blocked.txt"), str(tmp_path))
+    compiled = RuleEngine.from_config(list_config("blocked.blist"), str(tmp_path))
+    assert isinstance(load_list("blocked.blist", "prefix", str(tmp_path)), MappedList)
+
+    rng = random.Random(7)
+    records = []
+    for _ in range(2000):
+        merchant = rng.choice(
+            [rng.choice(bins), str(rng.randrange(10 ** 6)), int(rng.choice(bins))]
+        )
+        card_bin = rng.choice([rng.choice(bins), str(rng.randrange(10 ** 8)), "4000", "7"])
+        records.append({"transaction_id": "t", "merchant_id": merchant, "card_bin": card_bin})
+    for record in records:
+        expected = text.evaluate(record).matched_rule_id
+        assert compiled.evaluate(record).matched_rule_id == expected, record
+    assert {text.evaluate(r).matched_rule_id for r in records} == {
+        "BIN_BLOCKED", "MERCHANT_BLOCKED", "MERCHANT_UNKNOWN"
+    }
+
+
+def test_compiled_lists_do_not_serve_cidr(tmp_path):
+    write_list(["10.0.0.0/8"], str(tmp_path / "nets.blist"))
+    with pytest.raises(ValueError, match="cidr"):
+        load_list("nets.blist", "cidr", str(tmp_path))
+
+
+def test_load_list_picks_up_an_atomic_replace(tmp_path):
+    text, compiled = tmp_path / "list.txt", tmp_path / "list.blist"
+    write_text(text, ["a", "b"])
+    compile_list(str(text), str(compiled))
+    old_text = load_list(str(text), "in")
+    old_mapped = load_list(str(compiled), "in")
+    assert load_list(str(compiled), "prefix") is old_mapped  # One mapping for both
+    assert load_list(str(text), "in") is old_text
+
+    write_text(text, ["b", "c", "d"])
+    compile_list(str(text), str(compiled))
+    new_text = load_list(str(text), "in")
+    new_mapped = load_list(str(compiled), "in")
+    assert new_text == frozenset({"b", "c", "d"})
+    assert "c" in new_mapped and "a" not in new_mapped
+    # Readers of the old file keep a valid view of it
+    assert "a" in old_mapped and "c" not in old_mapped
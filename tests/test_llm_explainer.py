@@ -0,0 +1,101 @@
+import json
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+import yaml
+
+from business_rules.llm_explainer import SYSTEM_PROMPT, LLMExplainer
+from business_rules.models import Decision, RuleResult
+
+CONFIG = Path(__file__).parent.parent / "config" / "rules_v1.yaml"
+
+EXPLANATION = {
+    "human_readable_explanation": "Blocked.",
+    "confidence": "HIGH",
+    "needs_human_review": False,
+    "clarifying_questions": [],
+    "additional_context": None,
+}
+
+
+class FakeMessages:
+    """Answers each request with one explanation per transaction (or a fixed count)"""
+
+    def __init__(self, answer_count=None):
+        self.requests = []
+        self.answer_count = answer_count
+
+    def create(self, **request):
+        self.requests.append(request)
+        n = len(json.loads(request["messages"][0]["content"]))
+        if self.answer_count is not None and n > 1:
+            n = self.answer_count
+        return SimpleNamespace(
+            content=[SimpleNamespace(text=json.dumps([EXPLANATION] * n))],
+            usage=SimpleNamespace(input_tokens=100 * n, output_tokens=10 * n,
+                                  cache_read_input_tokens=50),
+        )
+
+
+@pytest.fixture
+def rules():
+    return yaml.safe_load(open(CONFIG))['rules']
+
+
+def explainer(rules=None, answer_count=None):
+    explainer = LLMExplainer(api_key="test", rules=rules)
+    explainer.client = SimpleNamespace(messages=FakeMessages(answer_count))
+    return explainer
+
+
+def results(n):
+    return [
+        RuleResult(transaction_id=f"t{i}", matched_rule_id="RULE_001",
+                   matched_rule_name="High-value crypto", risk_score=95,
+                   decision=Decision.BLOCK, rule_reason="crypto")
+        for i in range(n)
+    ]
+
+
+def test_static_system_prompt_is_cache_marked(rules):
+    e = explainer(rules)
+    e.generate_explanation({"transaction_id": "t0"}, results(1)[0])
+    request = e.client.messages.requests[0]
+    assert request["system"] == [
+        {"type": "text", "text": SYSTEM_PROMPT, "cache_control": {"type": "ephemeral"}}
+    ]
+
+
+def test_prompt_carries_only_the_matched_rules_conditions(rules):
+    items = json.loads(explainer(rules).build_prompt([{"transaction_id": "t0"}], results(1)))
+    rule_001 = next(rule for rule in rules if rule['id'] == "RULE_001")
+    assert items[0]["rule"]["conditions"] == rule_001['conditions']
+    assert "RULE_002" not in json.dumps(items)
+
+    # Without rules there are no conditions to send
+    assert "conditions" not in json.loads(explainer().build_prompt([{}], results(1)))[0]["rule"]
+
+
+def test_batch_usage_is_summed_over_requests(rules):
+    e = explainer(rules)
+    records = [{"transaction_id": f"t{i}", "transaction_amount": 9000} for i in range(7)]
+    explanations = e.generate_batch(records, results(7), batch_size=3)
+
+    assert len(explanations) == 7
+    assert len(e.client.messages.requests) == 3
+    assert e.last_usage.records == 7
+    assert e.last_usage.input_tokens == 700
+    assert e.last_usage.output_tokens == 70
+    assert e.last_usage.cache_read_input_tokens == 150
+
+
+def test_batch_usage_includes_single_record_retries(rules):
+    e = explainer(rules, answer_count=1)
+    records = [{"transaction_id": f"t{i}"} for i in range(3)]
+    assert len(e.generate_batch(records, results(3), batch_size=3)) == 3
+
+    # One batch request answered with the wrong count, then one request per record
+    assert len(e.client.messages.requests) == 4
+    assert e.last_usage.records == 6
+    assert e.last_usage.input_tokens == 400
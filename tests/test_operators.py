@@ -0,0 +1,134 @@
+"""Compiled operators give the same answer as a naive check of each value"""
+
+import ipaddress
+import random
+import re
+
+import pytest
+
+from business_rules import RuleEngine
+from business_rules.operators import CidrSet, PrefixSet, compile_operator
+
+
+def compiled(operator, expected):
+    return compile_operator(operator, expected, RuleEngine.OPERATORS[operator])
+
+
+def outcome(check, value):
+    """check(value), or the type of the exception it raised"""
+    try:
+        return check(value)
+    except Exception as e:
+        return type(e)
+
+
+def assert_same(operator, expected, naive, values):
+    test = compiled(operator, expected)
+    for value in values:
+        expected_outcome = outcome(naive, value)
+        assert outcome(test, value) == expected_outcome, f"{operator} {expected!r} on {value!r}"
+
+
+def test_between():
+    values = [-1, 0, 0.5, 5, 9.99, 10, 10.01, 11, True, float('nan'), float('inf'), "5"]
+    for low, high in [(0, 10), (0.5, 0.5), (10, 0), (-float('inf'), 0)]:
+        assert_same("between", [low, high], lambda a: low <= a <= high, values)
+    assert_same("between", ["a", "m"], lambda a: "a" <= a <= "m", ["a", "b", "m", "ma", "z", 3])
+
+
+@pytest.mark.parametrize("value", [5, [1], [1, 2, 3], "0-10"])
+def test_between_needs_two_bounds(value):
+    with pytest.raises(ValueError):
+        compiled("between", value)
+
+
+def test_prefix():
+    rng = random.Random(1)
+    prefixes = ["4", "51", "5500", "601100", "34", "37", "", "x-"]
+    values = [
+        "".join(rng.choice("0123456x-") for _ in range(rng.randint(0, 8))) for _ in range(2000)
+    ]
+    values += [4111111111111111, 55.5, None, True, b"51", ("51",)]
+    for expected in (prefixes, prefixes[1:], "51", ["51"], (3, 60)):
+        members = [str(p) for p in ([expected] if isinstance(expected, str) else expected)]
+        naive = lambda a: any(str(a).startswith(p) for p in members)  # noqa: E731
+        assert_same("prefix", expected, naive, values)
+
+
+def test_prefix_set_lengths():
+    prefixes = PrefixSet(["1", "123", "99999"])
+    assert len(prefixes) == 3 and prefixes.lengths == [1, 3, 5]
+    assert "1" in prefixes and 12 in prefixes and "9999" not in prefixes and "" not in prefixes
+
+
+NETWORKS = [
+    "10.0.0.0/8", "10.1.0.0/16", "192.168.0.0/24", "192.168.1.0/24", "203.0.113.7",
+    "172.16.0.1/12", "2001:db8::/32", "fe80::/10", "::1/128",
+]
+
+
+def naive_cidr(networks):
+    parsed = [ipaddress.ip_network(n, strict=False) for n in networks]
+
+    def check(a):
+        try:
+            ip = ipaddress.ip_address(a)
+        except ValueError:
+            return False
+        return any(ip in net for net in parsed)
+    return check
+
+
+def test_cidr():
+    rng = random.Random(2)
+    values = [str(ipaddress.IPv4Address(rng.getrandbits(32))) for _ in range(1000)]
+    values += [str(ipaddress.IPv6Address(rng.getrandbits(128))) for _ in range(200)]
+    # Near every network boundary
+    for n in NETWORKS:
+        net = ipaddress.ip_network(n, strict=False)
+        for address in (int(net.network_address), int(net.broadcast_address)):
+            values += [str(ipaddress.ip_address(address + d)) for d in (-1, 0, 1)
+                       if 0 <= address + d < 2 ** net.max_prefixlen]
+    values += [
+        "2001:db8:ffff::1", "2001:db9::", "::ffff:10.0.0.1", "fe80::1%eth0",
+        "10.0.0", "256.1.1.1", "10.0.0.1/8", " 10.0.0.1", "", "not an ip", None, 1.5,
+        167772161,  # 10.0.0.1 as an integer
+    ]
+    for networks in (NETWORKS, NETWORKS[:5], NETWORKS[6:], "10.0.0.0/8", ["::/0"]):
+        as_list = [networks] if isinstance(networks, str) else networks
+        assert_same("cidr", networks, naive_cidr(as_list), values)
+
+
+def test_cidr_set_merges_ranges():
+    # 10.1.0.0/16 lies inside 10.0.0.0/8; the two /24s collapse to a /23
+    assert len(CidrSet(NETWORKS)) == 7
+    with pytest.raises(ValueError):
+        CidrSet(["10.0.0.0/33"])
+
+
+def test_regex():
+    values = ["abc", "ABC", "xabcx", "", "a\nb", "123", 123, 12.5, None, True, ["abc"]]
+    for pattern in ("^a", "b", r"\d{2}", "^$", "(?i)abc", "^True$", r"\['a"):
+        assert_same("regex", pattern, lambda a: re.search(pattern, str(a)) is not None, values)
+    with pytest.raises(ValueError):
+        compiled("regex", "(unclosed")
+
+
+@pytest.mark.parametrize("operator", ["in", "not_in"])
+def test_membership(operator):
+    nan = float('nan')
+    lists = [
+        ["a", "b", 1, 2.5, None],
+        [1, True, 0],
+        [nan, "x"],
+        [[1, 2], "y"],  # Unhashable members: no set is built
+        [],
+    ]
+    values = ["a", "A", 1, 1.0, True, 0, False, 2.5, "1", None, nan, float('nan'), (1,), [1, 2], {}]
+    for expected in lists:
+        for container in (expected, tuple(expected)):
+            if operator == "in":
+                naive = lambda a: any(a is m or a == m for m in container)  # noqa: E731
+            else:
+                naive = lambda a: not any(a is m or a == m for m in container)  # noqa: E731
+            assert_same(operator, container, naive, values)
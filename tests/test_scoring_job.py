@@ -0,0 +1,105 @@
+"""Offline scoring job: column projection, row-wise agreement and parallel parts"""
+
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from business_rules import FraudDataGenerator, RuleEngine
+from business_rules.scoring_job import DECISION_COLUMNS, ScoringJob
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+
+CONFIG = Path(__file__).parent.parent / "config" / "rules_v1.yaml"
+
+
+def frame(seed, n):
+    df = FraudDataGenerator(seed=seed).generate_columns(n)
+    df.loc[df.index[::9], 'account_age_days'] = None
+    df.loc[df.index[::13], 'merchant_category'] = None
+    # Columns no rule reads
+    df['notes'] = [f"note {i}" for i in range(n)]
+    df['score_v0'] = range(n)
+    return df
+
+
+@pytest.fixture(scope="module")
+def dataset(tmp_path_factory):
+    """A partitioned directory: one Parquet and one Arrow file, several row groups each"""
+    root = tmp_path_factory.mktemp("history")
+    frames = {"date=1__part-0": frame(31, 1000), "date=2__part-0": frame(32, 700)}
+
+    (root / "date=1").mkdir()
+    pq.write_table(
+        pa.Table.from_pandas(frames["date=1__part-0"], preserve_index=False),
+        root / "date=1" / "part-0.parquet", row_group_size=150
+    )
+    (root / "date=2").mkdir()
+    table = pa.Table.from_pandas(frames["date=2__part-0"], preserve_index=False)
+    with pa.ipc.new_file(str(root / "date=2" / "part-0.arrow"), table.schema) as writer:
+        for batch in table.to_batches(max_chunksize=120):
+            writer.write_batch(batch)
+    return root, frames
+
+
+def read_parts(dest, name):
+    parts = sorted(Path(dest).glob(f"{name}.part*.parquet"))
+    return pd.concat([pd.read_parquet(p) for p in parts], ignore_index=True)
+
+
+def test_only_referenced_columns_are_read(dataset, tmp_path):
+    root, _ = dataset
+    job = ScoringJob(str(CONFIG), chunk_rows=300, task_rows=600)
+    read = set()
+    read_chunks = job.read_chunks
+
+    def recording(task):
+        for df in read_chunks(task):
+            read.update(df.columns)
+            yield df
+    job.read_chunks = recording
+
+    summary = job.run(str(root), str(tmp_path))
+    assert read == set(summary['columns'])
+    assert summary['columns'][0] == 'transaction_id'
+    assert set(summary['columns'][1:]) == {
+        c['field'] for rule in job.engine.config['rules'] for c in rule.get('conditions') or []
+    }
+    assert not read & {'notes', 'score_v0', 'timestamp'}
+
+
+def test_decisions_match_row_wise_evaluation(dataset, tmp_path):
+    root, frames = dataset
+    summary = ScoringJob(str(CONFIG), chunk_rows=300, task_rows=600).run(str(root), str(tmp_path))
+    assert summary['rows'] == sum(len(df) for df in frames.values())
+    assert summary['tasks'] == 4  # 1000 rows -> 2 tasks, 700 rows -> 2 tasks
+
+    engine = RuleEngine(str(CONFIG))
+    for name, df in frames.items():
+        scored = read_parts(tmp_path, name)
+        assert list(scored.columns) == ['transaction_id', *DECISION_COLUMNS]
+        assert list(scored['transaction_id']) == list(df['transaction_id'])
+        expected = [
+            engine.evaluate({k: v for k, v in record.items() if not pd.isna(v)})
+            for record in df.to_dict('records')
+        ]
+        assert list(scored['matched_rule_id']) == [r.matched_rule_id for r in expected]
+        assert list(scored['risk_score']) == [r.risk_score for r in expected]
+        assert list(scored['decision']) == [r.decision.value for r in expected]
+
+
+def test_parallel_workers_write_the_same_parts(dataset, tmp_path):
+    root, _ = dataset
+    job = ScoringJob(str(CONFIG), chunk_rows=300, task_rows=300)
+    serial = job.run(str(root), str(tmp_path / "serial"), workers=1)
+    parallel = job.run(str(root), str(tmp_path / "parallel"), workers=2)
+
+    assert parallel['files'] == serial['files'] and len(serial['files']) == 7
+    assert parallel['decisions'] == serial['decisions']
+    for name in serial['files']:
+        pd.testing.assert_frame_equal(
+            pd.read_parquet(tmp_path / "parallel" / name),
+            pd.read_parquet(tmp_path / "serial" / name)
+        )
+    assert not list((tmp_path / "parallel").glob("*.tmp"))
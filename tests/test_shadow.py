@@ -0,0 +1,171 @@
+"""Shadow evaluation: memoized matching, shared condition slots and disagreement reports"""
+
+import copy
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+import yaml
+
+from business_rules import FraudDataGenerator, RuleEngine
+from business_rules.shadow import ShadowEvaluator, SlottedRules, condition_slot
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+from run import make_config  # noqa: E402
+
+
+def load_v1():
+    return yaml.safe_load(open(ROOT / "config" / "rules_v1.yaml"))
+
+
+@pytest.fixture(scope="module")
+def records():
+    records = FraudDataGenerator(seed=21).generate_columns(1500).to_dict("records")
+    for i, record in enumerate(records[::7]):
+        record.pop(list(record)[i % len(record)], None)
+    return records
+
+
+@pytest.mark.parametrize("make", [
+    load_v1, lambda: make_config(20, 1), lambda: make_config(60, 2), lambda: make_config(150, 3)
+])
+def test_match_equals_evaluate(make, records):
+    engine = RuleEngine.from_config(make(), str(ROOT / "config"))
+    # A second version sharing most conditions, evaluated on the same memo
+    other = RuleEngine.from_config(make_config(40, 4), str(ROOT / "config"))
+    rules, other_rules = SlottedRules(engine), SlottedRules(other)
+    for record in records:
+        memo = {}
+        idx = rules.match(record, memo)
+        assert engine.rules[idx]['id'] == engine.evaluate(record).matched_rule_id
+        idx = other_rules.match(record, memo)
+        assert other.rules[idx]['id'] == other.evaluate(record).matched_rule_id
+
+
+def test_slots_are_shared_by_identical_conditions_only():
+    v1, v2 = RuleEngine.from_config(load_v1()), RuleEngine.from_config(load_v1())
+    slots1 = [slot for _, _, conditions in SlottedRules(v1).rules for slot, _ in conditions]
+    slots2 = [slot for _, _, conditions in SlottedRules(v2).rules for slot, _ in conditions]
+    assert slots1 == slots2
+
+    base = {"field": "transaction_amount", "operator": ">", "value": 1000}
+    same = condition_slot(dict(base))
+    assert condition_slot(dict(base)) == same
+    assert condition_slot({**base, "value": 1001}) != same
+    assert condition_slot({**base, "operator": ">="}) != same
+    assert condition_slot({**base, "value_field": "other"}) != same
+
+
+def derived_engine(expression):
+    return RuleEngine.from_config({
+        "version": expression,
+        "derived_fields": {"ratio": expression},
+        "rules": [
+            {
+                "id": "HIGH", "name": "high", "logic": "AND",
+                "conditions": [{"field": "ratio", "operator": ">", "value": 10}],
+                "outcome": {"risk_score": 80, "decision": "REVIEW", "reason": "ratio"},
+            },
+            {
+                "id": "DEFAULT", "name": "default", "logic": "ALWAYS", "conditions": [],
+                "outcome": {"risk_score": 0, "decision": "ALLOW", "reason": "default"},
+            },
+        ],
+    })
+
+
+def test_derived_fields_with_different_definitions_do_not_share_slots():
+    a = derived_engine("transaction_amount / account_age_days")
+    b = derived_engine("transaction_amount / (account_age_days + 100)")
+    same_as_a = derived_engine("transaction_amount / account_age_days")
+    slot = lambda engine: SlottedRules(engine).rules[0][2][0][0]  # noqa: E731
+    assert slot(a) != slot(b)
+    assert slot(a) == slot(same_as_a)
+
+    record = {"transaction_amount": 500, "account_age_days": 5}
+    memo = {}
+    assert a.rules[SlottedRules(a).match(record, memo)]['id'] == "HIGH"
+    assert b.rules[SlottedRules(b).match(record, memo)]['id'] == "DEFAULT"
+
+
+def shadow_config(decision=None, risk_score=None):
+    """rules_v1 with RULE_001's outcome changed"""
+    config = copy.deepcopy(load_v1())
+    rule = next(r for r in config['rules'] if r['id'] == "RULE_001")
+    if decision:
+        rule['outcome']['decision'] = decision
+    if risk_score is not None:
+        rule['outcome']['risk_score'] = risk_score
+    return config
+
+
+@pytest.mark.parametrize("enable_trace", [False, True])
+def test_disagreements_are_reported(records, enable_trace):
+    primary = RuleEngine(str(ROOT / "config" / "rules_v1.yaml"))
+    shadows = {
+        "decision": RuleEngine.from_config(shadow_config(decision="REVIEW")),
+        "score": RuleEngine.from_config(shadow_config(risk_score=1)),
+    }
+    events = []
+    evaluator = ShadowEvaluator(shadows.__getitem__, on_disagreement=events.append)
+
+    outputs = evaluator.evaluate_batch(
+        records, primary, ["decision", "score", "missing"], enable_trace, version="v1"
+    )
+    evaluator.flush()
+    assert [r.matched_rule_id for r, _ in outputs] == [
+        primary.evaluate(r).matched_rule_id for r in records
+    ]
+
+    changed = [
+        record.get('transaction_id', 'unknown') for record, (result, _) in zip(records, outputs)
+        if result.matched_rule_id == "RULE_001"
+    ]
+    assert changed, "records should match RULE_001"
+    by_version = {v: [e for e in events if e['shadow_version'] == v] for v in shadows}
+    assert [e['transaction_id'] for e in by_version["decision"]] == changed
+    assert [e['transaction_id'] for e in by_version["score"]] == changed
+    assert all(e['decision_changed'] for e in by_version["decision"])
+    assert not any(e['decision_changed'] for e in by_version["score"])
+    event = by_version["decision"][0]
+    assert event['primary'] == {'rule_id': "RULE_001", 'decision': "BLOCK", 'risk_score': 95}
+    assert event['shadow']['decision'] == "REVIEW" and event['primary_version'] == "v1"
+
+    stats = evaluator.stats()
+    assert stats['versions']["decision"] == {
+        'evaluated': len(records), 'disagreements': len(changed),
+        'decision_changes': len(changed), 'errors': 0,
+    }
+    assert stats['versions']["score"]['decision_changes'] == 0
+    assert stats['versions']["missing"]['errors'] == len(records)
+    assert stats['pending'] == 0 and stats['dropped'] == 0
+    evaluator.close()
+
+
+def test_full_queue_drops_instead_of_blocking(records):
+    engine = RuleEngine(str(ROOT / "config" / "rules_v1.yaml"))
+    started, release = threading.Event(), threading.Event()
+
+    def resolve(version):
+        started.set()
+        release.wait()
+        return engine
+
+    evaluator = ShadowEvaluator(resolve, max_queue=1)
+    evaluator.evaluate(records[0], engine, ["v2"])
+    assert started.wait(5)  # The worker is busy with the first job
+    evaluator.evaluate(records[1], engine, ["v2"])  # Fills the queue
+
+    begin = time.perf_counter()
+    evaluator.evaluate_batch(records[2:5], engine, ["v2"])
+    assert time.perf_counter() - begin < 1
+    assert evaluator.stats()['dropped'] == 3
+
+    release.set()
+    evaluator.flush()
+    assert evaluator.stats()['versions']["v2"]['evaluated'] == 2
+    evaluator.close()
@@ -0,0 +1,64 @@
+import os
+
+import pytest
+
+from business_rules.snapshots import SnapshotStore
+
+
+def config(n):
+    return {'version': 'v1', 'rules': [{'id': f'R{n}', 'logic': 'ALWAYS'}]}
+
+
+def test_stores_sharing_a_root_continue_each_others_sequence(tmp_path):
+    a, b = SnapshotStore(str(tmp_path)), SnapshotStore(str(tmp_path))
+    for n in range(6):
+        (a if n % 2 else b).put(config(n), 'v1')
+
+    seqs = [e['seq'] for e in SnapshotStore(str(tmp_path)).history('v1')]
+    assert seqs == [1, 2, 3, 4, 5, 6]
+    assert [e['seq'] for e in a.history('v1')] == seqs
+    assert [e['seq'] for e in b.history('v1')] == seqs
+
+
+def test_identical_save_from_another_store_adds_no_entry(tmp_path):
+    a, b = SnapshotStore(str(tmp_path)), SnapshotStore(str(tmp_path))
+    a.put(config(1), 'v1')
+    assert b.put(config(1), 'v1')['seq'] == 1
+    assert a.count('v1') == 1
+
+
+def test_retention_keeps_objects_saved_by_another_store(tmp_path):
+    a, b = SnapshotStore(str(tmp_path)), SnapshotStore(str(tmp_path))
+    a.put(config(1), 'v1')
+    a.put(config(2), 'v1')
+    newest = b.put(config(3), 'v1')
+    other = b.put(config(4), 'v2')
+
+    assert a.apply_retention(keep_last=1) == 2
+    assert [e['seq'] for e in b.history('v1')] == [3]
+    assert b.get(newest['hash']) == config(3)
+    assert a.get(other['hash']) == config(4)
+    assert b.put(config(5), 'v1')['seq'] == 4
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason="needs fork")
+def test_forked_writers_do_not_duplicate_sequence_numbers(tmp_path):
+    store = SnapshotStore(str(tmp_path))
+    store.put(config(0), 'v1')
+
+    pids = []
+    for worker in range(4):
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                for n in range(10):
+                    store.put(config(100 * (worker + 1) + n), 'v1')
+            except BaseException:
+                code = 1
+            os._exit(code)
+        pids.append(pid)
+    assert all(os.waitpid(pid, 0)[1] == 0 for pid in pids)
+
+    seqs = [e['seq'] for e in store.history('v1')]
+    assert seqs == list(range(1, 42))
@@ -0,0 +1,51 @@
+from pathlib import Path
+
+import pytest
+
+from business_rules import FraudDataGenerator
+from business_rules.rule_engine import RuleEngine
+from business_rules.trace_store import TraceStore
+
+CONFIG = Path(__file__).parent.parent / "config" / "rules_v1.yaml"
+
+
+@pytest.fixture(scope="module")
+def traced():
+    engine = RuleEngine(str(CONFIG))
+    records = FraudDataGenerator(seed=11).generate_dataset(200).to_dict('records')
+    return engine, [engine.evaluate_with_trace(record)[1] for record in records]
+
+
+def test_stored_traces_expand_to_the_engine_trace(tmp_path, traced):
+    engine, traces = traced
+    store = TraceStore(str(tmp_path))
+    for trace in traces:
+        store.put(engine, trace)
+
+    for trace in traces[:20]:
+        stored = store.get(trace.transaction_id)
+        assert len(stored) == 1
+        expected = trace.model_dump()
+        for rule in expected['evaluated_rules']:
+            rule['timestamp_ms'] = 0.0
+        expected['total_evaluation_time_ms'] = round(expected['total_evaluation_time_ms'], 4)
+        assert stored[0]['trace'].model_dump() == expected
+    store.close()
+
+
+def test_lookups_past_the_index_bound_scan_the_files(tmp_path, traced):
+    engine, traces = traced
+    store = TraceStore(str(tmp_path), max_file_bytes=4096, max_indexed=10)
+    for trace in traces:
+        store.put(engine, trace)
+    store.put(engine, traces[0])
+
+    assert store.stats()['files'] > 1
+    for trace in traces[:50]:
+        found = store.get(trace.transaction_id)
+        expected = 2 if trace is traces[0] else 1
+        assert len(found) == expected
+        assert found[0]['trace'].matched_rule_index == trace.matched_rule_index
+    assert store.stats()['indexed_transactions'] <= 10
+    assert store.get('missing') == []
+    store.close()
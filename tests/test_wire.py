@@ -0,0 +1,111 @@
+"""Binary wire formats: MessagePack and Arrow IPC give the same results as JSON"""
+
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from business_rules import FraudDataGenerator, RuleEngine, wire
+from business_rules.vectorized import VectorizedRuleSet
+
+pytest.importorskip("msgpack")
+pytest.importorskip("pyarrow")
+
+ROOT = Path(__file__).parent.parent
+CONFIG = ROOT / "config" / "rules_v1.yaml"
+
+
+@pytest.fixture(scope="module")
+def records():
+    return FraudDataGenerator(seed=17).generate_columns(400).to_dict('records')
+
+
+@pytest.mark.parametrize("accept, expected", [
+    (None, wire.JSON),
+    ("*/*", wire.JSON),
+    ("application/x-msgpack", wire.MSGPACK),
+    ("application/json;q=0.5, application/msgpack", wire.MSGPACK),
+    ("application/msgpack;q=0, application/json", wire.JSON),
+    ("text/html", None),
+])
+def test_negotiate(accept, expected):
+    assert wire.negotiate(accept) == expected
+
+
+def test_media_type_aliases_and_parameters():
+    assert wire.media_type("application/vnd.msgpack") == wire.MSGPACK
+    assert wire.media_type("application/json; charset=utf-8") == wire.JSON
+    assert wire.media_type("text/csv") is None
+
+
+def test_evaluate_frame_matches_engine(records):
+    engine = RuleEngine(str(CONFIG))
+    frame = wire.read_table(wire.write_table(pd.DataFrame(records)))
+    columns = wire.evaluate_frame(VectorizedRuleSet.from_engine(engine), frame)
+    expected = [engine.evaluate(record).model_dump(mode='json') for record in records]
+    assert wire.frame_records(columns) == [
+        {k: r[k] for k in wire.RESULT_COLUMNS} for r in expected
+    ]
+
+
+@pytest.fixture(scope="module")
+def client():
+    testclient = pytest.importorskip("fastapi.testclient")
+    sys.path.insert(0, str(ROOT / "backend"))
+    from main import app
+    return testclient.TestClient(app)
+
+
+def post_batch(client, body, content_type, accept=None):
+    headers = {"content-type": content_type}
+    if accept:
+        headers["accept"] = accept
+    return client.post(
+        "/api/v1/evaluate/batch", content=body, headers=headers,
+        params={"version": "v1", "enable_trace": "false"}
+    )
+
+
+def test_batch_formats_give_the_same_results(client, records):
+    reference = client.post(
+        "/api/v1/evaluate/batch", json=records, params={"version": "v1", "enable_trace": "false"}
+    )
+    assert reference.status_code == 200
+    expected = [{k: r[k] for k in wire.RESULT_COLUMNS} for r in reference.json()["results"]]
+
+    packed = post_batch(client, wire.pack(records), wire.MSGPACK)
+    assert packed.headers["content-type"] == wire.MSGPACK
+    assert [
+        {k: r[k] for k in wire.RESULT_COLUMNS} for r in wire.unpack(packed.content)["results"]
+    ] == expected
+
+    table = wire.write_table(pd.DataFrame(records))
+    arrow = post_batch(client, table, wire.ARROW)
+    assert arrow.headers["content-type"] == wire.ARROW
+    assert wire.frame_records(wire.read_table(arrow.content)) == expected
+
+    as_json = post_batch(client, table, wire.ARROW, accept=wire.JSON)
+    assert as_json.json()["results"] == expected
+
+
+def test_single_evaluation_in_msgpack(client, records):
+    reference = client.post("/api/v1/evaluate", json=records[0], params={"enable_trace": "false"})
+    packed = client.post(
+        "/api/v1/evaluate", content=wire.pack(records[0]), params={"enable_trace": "false"},
+        headers={"content-type": wire.MSGPACK}
+    )
+    assert packed.status_code == 200
+    assert wire.unpack(packed.content)["result"] == reference.json()["result"]
+
+
+@pytest.mark.parametrize("content_type, body, accept, status", [
+    ("text/csv", b"a,b", None, 415),
+    (wire.MSGPACK, None, "text/html", 406),
+    (wire.MSGPACK, b"\xc1", None, 400),
+    (wire.ARROW, b"not arrow", None, 400),
+])
+def test_batch_errors(client, records, content_type, body, accept, status):
+    body = body if body is not None else wire.pack(records)
+    response = post_batch(client, body, content_type, accept)
+    assert response.status_code == status